@@ -0,0 +1,311 @@
+import tempfile
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Callable, List, Tuple
+from synthetic import scattered_ohlcv, synthetic_ohlcv
+
+# Benchmark cases: (name, callable) pairs, one per operation and data size.
+# Time cases are timed per call; memory cases are called once and measured
+# for the bytes their result keeps allocated. Groups whose package cannot be
+# imported in this environment (the bot needs its own requirements) are
+# reported as skipped instead.
+
+Case = Tuple[str, Callable[[], object]]
+
+# The per-bar loop detectors take seconds from a few thousand bars on, so
+# they are only timed up to this size
+LOOP_MAX_BARS = 2000
+
+# Order block detection on long histories, whatever --sizes says
+LARGE_SIZES = [100_000, 1_000_000]
+
+def strategy_cases(sizes: List[int]) -> List[Case]:
+    """
+    Detectors, indicators, volume profile and analyze() on synthetic bars
+    """
+    from qss_ai.strategy.models import ORDER_BLOCK, Zone
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    from qss_ai.strategy.zone_index import ZoneIndex
+
+    cases = []
+    for n in sizes:
+        df = synthetic_ohlcv(n, seed=n)
+        strategy = QuantumSmartFlowStrategy()
+        strategy.result_cache = None
+        indicators = strategy._calculate_indicators(df)
+
+        # Tagged frame: after the first call only the forming bar is evaluated
+        streaming = QuantumSmartFlowStrategy()
+        streaming.result_cache = None
+        streaming._calculate_indicators(df, 'BENCH', '15m')
+
+        # n zones of ~0.1 wide spread over 0..n/10, so about one contains a given price
+        zones = ZoneIndex()
+        rng = np.random.default_rng(n)
+        for bottom, width in zip(rng.uniform(0, n / 10, n), rng.uniform(0.01, 0.2, n)):
+            zones.add('bullish', Zone(ORDER_BLOCK, df.index[0], df.index[1], bottom + width, bottom, 0.0))
+        prices = rng.uniform(0, n / 10, 64).tolist()
+
+        cases += [
+            (f'strategy.detect_order_blocks[{n}]', lambda s=strategy, d=indicators: s.detect_order_blocks(d)),
+            (f'strategy.detect_fair_value_gaps[{n}]', lambda s=strategy, d=indicators: s.detect_fair_value_gaps(d)),
+            (f'strategy.detect_liquidity_zones[{n}]', lambda s=strategy, d=indicators: s.detect_liquidity_zones(d)),
+            (f'strategy.detect_market_structure[{n}]', lambda s=strategy, d=indicators: s.detect_market_structure(d)),
+            (f'strategy._calculate_indicators[{n}]', lambda s=strategy, d=df: s._calculate_indicators(d)),
+            (f'strategy._calculate_indicators.streaming[{n}]',
+             lambda s=streaming, d=df: s._calculate_indicators(d, 'BENCH', '15m')),
+            (f'strategy._check_volume_profile[{n}]', lambda s=strategy, d=indicators: s._check_volume_profile(d)),
+            (f'strategy.ote_bars[{n}]', lambda s=strategy, d=df: s.ote_bars(d)),
+            (f'strategy.analyze[{n}]', lambda s=strategy, d=df: s.analyze(d)),
+            (f'strategy.analyze.streaming[{n}]', lambda s=streaming, d=df: s.analyze(d, 'BENCH', '15m')),
+            (f'strategy.ZoneIndex.containing[{n}]',
+             lambda z=zones, p=prices: [z.containing(ORDER_BLOCK, 'bullish', price) for price in p]),
+        ]
+        if n <= LOOP_MAX_BARS:
+            cases += loop_cases(n, indicators, strategy)
+    return cases
+
+def loop_cases(n: int, df, strategy) -> List[Case]:
+    """
+    The per-bar loop detectors the vectorized ones replaced, as a baseline
+    """
+    import reference
+
+    tolerance = strategy._average_true_range(df) * strategy.liquidity_atr_multiplier
+    return [
+        (f'strategy.loop.detect_order_blocks[{n}]', lambda d=df: reference.order_blocks(d)),
+        (f'strategy.loop.detect_fair_value_gaps[{n}]',
+         lambda d=df, t=strategy.fvg_threshold: reference.fair_value_gaps(d, t)),
+        (f'strategy.loop.detect_liquidity_zones[{n}]',
+         lambda d=df, k=strategy.liquidity_cluster_size, t=tolerance: reference.liquidity_zones(d, k, t)),
+        (f'strategy.loop.detect_market_structure[{n}]',
+         lambda d=df, w=strategy.swing_width: reference.market_structure(d, w)),
+    ]
+
+def large_cases() -> List[Case]:
+    """
+    Order block detection on 100k and 1M bars
+    """
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+
+    strategy = QuantumSmartFlowStrategy()
+    return [(f'strategy.detect_order_blocks.large[{n}]',
+             lambda d=scattered_ohlcv(n, seed=n): strategy.detect_order_blocks(d))
+            for n in LARGE_SIZES]
+
+def _scan_zones(n: int) -> List[tuple]:
+    """
+    Fields of every zone the detectors return over a full scan of n synthetic
+    bars, in Zone field order
+    """
+    from dataclasses import astuple
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+
+    strategy = QuantumSmartFlowStrategy()
+    df = strategy._calculate_indicators(synthetic_ohlcv(n, seed=n))
+    zones = []
+    for detect in (strategy.detect_order_blocks, strategy.detect_fair_value_gaps, strategy.detect_liquidity_zones):
+        for side in detect(df).values():
+            zones += [astuple(zone) for zone in side]
+    return zones
+
+def _zone_dict(kind, start, end, top, bottom, strength, filled, tolerance) -> dict:
+    """
+    A zone as the dict the detectors built before models.py
+    """
+    if kind == 'order_block':
+        return {'start': start, 'end': end, 'high': top, 'low': bottom, 'strength': strength}
+    if kind == 'fair_value_gap':
+        return {'start': start, 'end': end, 'top': top, 'bottom': bottom, 'size': strength, 'filled': filled}
+    return {'start': start, 'end': end, 'price': top, 'strength': strength, 'tolerance': tolerance}
+
+def model_cases(sizes: List[int]) -> Tuple[List[Case], List[Case]]:
+    """
+    Building the zones of a full scan as slotted Zone records and as dicts:
+    time cases for the build and memory cases for what the records retain
+    """
+    from qss_ai.strategy.models import Zone
+
+    def slotted(zones):
+        return [Zone(*fields) for fields in zones]
+
+    def dicts(zones):
+        return [_zone_dict(*fields) for fields in zones]
+
+    cases, memory = [], []
+    for n in sizes:
+        zones = _scan_zones(n)
+        for name, build in (('slotted', slotted), ('dict', dicts)):
+            cases.append((f'models.zones.{name}[{n}]', lambda b=build, z=zones: b(z)))
+            memory.append((f'models.zones.{name}.memory[{n}]', lambda b=build, z=zones: b(z)))
+    return cases, memory
+
+def indicator_cases(sizes: List[int]) -> List[Case]:
+    """
+    Each indicator computed with `ta` and with the NumPy kernels of
+    strategy/indicators.py, with the strategy's default parameters
+    """
+    from ta.momentum import RSIIndicator, StochasticOscillator
+    from ta.trend import EMAIndicator, MACD
+    from ta.volatility import BollingerBands
+    from ta.volume import VolumeWeightedAveragePrice
+    from qss_ai.strategy import indicators
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+
+    p = QuantumSmartFlowStrategy()
+    period = p.ema_periods[-1]
+    cases = []
+    for n in sizes:
+        df = synthetic_ohlcv(n, seed=n)
+        high, low, close, volume = df['high'], df['low'], df['close'], df['volume']
+        h, l, c, v = (x.to_numpy() for x in (high, low, close, volume))
+
+        def bollinger_ta(close=close):
+            bb = BollingerBands(close=close, window=p.bb_period, window_dev=p.bb_std)
+            return bb.bollinger_hband(), bb.bollinger_mavg(), bb.bollinger_lband()
+
+        def macd_ta(close=close):
+            macd = MACD(close=close, window_fast=p.macd_fast, window_slow=p.macd_slow, window_sign=p.macd_signal)
+            return macd.macd(), macd.macd_signal(), macd.macd_diff()
+
+        def stochastic_ta(high=high, low=low, close=close):
+            stoch = StochasticOscillator(high=high, low=low, close=close, window=p.stoch_k, smooth_window=p.stoch_d)
+            return stoch.stoch(), stoch.stoch_signal()
+
+        cases += [
+            (f'indicators.ta.ema[{n}]', lambda c=close: EMAIndicator(close=c, window=period).ema_indicator()),
+            (f'indicators.numpy.ema[{n}]', lambda c=c: indicators.ema(c, period)),
+            (f'indicators.ta.rsi[{n}]', lambda c=close: RSIIndicator(close=c, window=p.rsi_period).rsi()),
+            (f'indicators.numpy.rsi[{n}]', lambda c=c: indicators.rsi(c, p.rsi_period)),
+            (f'indicators.ta.bollinger_bands[{n}]', bollinger_ta),
+            (f'indicators.numpy.bollinger_bands[{n}]',
+             lambda c=c: indicators.bollinger_bands(c, p.bb_period, p.bb_std)),
+            (f'indicators.ta.vwap[{n}]',
+             lambda h=high, l=low, c=close, v=volume: VolumeWeightedAveragePrice(
+                 high=h, low=l, close=c, volume=v, window=p.vwap_period).volume_weighted_average_price()),
+            (f'indicators.numpy.vwap[{n}]',
+             lambda h=h, l=l, c=c, v=v: indicators.vwap(h, l, c, v, p.vwap_period)),
+            (f'indicators.ta.macd[{n}]', macd_ta),
+            (f'indicators.numpy.macd[{n}]',
+             lambda c=c: indicators.macd(c, p.macd_fast, p.macd_slow, p.macd_signal)),
+            (f'indicators.ta.stochastic[{n}]', stochastic_ta),
+            (f'indicators.numpy.stochastic[{n}]',
+             lambda h=h, l=l, c=c: indicators.stochastic(h, l, c, p.stoch_k, p.stoch_d)),
+        ]
+    return cases
+
+def risk_cases() -> List[Case]:
+    """
+    RiskManager checks against a book of open trades
+    """
+    from qss_ai.strategy.risk_manager import RiskManager
+
+    risk = RiskManager()
+    risk.update_account_balance(10000.0)
+    risk.open_trades = {'t1': {'symbol': 'GBP/USD', 'position_size': 500.0},
+                        't2': {'symbol': 'XAU/USD', 'position_size': 200.0}}
+    signal = {'symbol': 'EUR/USD', 'entry': 1.1, 'stop_loss': 1.095, 'take_profit': 1.11}
+
+    def close_trade():
+        risk.open_trades['t3'] = {'symbol': 'EUR/USD', 'position_size': 100.0}
+        risk.update_trade_status('t3', 'closed', 25.0)
+        risk.daily_trades.clear()
+
+    return [
+        ('risk.calculate_position_size', lambda: risk.calculate_position_size(signal)),
+        ('risk.should_take_trade', lambda: risk.should_take_trade(signal)),
+        ('risk.update_trade_status', close_trade),
+    ]
+
+def _market_data(pair: str, signals: int):
+    """
+    MarketData for pair with `signals` active signals, news and predictions
+    """
+    from bot.models.market_data import (MarketData, MarketNews, MarketPrediction, MarketStructure,
+                                        PerformanceMetrics, TechnicalIndicators, TradingSignal)
+
+    now = datetime.now()
+    return MarketData(
+        pair=pair,
+        timeframe='15m',
+        current_price=1.1,
+        structure=MarketStructure(trend='bullish', strength=0.75, support_levels=[1.09], resistance_levels=[1.12]),
+        indicators=TechnicalIndicators(rsi=55.0, macd={'macd': 0.001, 'signal': 0.0008},
+                                       bollinger_bands={'upper': [1.12], 'lower': [1.08]},
+                                       moving_averages={'ema_50': 1.1}, volume_profile={'poc': 1.1}),
+        active_signals=[TradingSignal(pair=pair, direction='BUY', entry_price=1.1, stop_loss=1.095,
+                                      take_profit=1.11, risk_reward=2.0, confidence=0.75, timeframe='15m',
+                                      timestamp=now - timedelta(minutes=i))
+                        for i in range(signals)],
+        recent_news=[MarketNews(title='CPI', description='CPI release', impact='HIGH', currency='USD',
+                                timestamp=now - timedelta(hours=i), source='bench')
+                     for i in range(min(signals, 100))],
+        predictions=[MarketPrediction(pair=pair, timeframe='1h', prediction='up', confidence=0.6,
+                                      target_price=1.12, stop_loss=1.09)
+                     for _ in range(min(signals, 50))],
+        performance=PerformanceMetrics(total_trades=10, winning_trades=6, losing_trades=4, win_rate=0.6,
+                                       average_profit=20.0, average_loss=10.0, profit_factor=3.0,
+                                       max_drawdown=30.0, period='DAILY')
+    )
+
+def bot_storage_cases(sizes: List[int]) -> List[Case]:
+    """
+    PerformanceTracker and DataManager file operations; n is the number of
+    stored trades and, divided by 10, of active signals per pair
+    """
+    from bot.utils.data_manager import DataManager
+    from bot.utils.performance_tracker import PerformanceTracker
+
+    cases = []
+    for n in sizes:
+        tracker = PerformanceTracker(tempfile.mkdtemp(prefix='bench_tracker_'))
+        tracker._save_trades([{'symbol': 'EUR/USD', 'profit': (i % 3 - 1) * 10.0,
+                               'timestamp': (datetime.now() - timedelta(hours=i)).isoformat()}
+                              for i in range(n)])
+
+        manager = DataManager(tempfile.mkdtemp(prefix='bench_data_'))
+        data = _market_data('EUR/USD', n // 10)
+        for pair in ('EUR/USD', 'GBP/USD', 'USD/JPY', 'XAU/USD'):
+            manager.save_market_data(data.model_copy(update={'pair': pair}))
+
+        def get_cold(manager=manager):
+            manager._cache.clear()
+            return manager.get_market_data('EUR/USD')
+
+        def active_signals_cold(manager=manager):
+            manager._cache.clear()
+            return manager.get_active_signals()
+
+        cases += [
+            # Appends, so the history grows slightly over the timed calls
+            (f'bot.PerformanceTracker.add_trade[{n}]',
+             lambda t=tracker: t.add_trade({'symbol': 'EUR/USD', 'profit': 10.0})),
+            (f'bot.PerformanceTracker._calculate_stats[{n}]', lambda t=tracker: t._calculate_stats()),
+            (f'bot.PerformanceTracker.get_trade_history[{n}]', lambda t=tracker: t.get_trade_history(30)),
+            (f'bot.DataManager.save_market_data[{n}]', lambda m=manager, d=data: m.save_market_data(d)),
+            (f'bot.DataManager.get_market_data[{n}]', get_cold),
+            (f'bot.DataManager.get_active_signals[{n}]', active_signals_cold),
+        ]
+    return cases
+
+def all_cases(sizes: List[int]) -> Tuple[List[Case], List[Case], List[str]]:
+    """
+    Every time case and memory case, plus a note for each group that had to
+    be skipped
+    """
+    cases, memory, skipped = [], [], []
+    groups = [('strategy', lambda: (strategy_cases(sizes), [])),
+              ('strategy large', lambda: (large_cases(), [])),
+              ('models', lambda: model_cases(sizes)),
+              ('indicators', lambda: (indicator_cases(sizes), [])),
+              ('risk', lambda: (risk_cases(), [])),
+              ('bot storage', lambda: (bot_storage_cases(sizes), []))]
+    for name, build in groups:
+        try:
+            timed, measured = build()
+        except ImportError as e:
+            skipped.append(f"{name}: {e}")
+            continue
+        cases += timed
+        memory += measured
+    return cases, memory, skipped
@@ -0,0 +1,165 @@
+"""
+Benchmark suite for the strategy, risk manager and bot storage layers.
+
+    python benchmarks/run.py                  # compare against benchmarks/baseline.json
+    python benchmarks/run.py --save           # record the current timings as the baseline
+    python benchmarks/run.py -k detect_ --sizes 1000   # vs the per-bar loops, plus 100k/1M bars
+    python benchmarks/run.py -k indicators.            # each indicator, `ta` vs NumPy
+    python benchmarks/run.py -k models.                # Zone records vs dicts, time and memory
+
+Timings are the best per-call time of several repeats. A case slower than
+its baseline by more than --threshold (25% by default) is a regression and
+makes the run exit with status 1. Baselines only mean something on the
+machine they were recorded on: the committed baseline.json records the
+machine it came from, and elsewhere the first step is --save. Memory cases report the bytes their result
+keeps allocated, as traced by tracemalloc, and are compared the same way.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / 'telegram_bot'), str(ROOT / 'tests')]
+
+from cases import all_cases
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+DEFAULT_SIZES = [500, 2000, 10000]
+
+def measure(func: Callable[[], object], min_time: float = 0.05, repeat: int = 5) -> Dict[str, float]:
+    """
+    Per-call time of func: the number of calls per repeat is raised until a
+    repeat takes at least min_time, then the best and median of `repeat`
+    repeats are taken
+    """
+    def timed(loops: int) -> float:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        return time.perf_counter() - start
+
+    loops = 1
+    while True:
+        elapsed = timed(loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.2))
+
+    times = [timed(loops) / loops for _ in range(repeat)]
+    return {'best': min(times), 'median': statistics.median(times), 'loops': loops}
+
+def measure_memory(build: Callable[[], object]) -> Dict[str, float]:
+    """
+    Bytes allocated by build() that its result still holds
+    """
+    tracemalloc.start()
+    try:
+        result = build()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return {'bytes': retained}
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float,
+            key: str = 'best') -> Dict[str, str]:
+    """
+    Status of every result against the baseline by `key`: 'ok', 'faster'
+    (or smaller), 'REGRESSION' or 'new'
+    """
+    status = {}
+    for name, result in results.items():
+        if name not in baseline:
+            status[name] = 'new'
+            continue
+        ratio = result[key] / baseline[name][key]
+        if ratio > 1 + threshold:
+            status[name] = 'REGRESSION'
+        elif ratio < 1 / (1 + threshold):
+            status[name] = 'faster'
+        else:
+            status[name] = 'ok'
+    return status
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+def _format_bytes(size: float) -> str:
+    for unit, scale in (('MB', 1 << 20), ('kB', 1 << 10)):
+        if size >= scale:
+            return f"{size / scale:8.2f} {unit}"
+    return f"{size:8.0f} B "
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Bars (or stored trades) per case')
+    parser.add_argument('-k', '--filter', default='', help='Only run cases whose name contains this')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Store the results as the baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--min-time', type=float, default=0.05, help='Minimum seconds per repeat')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cases, memory_cases, skipped = all_cases(args.sizes)
+    for note in skipped:
+        print(f"skipped {note}")
+
+    results = {}
+    for name, func in cases:
+        if args.filter in name:
+            results[name] = measure(func, args.min_time, args.repeat)
+    memory = {name: measure_memory(build) for name, build in memory_cases if args.filter in name}
+
+    baseline, memory_baseline = {}, {}
+    if args.baseline.exists():
+        stored = json.loads(args.baseline.read_text())
+        baseline, memory_baseline = stored['results'], stored.get('memory', {})
+    status = compare(results, baseline, args.threshold)
+    status.update(compare(memory, memory_baseline, args.threshold, 'bytes'))
+
+    width = max((len(name) for name in [*results, *memory]), default=0)
+    for name, result in results.items():
+        line = f"{name:<{width}}  {_format_time(result['best'])}"
+        if name in baseline:
+            line += f"  {result['best'] / baseline[name]['best']:6.2f}x  {status[name]}"
+        print(line)
+    for name, result in memory.items():
+        line = f"{name:<{width}}  {_format_bytes(result['bytes'])}"
+        if name in memory_baseline:
+            line += f"  {result['bytes'] / memory_baseline[name]['bytes']:6.2f}x  {status[name]}"
+        print(line)
+
+    if args.save:
+        baseline.update(results)
+        memory_baseline.update(memory)
+        args.baseline.write_text(json.dumps({
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'processor': platform.processor()},
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'results': baseline,
+            'memory': memory_baseline
+        }, indent=2))
+        print(f"saved {len(results) + len(memory)} results to {args.baseline}")
+        return 0
+
+    regressions = [name for name, state in status.items() if state == 'REGRESSION']
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    if not baseline:
+        print(f"no baseline at {args.baseline}, run with --save to record one")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from typing import Dict
+
+# Synthetic OHLCV for the benchmarks: a random walk with displacement legs
+# injected at regular intervals, so the fair value gap and order block
+# detectors have patterns to find at every size.
+
+def random_walk(n: int, seed: int = 0, price: float = 100.0,
+                volatility: float = 0.1) -> Dict[str, np.ndarray]:
+    """
+    OHLCV arrays of a Gaussian random walk; each bar opens at the previous
+    close
+    """
+    rng = np.random.default_rng(seed)
+    close = price + np.cumsum(rng.normal(0, volatility, n))
+    open_ = np.r_[price, close[:-1]]
+    wick = np.abs(rng.normal(0, volatility / 2, (2, n)))
+    return {
+        'open': open_,
+        'high': np.maximum(open_, close) + wick[0],
+        'low': np.minimum(open_, close) - wick[1],
+        'close': close,
+        'volume': rng.uniform(100, 1000, n)
+    }
+
+def _displace(bars: Dict[str, np.ndarray], k: int, jump: float):
+    """
+    Move every bar after k by jump, with bar k as the displacement candle
+    between the old and the new level
+    """
+    for name in ('open', 'high', 'low', 'close'):
+        bars[name][k + 1:] += jump
+    bars['close'][k] += jump
+    bars['high'][k] = max(bars['high'][k], bars['close'][k])
+    bars['low'][k] = min(bars['low'][k], bars['close'][k])
+
+def inject_gaps(bars: Dict[str, np.ndarray], every: int, size: float, seed: int = 0):
+    """
+    A displacement leg of `size` (up or down) every `every` bars, leaving a
+    three-candle fair value gap around it
+    """
+    rng = np.random.default_rng(seed)
+    for k in range(every, len(bars['close']) - 2, every):
+        _displace(bars, k, size * rng.choice((-1, 1)))
+
+def inject_order_blocks(bars: Dict[str, np.ndarray], every: int, size: float, seed: int = 0):
+    """
+    Every `every` bars, a candle against the coming move followed by a
+    candle that opens `size` away from it and closes with the move
+    """
+    rng = np.random.default_rng(seed)
+    for k in range(every // 2, len(bars['close']) - 2, every):
+        direction = rng.choice((-1, 1))
+        _turn(bars, k, -direction)
+        for name in ('open', 'high', 'low', 'close'):
+            bars[name][k + 1:] += size * direction
+        _turn(bars, k + 1, direction)
+
+def _turn(bars: Dict[str, np.ndarray], k: int, direction: int):
+    """
+    Make candle k close in direction (1 up, -1 down)
+    """
+    o, c = bars['open'][k], bars['close'][k]
+    if (c - o) * direction < 0:
+        bars['open'][k], bars['close'][k] = c, o
+
+def synthetic_ohlcv(n: int, seed: int = 0, volatility: float = 0.1, gap_every: int = 40,
+                    block_every: int = 60, freq: str = '15min') -> pd.DataFrame:
+    """
+    OHLCV frame of n bars: random walk plus gaps and order blocks
+    """
+    bars = random_walk(n, seed, volatility=volatility)
+    inject_gaps(bars, gap_every, 8 * volatility, seed)
+    inject_order_blocks(bars, block_every, 8 * volatility, seed + 1)
+    index = pd.date_range('2024-01-01', periods=n, freq=freq, name='timestamp')
+    return pd.DataFrame(bars, index=index)
+
+def scattered_ohlcv(n: int, seed: int = 0, freq: str = '1min') -> pd.DataFrame:
+    """
+    OHLCV frame of n bars whose opens and closes scatter around a random
+    walk, so candles gap against each other and order blocks, FVGs and
+    swings turn up everywhere. Fully vectorized, for frames of 1M+ bars.
+    """
+    rng = np.random.default_rng(seed)
+    mid = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    open_ = mid + rng.normal(0, 0.3, n)
+    close = mid + rng.normal(0, 0.3, n)
+    wick = np.abs(rng.normal(0, 0.1, (2, n)))
+    index = pd.date_range('2024-01-01', periods=n, freq=freq, name='timestamp')
+    return pd.DataFrame({'open': open_, 'high': np.maximum(open_, close) + wick[0],
+                         'low': np.minimum(open_, close) - wick[1], 'close': close,
+                         'volume': rng.uniform(100, 1000, n)}, index=index)
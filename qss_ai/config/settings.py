@@ -16,6 +16,9 @@ SYMBOLS = [
 
 # Timeframes to analyze
 TIMEFRAMES = ["4h", "1h", "30m", "15m"]
+BASE_TIMEFRAME = "15m"  # Fetched from the exchange; higher timeframes are built from it locally
+CASCADE_SCAN = True  # Analyze lower timeframes only in the direction of the first (highest) one
+PROFILE_STAGES = False  # Time each stage of the analysis and log the breakdown every cycle
 
 # Telegram configuration
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
@@ -4,8 +4,12 @@ from typing import Dict, List, Optional
 from abc import ABC, abstractmethod
 
 class ExchangeInterface(ABC):
+    # Most candles a single OHLCV request returns
+    max_ohlcv_limit = 500
+
     @abstractmethod
-    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100,
+                    since: Optional[int] = None) -> pd.DataFrame:
         pass
 
     @abstractmethod
@@ -17,6 +21,8 @@ class ExchangeInterface(ABC):
         pass
 
 class BinanceExchange(ExchangeInterface):
+    max_ohlcv_limit = 1000
+
     def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
         self.exchange = ccxt.binance({
             'apiKey': api_key,
@@ -24,9 +30,10 @@ class BinanceExchange(ExchangeInterface):
             'enableRateLimit': True
         })
 
-    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100,
+                    since: Optional[int] = None) -> pd.DataFrame:
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             df.set_index('timestamp', inplace=True)
@@ -51,6 +58,8 @@ class BinanceExchange(ExchangeInterface):
             return {}
 
 class FTXExchange(ExchangeInterface):
+    max_ohlcv_limit = 1500
+
     def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
         self.exchange = ccxt.ftx({
             'apiKey': api_key,
@@ -58,9 +67,10 @@ class FTXExchange(ExchangeInterface):
             'enableRateLimit': True
         })
 
-    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
+    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100,
+                    since: Optional[int] = None) -> pd.DataFrame:
         try:
-            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
             df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
             df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
             df.set_index('timestamp', inplace=True)
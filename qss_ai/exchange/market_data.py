@@ -1,42 +1,119 @@
+import time
 import pandas as pd
 from typing import Dict, Optional
 from .exchange_interface import ExchangeFactory
-from ..config.settings import EXCHANGE_ID, SYMBOLS, TIMEFRAMES
+from .resampler import TimeframeResampler
+from ..config.settings import BASE_TIMEFRAME, EXCHANGE_ID, SYMBOLS, TIMEFRAMES
 
 class MarketDataProvider:
     def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
         self.exchange = ExchangeFactory.create_exchange(EXCHANGE_ID, api_key, api_secret)
         self.cache = {}
+        self.cache_info = {}  # Fetch time and bars requested for each cached frame
         self.cache_timeout = 60  # Cache timeout in seconds
+        self.resampler = TimeframeResampler(BASE_TIMEFRAME)  # None fetches every timeframe separately
 
     def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int = 100) -> pd.DataFrame:
         """
-        Fetch OHLCV data for a symbol and timeframe
+        Fetch OHLCV data for a symbol and timeframe. The history is cached, so
+        once it has been loaded only the bars from the last cached one (which
+        may still have been forming) onwards are requested.
         """
         cache_key = f"{symbol}_{timeframe}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            fetched_at, cached_limit = self.cache_info[cache_key]
+            if cached_limit < limit:
+                # Not enough history cached
+                cached = None
         
         # Check cache first
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        if cached is not None and time.time() - fetched_at < self.cache_timeout:
+            return cached.iloc[-limit:]
         
         try:
-            df = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            bar_ms = int(pd.Timedelta(timeframe).total_seconds() * 1000)
+            now_ms = int(time.time() * 1000)
+            now_ms -= now_ms % bar_ms  # Open of the current bar
+            if cached is not None:
+                last_ms = int(cached.index[-1].timestamp() * 1000)
+                missing = (now_ms - last_ms) // bar_ms + 1
+            else:
+                missing = limit
+            
+            if missing < limit:
+                # Top up the cached history
+                new = self._fetch_since(symbol, timeframe, last_ms, missing)
+                if new.empty:
+                    return cached.iloc[-limit:]
+                df = pd.concat([cached[cached.index < new.index[0]], new])
+            elif limit <= self.exchange.max_ohlcv_limit:
+                df = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+            else:
+                df = self._fetch_since(symbol, timeframe, now_ms - (limit - 1) * bar_ms, limit)
+            
+            if df.empty:
+                return df
+            df = df.iloc[-limit:]
             self.cache[cache_key] = df
+            self.cache_info[cache_key] = (time.time(), limit)
             return df
         except Exception as e:
             print(f"Error fetching OHLCV data for {symbol} on {timeframe}: {str(e)}")
             return pd.DataFrame()
 
-    def get_all_market_data(self) -> Dict[str, Dict[str, pd.DataFrame]]:
+    def _fetch_since(self, symbol: str, timeframe: str, since: int, limit: int) -> pd.DataFrame:
         """
-        Get market data for all symbols and timeframes
+        Fetch up to limit bars starting at `since` (ms), paging through
+        requests of at most max_ohlcv_limit bars
+        """
+        pages = []
+        remaining = limit
+        while remaining > 0:
+            page = self.exchange.fetch_ohlcv(symbol, timeframe,
+                                             limit=min(remaining, self.exchange.max_ohlcv_limit),
+                                             since=since)
+            if page.empty:
+                break
+            pages.append(page)
+            remaining -= len(page)
+            since = int(page.index[-1].timestamp() * 1000) + 1
+        
+        if not pages:
+            return pd.DataFrame()
+        df = pd.concat(pages)
+        return df[~df.index.duplicated(keep='last')]
+
+    def get_all_market_data(self, limit: int = 100) -> Dict[str, Dict[str, pd.DataFrame]]:
+        """
+        Get market data for all symbols and timeframes. Timeframes the
+        resampler can build come from a single base timeframe request per
+        symbol.
+
+        The base history has to cover `limit` bars of the highest timeframe:
+        for 4h built from 15m with limit=required_history() (561 bars) that
+        is 8992 bars, so the first call pages through 9 requests per symbol
+        on Binance. Later calls only top up the cached history, one request
+        per symbol.
         """
         market_data = {}
         
+        derived = []
+        if self.resampler is not None:
+            derived = [timeframe for timeframe in TIMEFRAMES if self.resampler.can_resample(timeframe)]
+        
         for symbol in SYMBOLS:
             market_data[symbol] = {}
+            if derived:
+                # One spare bucket, the first may be only partly covered
+                base_limit = (limit + 1) * max(self.resampler.ratio(timeframe) for timeframe in derived)
+                self.resampler.update(symbol, self.fetch_ohlcv(symbol, self.resampler.base_timeframe,
+                                                               limit=base_limit))
             for timeframe in TIMEFRAMES:
-                df = self.fetch_ohlcv(symbol, timeframe)
+                if timeframe in derived:
+                    df = self.resampler.resample(symbol, timeframe, limit)
+                else:
+                    df = self.fetch_ohlcv(symbol, timeframe, limit=limit)
                 if not df.empty:
                     market_data[symbol][timeframe] = df
         
@@ -56,4 +133,7 @@ class MarketDataProvider:
         """
         Clear the data cache
         """
-        self.cache.clear() 
\ No newline at end of file
+        self.cache.clear()
+        self.cache_info.clear()
+        if self.resampler is not None:
+            self.resampler.reset() 
\ No newline at end of file
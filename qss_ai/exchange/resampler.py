@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+DAY_NS = pd.Timedelta('1D').value
+
+COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+
+def timeframe_ns(timeframe: str) -> int:
+    """
+    Length of a timeframe such as '15m' or '4h' in nanoseconds
+    """
+    return pd.Timedelta(timeframe).value
+
+def aggregate_bars(timestamps: np.ndarray, bars: Dict[str, np.ndarray], bar_ns: int) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Combine time-ordered bars into bars of bar_ns, each starting at a
+    multiple of bar_ns since the epoch (so 4h bars open at 00:00, 04:00, ...)
+    """
+    buckets = timestamps - timestamps % bar_ns
+    if not len(buckets):
+        return buckets, {name: np.zeros(0) for name in COLUMNS}
+
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(buckets)] - 1
+    return buckets[starts], {
+        'open': bars['open'][starts],
+        'high': np.maximum.reduceat(bars['high'], starts),
+        'low': np.minimum.reduceat(bars['low'], starts),
+        'close': bars['close'][ends],
+        'volume': np.add.reduceat(bars['volume'], starts)
+    }
+
+class BaseBarBuffer:
+    """
+    The most recent base timeframe bars of one symbol, in preallocated
+    arrays. Once full the oldest bars are dropped.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self.bars = {name: np.zeros(2 * capacity) for name in COLUMNS}
+        self.start = 0
+        self.stop = 0
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def last_timestamp(self) -> Optional[int]:
+        return int(self.timestamps[self.stop - 1]) if len(self) else None
+
+    def view(self, first: int = 0) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Timestamps and OHLCV of the stored bars from position `first` on
+        """
+        lo = self.start + first
+        return (self.timestamps[lo:self.stop],
+                {name: values[lo:self.stop] for name, values in self.bars.items()})
+
+    def write(self, timestamps: np.ndarray, bars: Dict[str, np.ndarray]):
+        """
+        Store bars, replacing any stored bar at or after the first new one
+        (the last stored bar may have still been forming)
+        """
+        if not len(timestamps):
+            return
+        stored = self.timestamps[self.start:self.stop]
+        self.stop = self.start + int(np.searchsorted(stored, timestamps[0]))
+
+        # Keep only what fits, then slide the window back to the front of
+        # the arrays when the new bars would run past their end
+        timestamps = timestamps[-self.capacity:]
+        bars = {name: values[-self.capacity:] for name, values in bars.items()}
+        keep = min(len(self), self.capacity - len(timestamps))
+        if self.stop + len(timestamps) > len(self.timestamps):
+            lo = self.stop - keep
+            self.timestamps[:keep] = self.timestamps[lo:self.stop]
+            for values in self.bars.values():
+                values[:keep] = values[lo:self.stop]
+            self.start, self.stop = 0, keep
+        else:
+            self.start = self.stop - keep
+
+        n = len(timestamps)
+        self.timestamps[self.stop:self.stop + n] = timestamps
+        for name, values in self.bars.items():
+            values[self.stop:self.stop + n] = bars[name]
+        self.stop += n
+
+class TimeframeResampler:
+    """
+    Builds higher timeframe OHLCV frames from one base timeframe feed per
+    symbol.
+
+    Higher timeframe bars are epoch aligned, which matches exchange bars up
+    to one day. A leading bucket the base history only partly covers is
+    dropped; the last bucket is returned while it is still forming, like an
+    exchange would. Bars whose base bars have not changed are kept from the
+    previous call, so each update only re-aggregates the newest buckets.
+    """
+
+    def __init__(self, base_timeframe: str = '15m', capacity: int = 10000):
+        self.base_timeframe = base_timeframe
+        self.base_ns = timeframe_ns(base_timeframe)
+        self.capacity = capacity
+        self.buffers: Dict[str, BaseBarBuffer] = {}
+        self.frames: Dict[Tuple[str, str], pd.DataFrame] = {}
+        self.dirty: Dict[Tuple[str, str], int] = {}  # Earliest base bar changed since the last resample
+
+    def can_resample(self, timeframe: str) -> bool:
+        """
+        Whether timeframe can be built from the base timeframe
+        """
+        bar_ns = timeframe_ns(timeframe)
+        return bar_ns >= self.base_ns and bar_ns % self.base_ns == 0 and bar_ns <= DAY_NS
+
+    def ratio(self, timeframe: str) -> int:
+        """
+        Base bars per bar of timeframe
+        """
+        return timeframe_ns(timeframe) // self.base_ns
+
+    def reset(self, symbol: Optional[str] = None):
+        """
+        Drop the buffers for one symbol, or for everything
+        """
+        if symbol is None:
+            self.buffers.clear()
+            self.frames.clear()
+            self.dirty.clear()
+            return
+        self.buffers.pop(symbol, None)
+        self.reset_frames(symbol)
+
+    def update(self, symbol: str, df: pd.DataFrame):
+        """
+        Feed base timeframe bars; bars already stored are skipped, except the
+        last one, which is replaced
+        """
+        if df.empty:
+            return
+        buffer = self.buffers.get(symbol)
+        if buffer is None or buffer.capacity < len(df):
+            buffer = self.buffers[symbol] = BaseBarBuffer(max(self.capacity, len(df)))
+            self.reset_frames(symbol)
+
+        timestamps = df.index.as_unit('ns').asi8
+        last = buffer.last_timestamp()
+        first = 0 if last is None else int(np.searchsorted(timestamps, last))
+        if first >= len(timestamps):
+            return
+        buffer.write(timestamps[first:], {name: df[name].to_numpy(dtype=float)[first:] for name in COLUMNS})
+
+        changed = int(timestamps[first])
+        for key in self.frames:
+            if key[0] == symbol:
+                self.dirty[key] = min(self.dirty.get(key, changed), changed)
+
+    def reset_frames(self, symbol: str):
+        """
+        Forget the built frames of symbol so they are rebuilt from the buffer
+        """
+        for key in [key for key in self.frames if key[0] == symbol]:
+            self.frames.pop(key)
+            self.dirty.pop(key, None)
+
+    def resample(self, symbol: str, timeframe: str, limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        OHLCV frame of timeframe for symbol, the last `limit` bars of it
+        """
+        buffer = self.buffers.get(symbol)
+        if buffer is None or not len(buffer):
+            return pd.DataFrame()
+        key = (symbol, timeframe)
+        bar_ns = timeframe_ns(timeframe)
+
+        frame = self.frames.get(key)
+        if frame is not None and key not in self.dirty:
+            return frame.iloc[-limit:] if limit else frame
+
+        timestamps, _ = buffer.view()
+        if frame is not None and len(frame) and self.dirty[key] >= timestamps[0]:
+            # Keep the bars before the bucket holding the first changed base bar
+            bucket = self.dirty[key] - self.dirty[key] % bar_ns
+            frame = frame[frame.index.as_unit('ns').asi8 < bucket]
+            first = int(np.searchsorted(timestamps, bucket))
+        else:
+            # Full rebuild, skipping a first bucket the buffer only partly covers
+            frame = None
+            first = 0
+            if timestamps[0] % bar_ns:
+                first = int(np.searchsorted(timestamps, timestamps[0] - timestamps[0] % bar_ns + bar_ns))
+
+        bucket_starts, bars = aggregate_bars(*buffer.view(first), bar_ns)
+        new = pd.DataFrame(bars, index=pd.DatetimeIndex(bucket_starts.astype('datetime64[ns]'), name='timestamp'))
+        frame = new if frame is None or frame.empty else pd.concat([frame, new])
+
+        # Keep about as many bars as the buffer can ever rebuild
+        frame = frame.iloc[-(buffer.capacity // self.ratio(timeframe) + 1):]
+        self.frames[key] = frame
+        self.dirty.pop(key, None)
+        return frame.iloc[-limit:] if limit else frame
@@ -11,6 +11,8 @@ from telegram.signal_sender import SignalSender
 from config.settings import (
     SYMBOLS,
     TIMEFRAMES,
+    CASCADE_SCAN,
+    PROFILE_STAGES,
     LONDON_SESSION_START,
     LONDON_SESSION_END,
     NY_SESSION_START,
@@ -32,6 +34,7 @@ class QSSMonitor:
     def __init__(self):
         self.market_data = MarketDataProvider()
         self.strategy = QuantumSmartFlowStrategy()
+        self.strategy.profiler.enabled = PROFILE_STAGES
         self.signal_sender = SignalSender()
         self.last_signals = {}  # Track last signals to avoid duplicates
 
@@ -60,8 +63,9 @@ class QSSMonitor:
             return
 
         try:
-            # Get market data for all symbols and timeframes
-            market_data = self.market_data.get_all_market_data()
+            # Get market data for all symbols and timeframes, with enough
+            # history for every indicator to be warmed up
+            market_data = self.market_data.get_all_market_data(limit=self.strategy.required_history())
             
             for symbol in SYMBOLS:
                 logger.info(f"Analyzing {symbol}")
@@ -71,15 +75,16 @@ class QSSMonitor:
                 if not symbol_data:
                     continue
                 
-                # Analyze each timeframe
-                for timeframe in TIMEFRAMES:
-                    df = symbol_data.get(timeframe)
-                    if df is None or df.empty:
-                        continue
-                    
-                    # Get signal from strategy
-                    signal = self.strategy.analyze(df)
-                    
+                # Get signals from strategy, highest timeframe first in cascade mode
+                frames = {timeframe: symbol_data[timeframe] for timeframe in TIMEFRAMES
+                          if timeframe in symbol_data and not symbol_data[timeframe].empty}
+                if CASCADE_SCAN:
+                    signals = self.strategy.analyze_cascade(frames, symbol)
+                else:
+                    signals = {timeframe: self.strategy.analyze(df, symbol, timeframe)
+                               for timeframe, df in frames.items()}
+                
+                for timeframe, signal in signals.items():
                     if signal:
                         # Add symbol and timeframe to signal
                         signal['symbol'] = symbol
@@ -95,6 +100,14 @@ class QSSMonitor:
                                 self.last_signals[signal_key] = datetime.now()
                             else:
                                 logger.error(f"Failed to send signal for {symbol} on {timeframe}")
+            
+            if self.strategy.result_cache is not None:
+                logger.info(f"Analysis cache: {self.strategy.result_cache.get_stats()}")
+            logger.info(f"Analysis gates: {self.strategy.get_gate_stats()}")
+            if self.strategy.profiler.enabled:
+                for line in self.strategy.profiler.summary_lines():
+                    logger.info(f"Stage timings {line}")
+                logger.info(f"Detector nodes: {self.strategy.pipeline.summary_line()}")
                 
         except Exception as e:
             logger.error(f"Error in market analysis: {str(e)}")
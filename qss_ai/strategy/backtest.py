@@ -0,0 +1,226 @@
+import os
+import pandas as pd
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from ..config.settings import BASE_TIMEFRAME
+from .smartflow import GATE_STAGES, QuantumSmartFlowStrategy
+
+# Event-driven replay of the live strategy over historical bars. Bars close
+# one at a time: an open position is checked against the bar's range first,
+# then, while flat, analyze() is asked for a signal on the window of bars
+# ending with it, the same frame the live scan would have seen. The frames
+# are tagged with the symbol and timeframe, so the streaming indicator (and
+# incremental detector) state only advances over the new bar instead of
+# recomputing the whole window.
+
+def performance_stats(trades: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Statistics of a trade list by their 'profit', with the same keys and
+    definitions as the Telegram bot's PerformanceTracker
+    """
+    if not trades:
+        return {
+            "total_trades": 0,
+            "winning_trades": 0,
+            "losing_trades": 0,
+            "win_rate": 0.0,
+            "average_profit": 0.0,
+            "average_loss": 0.0,
+            "profit_factor": 0.0,
+            "total_profit": 0.0,
+            "max_drawdown": 0.0,
+            "sharpe_ratio": 0.0
+        }
+
+    profits = [t.get("profit", 0) for t in trades]
+    wins = [p for p in profits if p > 0]
+    losses = [p for p in profits if p <= 0]
+    total_profit = sum(wins)
+    total_loss = abs(sum(losses))
+
+    balance = peak = max_drawdown = 0.0
+    for profit in profits:
+        balance += profit
+        peak = max(peak, balance)
+        max_drawdown = max(max_drawdown, peak - balance)
+
+    mean = sum(profits) / len(profits)
+    std_dev = (sum((p - mean) ** 2 for p in profits) / len(profits)) ** 0.5
+
+    return {
+        "total_trades": len(trades),
+        "winning_trades": len(wins),
+        "losing_trades": len(losses),
+        "win_rate": len(wins) / len(trades),
+        "average_profit": total_profit / len(wins) if wins else 0.0,
+        "average_loss": total_loss / len(losses) if losses else 0.0,
+        "profit_factor": total_profit / total_loss if total_loss else float("inf"),
+        "total_profit": total_profit - total_loss,
+        "max_drawdown": max_drawdown,
+        "sharpe_ratio": mean / std_dev if std_dev else 0.0
+    }
+
+def _open_position(signal: Dict, time: pd.Timestamp) -> Optional[Dict]:
+    """
+    Position entered at the signal's entry price, None if it has no risk
+    """
+    risk = abs(signal['entry'] - signal['stop_loss'])
+    if not risk > 0:
+        return None
+    return {
+        'type': signal['type'],
+        'entry': float(signal['entry']),
+        'stop_loss': float(signal['stop_loss']),
+        'take_profit': float(signal['take_profit']),
+        'risk': float(risk),
+        'confidence': signal.get('confidence'),
+        'entry_time': time
+    }
+
+def _exit_fill(position: Dict, high: float, low: float) -> Optional[Tuple[float, str]]:
+    """
+    Exit price and reason if the bar reached the stop or the target. A bar
+    reaching both is assumed to have hit the stop first.
+    """
+    if position['type'] == 'bullish':
+        if low <= position['stop_loss']:
+            return position['stop_loss'], 'stop_loss'
+        if high >= position['take_profit']:
+            return position['take_profit'], 'take_profit'
+    else:
+        if high >= position['stop_loss']:
+            return position['stop_loss'], 'stop_loss'
+        if low <= position['take_profit']:
+            return position['take_profit'], 'take_profit'
+    return None
+
+def _close_position(position: Dict, symbol: str, timeframe: str, price: float, reason: str,
+                    time: pd.Timestamp, risk_amount: float) -> Dict[str, Any]:
+    """
+    Trade record of a closed position; 'timestamp' is the exit time, like
+    the bot's trade history
+    """
+    direction = 1 if position['type'] == 'bullish' else -1
+    r_multiple = direction * (price - position['entry']) / position['risk']
+    return {
+        'symbol': symbol,
+        'timeframe': timeframe,
+        'type': position['type'],
+        'entry': position['entry'],
+        'stop_loss': position['stop_loss'],
+        'take_profit': position['take_profit'],
+        'exit': float(price),
+        'exit_reason': reason,
+        'confidence': position['confidence'],
+        'entry_time': position['entry_time'].isoformat(),
+        'exit_time': time.isoformat(),
+        'r_multiple': r_multiple,
+        'profit': r_multiple * risk_amount,
+        'timestamp': time.isoformat()
+    }
+
+def replay(strategy: QuantumSmartFlowStrategy, df: pd.DataFrame, symbol: str,
+           timeframe: str = BASE_TIMEFRAME, window: Optional[int] = None,
+           risk_amount: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Step through df bar by bar, holding at most one position, and return
+    the closed trades. Signals are entered at their entry price (the close
+    of the bar they were found on) and can exit from the next bar on; a
+    position still open at the end is closed at the last close.
+
+    Bars outside both OTE bands (strategy.ote_bars) cannot pass the optimal
+    entry gate, so analyze() is not called for them; they are counted as
+    stopped by that gate even where an earlier gate would have stopped them.
+    """
+    window = window or strategy.required_history()
+    high = df['high'].to_numpy(dtype=float)
+    low = df['low'].to_numpy(dtype=float)
+    index = df.index
+    in_ote = strategy.ote_bars(df)
+
+    trades = []
+    position = None
+    for i in range(window - 1, len(df)):
+        if position is not None:
+            fill = _exit_fill(position, high[i], low[i])
+            if fill is not None:
+                trades.append(_close_position(position, symbol, timeframe, *fill, index[i], risk_amount))
+                position = None
+
+        # A position opened on the last bar could never be filled
+        if position is None and i + 1 < len(df):
+            if not in_ote[i]:
+                strategy.gate_stats['evaluations'] += 1
+                strategy.gate_stats['optimal_entry'] += 1
+                continue
+            signal = strategy.analyze(df.iloc[i - window + 1:i + 1], symbol, timeframe)
+            if signal is not None:
+                position = _open_position(signal, index[i])
+
+    if position is not None:
+        trades.append(_close_position(position, symbol, timeframe, float(df['close'].iloc[-1]), 'end',
+                                      index[-1], risk_amount))
+    return trades
+
+def _replay_symbol(symbol: str, df: pd.DataFrame, params: Dict[str, Any], timeframe: str,
+                   window: Optional[int], risk_amount: float) -> Tuple[List[Dict], Dict[str, int]]:
+    """
+    Worker task: replay one symbol with a fresh strategy
+    """
+    strategy = QuantumSmartFlowStrategy.with_params(**params)
+    trades = replay(strategy, df, symbol, timeframe, window, risk_amount)
+    return trades, strategy.get_gate_stats()
+
+class Backtester:
+    """
+    Replays QuantumSmartFlowStrategy over historical OHLCV data of several
+    symbols, one symbol per worker process, and reports the trades with
+    PerformanceTracker statistics overall and per symbol.
+
+    Each symbol holds at most one position at a time; symbols do not limit
+    each other. profit is r_multiple * risk_amount, so with the default of 1
+    the money statistics are in R.
+    """
+
+    def __init__(self, timeframe: str = BASE_TIMEFRAME, window: Optional[int] = None,
+                 risk_amount: float = 1.0, params: Optional[Dict[str, Any]] = None,
+                 max_workers: Optional[int] = None):
+        self.timeframe = timeframe
+        self.window = window
+        self.risk_amount = risk_amount
+        self.params = params or {}
+        self.max_workers = max_workers or os.cpu_count()
+
+        # Fail on unknown parameters here rather than in every worker
+        QuantumSmartFlowStrategy.with_params(**self.params)
+
+    def run(self, datasets: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """
+        Replay every dataset and return the trades (in exit order), their
+        statistics, the statistics per symbol and the summed gate counters
+        """
+        symbols = list(datasets)
+        tasks = ([datasets[symbol] for symbol in symbols], [self.params] * len(symbols),
+                 [self.timeframe] * len(symbols), [self.window] * len(symbols),
+                 [self.risk_amount] * len(symbols))
+        if self.max_workers > 1 and len(symbols) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(symbols))) as executor:
+                results = list(executor.map(_replay_symbol, symbols, *tasks))
+        else:
+            results = list(map(_replay_symbol, symbols, *tasks))
+
+        trades = []
+        gate_stats = Counter()
+        for symbol_trades, symbol_gates in results:
+            trades.extend(symbol_trades)
+            gate_stats.update(symbol_gates)
+        trades.sort(key=lambda trade: trade['exit_time'])
+
+        return {
+            'trades': trades,
+            'stats': performance_stats(trades),
+            'symbols': {symbol: performance_stats(symbol_trades)
+                        for symbol, (symbol_trades, _) in zip(symbols, results)},
+            'gate_stats': {stage: gate_stats[stage] for stage in GATE_STAGES}
+        }
@@ -0,0 +1,205 @@
+import numpy as np
+import pandas as pd
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+from .market_structure import MarketStructureState
+from .zone_index import ZoneIndex
+
+class DetectorState:
+    """
+    Order block, FVG, liquidity zone and market structure state for a single
+    symbol/timeframe.
+
+    advance() only runs the strategy's detectors over the bars after the last
+    one it has seen, plus the few bars before them each pattern looks back on,
+    and merges the result into the stored components. With the strategy's
+    index_zones on it also keeps every unmitigated order block and FVG in
+    a ZoneIndex.
+    """
+
+    def __init__(self, params: Optional[int] = None):
+        self.params = params         # Strategy._parameter_key() the state was built with
+        self.timestamp = None        # Last bar folded into the state
+        self.swing_timestamp = None  # Last bar evaluated as a swing candidate
+        self.order_blocks = {'bullish': [], 'bearish': []}
+        self.fair_value_gaps = {'bullish': [], 'bearish': []}
+        self.liquidity_zones = {'bullish': [], 'bearish': []}
+        self.structure = MarketStructureState()
+        self.zone_index = ZoneIndex()
+
+    def copy(self) -> 'DetectorState':
+        """
+        Copy that can be advanced without touching this state
+        """
+        other = DetectorState(self.params)
+        other.timestamp = self.timestamp
+        other.swing_timestamp = self.swing_timestamp
+        for name in ('order_blocks', 'fair_value_gaps', 'liquidity_zones'):
+            setattr(other, name, {side: list(items) for side, items in getattr(self, name).items()})
+        other.structure = self.structure.copy()
+        other.zone_index = self.zone_index.copy()
+        return other
+
+    def advance(self, strategy, df: pd.DataFrame, start: int):
+        """
+        Fold bars df[start:] into the state; df[:start] must already be in it
+        """
+        n = len(df)
+        if start >= n:
+            return
+        index = df.index
+
+        # Order blocks: candle i plus candle i+1, detect_order_blocks skips
+        # the first 2 candles of the slice it is given
+        obs = strategy.detect_order_blocks(df.iloc[max(0, start - 3):],
+                                           keep=None if strategy.index_zones else 3)
+        frame_start = index[0]
+        for side in ('bullish', 'bearish'):
+            # Blocks are only kept while a full scan of the frame would
+            # return them, i.e. from its third candle on
+            blocks = [z for z in self.order_blocks[side] if z.start >= index[min(2, n - 1)]]
+            self.order_blocks[side] = (blocks + obs[side])[-3:]
+
+        # Fair value gaps: gaps formed earlier can only be filled by the new
+        # bars, gaps formed now come with their own fill flags
+        new_low = df['low'].iloc[start:].min()
+        new_high = df['high'].iloc[start:].max()
+        gaps = self.fair_value_gaps
+        gaps['bullish'] = [replace(g, filled=True) if not g.filled and new_low <= g.bottom else g
+                           for g in gaps['bullish']]
+        gaps['bearish'] = [replace(g, filled=True) if not g.filled and new_high >= g.top else g
+                           for g in gaps['bearish']]
+
+        fvgs = strategy.detect_fair_value_gaps(df.iloc[max(0, start - 2):])
+        for side in ('bullish', 'bearish'):
+            # Gaps are only kept while they are inside the frame, as a full
+            # scan of it would return; the ZoneIndex holds the older ones
+            gaps[side] = [g for g in gaps[side] if g.start >= frame_start]
+            gaps[side].extend(fvgs[side])
+
+        if strategy.index_zones:
+            self._index_zones(df, start, new_low, new_high, obs, fvgs)
+
+        # Liquidity zones: the cluster window plus enough bars for a clean ATR
+        lookback = max(strategy.liquidity_cluster_size, strategy.atr_period) + 1
+        zones = strategy.detect_liquidity_zones(df.iloc[max(0, start - lookback):])
+        for side in ('bullish', 'bearish'):
+            new_zones = [z for z in zones[side] if z.end >= index[start]]
+            # Clusters that started before the frame are dropped, as for gaps
+            kept = [z for z in self.liquidity_zones[side] if z.start >= frame_start]
+            self.liquidity_zones[side] = (kept + new_zones)[-3:]
+
+        # Market structure: a swing at i is only known once bar i+w exists
+        w = strategy.swing_width
+        first = 0
+        if self.swing_timestamp is not None:
+            first = index.searchsorted(self.swing_timestamp, side='right')
+        last = n - 1 - w
+        if last >= first:
+            offset = max(0, first - w)
+            sub = df.iloc[offset:]
+            swing_high_idx, swing_low_idx = strategy._detect_swings(sub)
+            swing_high_idx = swing_high_idx[swing_high_idx + offset >= first]
+            swing_low_idx = swing_low_idx[swing_low_idx + offset >= first]
+            self.structure.add_swings(sub, swing_high_idx, swing_low_idx)
+            self.swing_timestamp = index[last]
+
+        self.timestamp = index[-1]
+
+    def _index_zones(self, df: pd.DataFrame, start: int, new_low: float, new_high: float,
+                     obs: Dict[str, List], fvgs: Dict[str, List]):
+        """
+        Drop the indexed zones the new bars df[start:] traded through and
+        index the zones that formed on them, unless a later new bar already
+        did
+        """
+        self.zone_index.mitigate(new_low, new_high)
+
+        # Lowest low / highest high from new bar k onwards, padded for zones
+        # formed on the last bar
+        low = df['low'].to_numpy()[start:]
+        high = df['high'].to_numpy()[start:]
+        later_low = np.append(np.minimum.accumulate(low[::-1])[::-1], np.inf)
+        later_high = np.append(np.maximum.accumulate(high[::-1])[::-1], -np.inf)
+
+        for side in ('bullish', 'bearish'):
+            blocks = obs[side]
+            if blocks:
+                after = df.index.searchsorted([z.end for z in blocks]) - start + 1
+                if side == 'bullish':
+                    alive = later_low[after] > [z.bottom for z in blocks]
+                else:
+                    alive = later_high[after] < [z.top for z in blocks]
+                for zone, keep in zip(blocks, alive.tolist()):
+                    if keep:
+                        self.zone_index.add(side, zone)
+            for zone in fvgs[side]:
+                if not zone.filled:
+                    self.zone_index.add(side, zone)
+
+    def components(self) -> Dict[str, Dict[str, List]]:
+        """
+        Components in the shape analyze() builds
+        """
+        return {
+            'order_blocks': {side: list(items) for side, items in self.order_blocks.items()},
+            'fair_value_gaps': {side: list(items) for side, items in self.fair_value_gaps.items()},
+            'liquidity_zones': {side: list(items) for side, items in self.liquidity_zones.items()},
+            'market_structure': self.structure.to_dict(),
+            'zone_index': self.zone_index
+        }
+
+class IncrementalDetectorEngine:
+    """
+    Keeps one DetectorState per (symbol, timeframe).
+
+    Like the streaming indicator engine, the last bar of a frame is treated
+    as still forming: it is evaluated on a throwaway copy of the state and
+    only committed once a newer bar has arrived.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        self.states: Dict[Tuple[str, str], DetectorState] = {}
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Drop state for one symbol/timeframe, or for everything
+        """
+        if symbol is None:
+            self.states.clear()
+            return
+        self.states.pop((symbol, timeframe), None)
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame,
+               last_bar_closed: bool = False) -> Dict[str, Dict[str, List]]:
+        """
+        Components for df, advancing the stored state over any new closed bars
+        """
+        key = (symbol, timeframe)
+        n = len(df)
+        n_closed = n if last_bar_closed else n - 1
+        params = self.strategy._parameter_key()
+
+        state = self.states.get(key)
+        start = -1
+        if state is not None and state.timestamp is not None:
+            pos = df.index.searchsorted(state.timestamp)
+            if pos < n and df.index[pos] == state.timestamp:
+                start = pos + 1
+        if start < 0 or start > n_closed or state.params != params:
+            # First call, a gap, a rewind or changed parameters: rebuild from the whole frame
+            state = self.states[key] = DetectorState(params)
+            start = 0
+
+        # Commit the new closed bars
+        if n_closed > start:
+            state.advance(self.strategy, df.iloc[:n_closed], start)
+
+        # Evaluate the forming bar without committing it
+        if n_closed < n:
+            forming = state.copy()
+            forming.advance(self.strategy, df, n_closed)
+            return forming.components()
+
+        return state.components()
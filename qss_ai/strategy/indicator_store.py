@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+
+class IndicatorColumns:
+    """
+    Indicator history for a single symbol/timeframe: one contiguous row per
+    indicator in a preallocated 2-D array, plus room for a forming bar that
+    is staged after the committed ones but not counted in `length`
+    """
+
+    def __init__(self, names: Iterable[str], capacity: int):
+        self.rows = {name: row for row, name in enumerate(names)}
+        self.data = np.full((len(self.rows), capacity), np.nan)
+        self.length = 0
+
+    def reserve(self, bars: int, keep: int):
+        """
+        Make room for `bars` more values. When the buffer is full the last
+        `keep` committed bars are moved to a fresh, larger array; the old
+        array is left alone so views handed out earlier stay valid.
+        """
+        capacity = self.data.shape[1]
+        if self.length + bars <= capacity:
+            return
+        retained = min(self.length, keep)
+        data = np.full((len(self.rows), max(2 * (retained + bars), capacity)), np.nan)
+        data[:, :retained] = self.data[:, self.length - retained:self.length]
+        self.data = data
+        self.length = retained
+
+    def write(self, position: int, values: Dict[str, float]):
+        for name, value in values.items():
+            self.data[self.rows[name], position] = value
+
+class IndicatorStore:
+    """
+    Indicator values per (symbol, timeframe), kept out of the OHLCV frames.
+
+    Columns are handed out as zero-copy views into the store's arrays. A
+    view is only guaranteed until the next update of the same key: the
+    staged forming bar is overwritten once the bar closes.
+    """
+
+    def __init__(self, capacity: int = 1024, max_history: int = 5000):
+        self.capacity = capacity
+        self.max_history = max_history
+        self.columns: Dict[Tuple[str, str], IndicatorColumns] = {}
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Drop the history for one symbol/timeframe, or for everything
+        """
+        if symbol is None:
+            self.columns.clear()
+            return
+        self.columns.pop((symbol, timeframe), None)
+
+    def committed(self, key: Tuple[str, str]) -> int:
+        """
+        Number of committed bars stored for key
+        """
+        columns = self.columns.get(key)
+        return columns.length if columns is not None else 0
+
+    def _columns(self, key: Tuple[str, str], values: Dict[str, float], bars: int,
+                 keep: int) -> IndicatorColumns:
+        columns = self.columns.get(key)
+        if columns is None:
+            columns = self.columns[key] = IndicatorColumns(values, max(self.capacity, bars))
+        columns.reserve(bars, max(self.max_history, keep))
+        return columns
+
+    def append(self, key: Tuple[str, str], values: Dict[str, float], keep: int = 0):
+        """
+        Commit the values of the next closed bar, keeping at least `keep`
+        bars of history
+        """
+        columns = self._columns(key, values, 1, keep)
+        columns.write(columns.length, values)
+        columns.length += 1
+
+    def stage(self, key: Tuple[str, str], values: Dict[str, float], keep: int = 0):
+        """
+        Store the values of the forming bar right after the committed ones
+        """
+        columns = self._columns(key, values, 1, keep)
+        columns.write(columns.length, values)
+
+    def view(self, key: Tuple[str, str], bars: int, staged: bool = False) -> Dict[str, np.ndarray]:
+        """
+        The last `bars` committed values of every indicator, followed by the
+        staged forming bar if `staged`
+        """
+        columns = self.columns.get(key)
+        if columns is None:
+            return {}
+        stop = columns.length + 1 if staged else columns.length
+        return {name: columns.data[row, stop - bars - staged:stop] for name, row in columns.rows.items()}
+
+def with_indicators(df: pd.DataFrame, indicators: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """
+    New frame holding df's columns and the indicator columns side by side.
+    Neither df nor the indicator arrays are copied or modified.
+    """
+    columns = {name: df[name] for name in df.columns}
+    columns.update(indicators)
+    return pd.DataFrame(columns, index=df.index, copy=False)
@@ -0,0 +1,193 @@
+import numpy as np
+from typing import Dict, Tuple
+from scipy.signal import lfilter
+from .rolling import _pad, _windows, rolling_max, rolling_mean, rolling_min, rolling_std, rolling_sum
+
+# Vectorized indicator kernels. Every function works along the last axis, so
+# the same code handles a single series of shape (bars,) and a panel of shape
+# (symbols, bars). Warm-up periods are NaN, matching the `ta` library. The
+# rolling window kernels they build on live in rolling.py.
+
+def ewm(x: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """
+    Exponential moving average like pandas ewm(alpha, adjust=False): seeded
+    with the first value and NaN until min_periods values have been seen.
+    Leading NaNs are skipped; they must line up across a panel.
+    """
+    x = np.asarray(x, dtype=float)
+    out = np.full(x.shape, np.nan)
+
+    # First bar where every series has a value
+    valid = ~np.isnan(x).reshape(-1, x.shape[-1]).any(axis=0)
+    if not valid.any():
+        return out
+    start = int(np.argmax(valid))
+
+    values = x[..., start:]
+    zi = (1 - alpha) * values[..., :1]
+    smoothed, _ = lfilter([alpha], [1, alpha - 1], values, axis=-1, zi=zi)
+    out[..., start:] = smoothed
+    out[..., start:start + min_periods - 1] = np.nan
+    return out
+
+def ema(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    EMAIndicator(close, window).ema_indicator()
+    """
+    return ewm(close, 2 / (window + 1), window)
+
+def rsi(close: np.ndarray, window: int) -> np.ndarray:
+    """
+    RSIIndicator(close, window).rsi()
+    """
+    close = np.asarray(close, dtype=float)
+    diff = np.diff(close, axis=-1, prepend=np.nan)
+    up = np.where(diff > 0, diff, 0.0)
+    down = np.where(diff < 0, -diff, 0.0)
+    ema_up = ewm(up, 1 / window, window)
+    ema_down = ewm(down, 1 / window, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ema_down == 0, 100.0, 100 - (100 / (1 + ema_up / ema_down)))
+
+def bollinger_bands(close: np.ndarray, window: int, window_dev: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    BollingerBands(close, window, window_dev) upper, middle and lower bands
+    """
+    mavg = rolling_mean(close, window)
+    mstd = rolling_std(close, window)
+    return mavg + window_dev * mstd, mavg, mavg - window_dev * mstd
+
+def vwap(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, window: int) -> np.ndarray:
+    """
+    VolumeWeightedAveragePrice(high, low, close, volume, window)
+    """
+    typical_price = (high + low + close) / 3.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return rolling_sum(typical_price * volume, window) / rolling_sum(volume, window)
+
+def macd(close: np.ndarray, window_fast: int, window_slow: int,
+         window_sign: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD(close, window_fast, window_slow, window_sign) line, signal and diff
+    """
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = ema(line, window_sign)
+    return line, signal, line - signal
+
+def stochastic(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int,
+               smooth_window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    StochasticOscillator(high, low, close, window, smooth_window) %K and %D
+    """
+    smin = rolling_min(low, window)
+    smax = rolling_max(high, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stoch_k = 100 * (close - smin) / (smax - smin)
+    return stoch_k, rolling_mean(stoch_k, smooth_window)
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """
+    Largest of high-low and the gaps to the previous close; the first bar
+    only has high-low
+    """
+    close = np.asarray(close, dtype=float)
+    prev_close = np.concatenate([np.full(close.shape[:-1] + (1,), np.nan), close[..., :-1]], axis=-1)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def average_true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average of the true range
+    """
+    return rolling_mean(true_range(high, low, close), window)
+
+def percentile_rank(x: np.ndarray, window: int) -> np.ndarray:
+    """
+    Fraction of the last `window` values (the current one included) that are
+    at or below the current value; NaN until the window holds no NaNs
+    """
+    x = np.asarray(x, dtype=float)
+    if x.shape[-1] < window:
+        return np.full(x.shape, np.nan)
+    windows = _windows(x, window)
+    rank = (windows <= windows[..., -1:]).mean(axis=-1)
+    rank[np.isnan(windows).any(axis=-1)] = np.nan
+    return _pad(rank, window)
+
+def retracement_levels(range_high, range_low, retracement: Tuple[float, float]) -> Dict[str, np.ndarray]:
+    """
+    Premium/discount levels of a price range: the equilibrium (50%) and the
+    optimal trade entry band between the two retracement levels, measured
+    down from the range high for longs (discount) and up from the range low
+    for shorts (premium). Works on arrays and on single values.
+    """
+    size = range_high - range_low
+    return {
+        'range_high': range_high,
+        'range_low': range_low,
+        'equilibrium': range_low + size * 0.5,
+        'discount_ote_low': range_high - size * retracement[1],
+        'discount_ote_high': range_high - size * retracement[0],
+        'premium_ote_low': range_low + size * retracement[0],
+        'premium_ote_high': range_low + size * retracement[1]
+    }
+
+def retracement_bands(high: np.ndarray, low: np.ndarray, window: int,
+                      retracement: Tuple[float, float]) -> Dict[str, np.ndarray]:
+    """
+    retracement_levels() of the range of the last `window` bars, at every bar
+    """
+    return retracement_levels(rolling_max(high, window), rolling_min(low, window), retracement)
+
+def ote_mask(close: np.ndarray, bands: Dict[str, np.ndarray], setup_type: str) -> np.ndarray:
+    """
+    Bars whose close is inside the optimal trade entry band of a bullish
+    (discount) or bearish (premium) setup
+    """
+    side = 'discount' if setup_type == 'bullish' else 'premium'
+    return (bands[f'{side}_ote_low'] <= close) & (close <= bands[f'{side}_ote_high'])
+
+def compute_indicators(strategy, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                       volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Every column QuantumSmartFlowStrategy._calculate_indicators adds, using
+    the strategy's parameters
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+
+    values = {}
+
+    # EMAs
+    for period in strategy.ema_periods:
+        values[f'ema_{period}'] = ema(close, period)
+
+    # RSI
+    values['rsi'] = rsi(close, strategy.rsi_period)
+
+    # Bollinger Bands
+    values['bb_upper'], values['bb_middle'], values['bb_lower'] = bollinger_bands(
+        close, strategy.bb_period, strategy.bb_std)
+
+    # VWAP
+    values['vwap'] = vwap(high, low, close, volume, strategy.vwap_period)
+
+    # MACD
+    values['macd'], values['macd_signal'], values['macd_diff'] = macd(
+        close, strategy.macd_fast, strategy.macd_slow, strategy.macd_signal)
+
+    # Stochastic
+    values['stoch_k'], values['stoch_d'] = stochastic(
+        high, low, close, strategy.stoch_k, strategy.stoch_d)
+
+    # ATR and where it sits in its recent range
+    values['tr'] = true_range(high, low, close)
+    values['atr'] = rolling_mean(values['tr'], strategy.atr_period)
+    values['atr_rank'] = percentile_rank(values['atr'], strategy.regime_lookback)
+
+    # Premium/discount and OTE bands
+    values.update(retracement_bands(high, low, strategy.retracement_lookback,
+                                    strategy.optimal_entry_retracement))
+
+    return values
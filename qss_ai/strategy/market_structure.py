@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Dict, List
+from .models import StructureBreak, SwingPoint
+
+class MarketStructureState:
+    """
+    Swing sequence and BOS/CHOCH events, fed one swing at a time in time order.
+
+    A higher high against a bearish trend is a bullish CHOCH, otherwise it is
+    a bullish BOS once the lows have risen too (or the trend is already
+    bullish). Lower lows mirror this on the bearish side.
+    """
+
+    def __init__(self):
+        self.trend = None
+        self.last_high = self.prev_high = None
+        self.last_low = self.prev_low = None
+        self.swing_highs = deque(maxlen=5)
+        self.swing_lows = deque(maxlen=5)
+        self.bos = deque(maxlen=3)
+        self.choch = deque(maxlen=3)
+
+    def copy(self) -> 'MarketStructureState':
+        """
+        Independent copy, cheap since only the most recent points are kept
+        """
+        other = MarketStructureState()
+        other.trend = self.trend
+        other.last_high, other.prev_high = self.last_high, self.prev_high
+        other.last_low, other.prev_low = self.last_low, self.prev_low
+        other.swing_highs.extend(self.swing_highs)
+        other.swing_lows.extend(self.swing_lows)
+        other.bos.extend(self.bos)
+        other.choch.extend(self.choch)
+        return other
+
+    def add_swing_high(self, time: pd.Timestamp, price: float, strength: float):
+        """
+        Record a swing high and emit a bullish BOS/CHOCH if it breaks structure
+        """
+        self.swing_highs.append(SwingPoint(time, price, strength))
+        self.prev_high, self.last_high = self.last_high, price
+        if self.prev_high is None or price <= self.prev_high:
+            return
+
+        # Higher high
+        if self.trend == 'bearish':
+            points = self.choch
+        elif self.trend == 'bullish' or (self.prev_low is not None and self.last_low > self.prev_low):
+            points = self.bos
+        else:
+            return
+        self.trend = 'bullish'
+        points.append(StructureBreak(time, 'bullish', price))
+
+    def add_swing_low(self, time: pd.Timestamp, price: float, strength: float):
+        """
+        Record a swing low and emit a bearish BOS/CHOCH if it breaks structure
+        """
+        self.swing_lows.append(SwingPoint(time, price, strength))
+        self.prev_low, self.last_low = self.last_low, price
+        if self.prev_low is None or price >= self.prev_low:
+            return
+
+        # Lower low
+        if self.trend == 'bullish':
+            points = self.choch
+        elif self.trend == 'bearish' or (self.prev_high is not None and self.last_high < self.prev_high):
+            points = self.bos
+        else:
+            return
+        self.trend = 'bearish'
+        points.append(StructureBreak(time, 'bearish', price))
+
+    def add_swings(self, df: pd.DataFrame, swing_high_idx: np.ndarray, swing_low_idx: np.ndarray):
+        """
+        Feed the swings at the given positions of df in time order; a bar that
+        is both a swing high and a swing low is handled high first
+        """
+        idx = np.concatenate([swing_high_idx, swing_low_idx])
+        is_high = np.concatenate([np.ones(len(swing_high_idx), dtype=bool),
+                                  np.zeros(len(swing_low_idx), dtype=bool)])
+        order = np.argsort(idx, kind='stable')
+        idx, is_high = idx[order], is_high[order]
+
+        high = df['high'].to_numpy()[idx]
+        low = df['low'].to_numpy()[idx]
+        strength = (high - low) / low
+        price = np.where(is_high, high, low)
+
+        for time, swing_is_high, p, s in zip(df.index[idx], is_high.tolist(), price, strength):
+            if swing_is_high:
+                self.add_swing_high(time, p, s)
+            else:
+                self.add_swing_low(time, p, s)
+
+    def to_dict(self) -> Dict[str, List]:
+        """
+        Component dict in the shape detect_market_structure returns
+        """
+        return {
+            'swing_highs': list(self.swing_highs),  # Keep last 5
+            'swing_lows': list(self.swing_lows),    # Keep last 5
+            'bos': list(self.bos),                  # Keep last 3
+            'choch': list(self.choch)               # Keep last 3
+        }
@@ -0,0 +1,135 @@
+import pandas as pd
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+# Records the detectors and setup checks pass around. They are slotted
+# dataclasses rather than dicts: a detector scan keeps thousands of zones
+# alive, and a slotted record is well under half the size of the dict it
+# replaces. They are not frozen, since a frozen dataclass is several times
+# slower to build, but are treated as immutable: change one with
+# dataclasses.replace(). to_dict() gives the dict shapes analyze() returns
+# and SignalSender formats.
+
+# Zone kinds
+ORDER_BLOCK = 'order_block'
+FAIR_VALUE_GAP = 'fair_value_gap'
+LIQUIDITY = 'liquidity'
+
+@dataclass(slots=True)
+class Zone:
+    """
+    Order block, fair value gap or liquidity zone between bars start and
+    end. strength is the relative candle range for order blocks, the
+    relative gap size for FVGs and the cluster length for liquidity zones,
+    whose top and bottom are both the clustered price.
+    """
+    kind: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+    top: float
+    bottom: float
+    strength: float
+    filled: bool = False
+    tolerance: float = 0.0
+
+    @property
+    def price(self) -> float:
+        return self.top
+
+    def contains(self, price: float) -> bool:
+        """
+        Whether price is inside the zone, or within tolerance of a liquidity level
+        """
+        if self.kind == LIQUIDITY:
+            return abs(self.top - price) < self.tolerance
+        return self.bottom < price < self.top
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Dict in the shape the detectors used to return for this kind
+        """
+        if self.kind == ORDER_BLOCK:
+            return {'start': self.start, 'end': self.end, 'high': self.top, 'low': self.bottom,
+                    'strength': self.strength}
+        if self.kind == FAIR_VALUE_GAP:
+            return {'start': self.start, 'end': self.end, 'top': self.top, 'bottom': self.bottom,
+                    'size': self.strength, 'filled': self.filled}
+        return {'start': self.start, 'end': self.end, 'price': self.top, 'strength': self.strength,
+                'tolerance': self.tolerance}
+
+@dataclass(slots=True)
+class SwingPoint:
+    """
+    Fractal swing high or low
+    """
+    time: pd.Timestamp
+    price: float
+    strength: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'time': self.time, 'price': self.price, 'strength': self.strength}
+
+@dataclass(slots=True)
+class StructureBreak:
+    """
+    BOS or CHOCH: the swing that broke structure and its direction
+    """
+    time: pd.Timestamp
+    type: str
+    price: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'time': self.time, 'type': self.type, 'price': self.price}
+
+@dataclass(slots=True)
+class Signal:
+    """
+    Setup found by analyze(), with the zones behind it and the context
+    _evaluate_setups() adds once the setup is confirmed
+    """
+    type: str
+    entry: float
+    stop_loss: float
+    take_profit: float
+    confidence: float
+    order_block: Optional[Zone] = None
+    fair_value_gap: Optional[Zone] = None
+    liquidity_zone: Optional[Zone] = None
+    market_structure: Optional[StructureBreak] = None
+    trend_strength: Optional[float] = None
+    momentum_strength: Optional[float] = None
+    volatility: Optional[float] = None
+    volatility_regime: Optional[str] = None
+    volume_profile: Optional[Dict] = None
+    indicators: Optional[Dict[str, float]] = None
+    retracement: Optional[Dict[str, float]] = None
+    detectors: Optional[Dict[str, Any]] = None  # Outputs of detectors registered beyond the ICT ones
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Signal dict as analyze() returns it and SignalSender formats it
+        """
+        components = {}
+        for name in ('order_block', 'fair_value_gap', 'liquidity_zone', 'market_structure'):
+            component = getattr(self, name)
+            components[name] = component.to_dict() if component is not None else None
+        signal = {
+            'type': self.type,
+            'entry': self.entry,
+            'stop_loss': self.stop_loss,
+            'take_profit': self.take_profit,
+            'confidence': self.confidence,
+            'components': components
+        }
+        if self.indicators is not None:
+            signal.update({
+                'trend_strength': self.trend_strength,
+                'momentum_strength': self.momentum_strength,
+                'volatility': self.volatility,
+                'volatility_regime': self.volatility_regime,
+                'volume_profile': dict(self.volume_profile),
+                'indicators': dict(self.indicators),
+                'retracement': dict(self.retracement),
+                'detectors': dict(self.detectors)
+            })
+        return signal
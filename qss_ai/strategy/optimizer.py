@@ -0,0 +1,149 @@
+import itertools
+import os
+import random
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+from ..config.settings import BASE_TIMEFRAME
+from .backtest import replay
+from .smartflow import QuantumSmartFlowStrategy
+
+# Parameter sweeps run every parameter set over the same price history in a
+# process pool. The history is written once into a shared memory block that
+# each worker maps on start-up, so tasks only carry the parameter dicts.
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Price history as seen by the worker processes, name -> frame over shared memory
+_datasets: Dict[str, pd.DataFrame] = {}
+_shared_block = None
+
+def attach_datasets(block_name: str, layout: List[Tuple[str, int, int]], total: int):
+    """
+    Worker initializer: map the shared block and wrap each dataset in a
+    DataFrame without copying it
+    """
+    global _shared_block
+    _shared_block = shared_memory.SharedMemory(name=block_name)
+    timestamps = np.ndarray((total,), dtype=np.int64, buffer=_shared_block.buf)
+    values = np.ndarray((total, len(COLUMNS)), dtype=np.float64, buffer=_shared_block.buf, offset=total * 8)
+    for name, start, length in layout:
+        index = pd.DatetimeIndex(timestamps[start:start + length].view('datetime64[ns]'))
+        _datasets[name] = pd.DataFrame(values[start:start + length], index=index, columns=COLUMNS, copy=False)
+
+def shared_dataset(name: str) -> pd.DataFrame:
+    """
+    A dataset mapped by attach_datasets in this worker
+    """
+    return _datasets[name]
+
+def share_datasets(datasets: Dict[str, pd.DataFrame]) -> Tuple[shared_memory.SharedMemory, List[Tuple[str, int, int]], int]:
+    """
+    Copy every dataset into one shared memory block: all timestamps (int64
+    ns) followed by all OHLCV rows (float64). Returns the block and the
+    layout/size arguments attach_datasets needs; the caller unlinks the block.
+    """
+    total = sum(len(df) for df in datasets.values())
+    block = shared_memory.SharedMemory(create=True, size=max(1, total * 8 * (1 + len(COLUMNS))))
+    timestamps = np.ndarray((total,), dtype=np.int64, buffer=block.buf)
+    values = np.ndarray((total, len(COLUMNS)), dtype=np.float64, buffer=block.buf, offset=total * 8)
+
+    layout = []
+    start = 0
+    for name, df in datasets.items():
+        timestamps[start:start + len(df)] = df.index.as_unit('ns').asi8
+        values[start:start + len(df)] = df[COLUMNS].to_numpy(dtype=np.float64)
+        layout.append((name, start, len(df)))
+        start += len(df)
+    return block, layout, total
+
+def trade_stats(trades: List[float]) -> Dict[str, float]:
+    """
+    Summary statistics of a list of R multiples
+    """
+    r = np.asarray(trades, dtype=float)
+    if not len(r):
+        return {'trades': 0, 'win_rate': 0.0, 'profit_factor': 0.0, 'total_r': 0.0,
+                'average_r': 0.0, 'max_drawdown_r': 0.0}
+
+    gross_win = r[r > 0].sum()
+    gross_loss = -r[r < 0].sum()
+    equity = np.cumsum(r)
+    drawdown = np.maximum.accumulate(np.r_[0.0, equity])[1:] - equity
+    return {
+        'trades': len(r),
+        'win_rate': np.count_nonzero(r > 0) / len(r),
+        'profit_factor': float(gross_win / gross_loss) if gross_loss else float('inf'),
+        'total_r': float(r.sum()),
+        'average_r': float(r.mean()),
+        'max_drawdown_r': float(drawdown.max())
+    }
+
+def _evaluate(params: Dict[str, Any], timeframe: str, window: int) -> Dict[str, Any]:
+    """
+    Worker task: replay one parameter set over every dataset
+    """
+    strategy = QuantumSmartFlowStrategy.with_params(**params)
+    trades = []
+    for symbol, df in _datasets.items():
+        trades.extend(replay(strategy, df, symbol, timeframe, window))
+    trades.sort(key=lambda trade: trade['exit_time'])
+    return trade_stats([trade['r_multiple'] for trade in trades])
+
+class ParameterSweep:
+    """
+    Grid or random search over strategy parameters, evaluated in parallel
+    by replaying them (backtest.replay) over historical OHLCV data of one
+    timeframe and ranked by `metric`
+    """
+
+    def __init__(self, datasets: Dict[str, pd.DataFrame], window: Optional[int] = None,
+                 timeframe: str = BASE_TIMEFRAME, metric: str = 'total_r', max_workers: Optional[int] = None):
+        self.datasets = datasets
+        self.window = window or QuantumSmartFlowStrategy().required_history()
+        self.timeframe = timeframe
+        self.metric = metric
+        self.max_workers = max_workers or os.cpu_count()
+
+    @staticmethod
+    def grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+        """
+        Every combination of the candidate values
+        """
+        names = list(space)
+        return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+    @staticmethod
+    def sample(space: Dict[str, List[Any]], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        n random combinations of the candidate values
+        """
+        rng = random.Random(seed)
+        return [{name: rng.choice(values) for name, values in space.items()} for _ in range(n)]
+
+    def run(self, parameter_sets: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Evaluate every parameter set and return them ranked, best first
+        """
+        # Fail on unknown parameters here rather than in every worker
+        for params in parameter_sets:
+            QuantumSmartFlowStrategy.with_params(**params)
+
+        block, layout, total = share_datasets(self.datasets)
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, initializer=attach_datasets,
+                                     initargs=(block.name, layout, total)) as executor:
+                stats = list(executor.map(_evaluate, parameter_sets,
+                                          itertools.repeat(self.timeframe), itertools.repeat(self.window)))
+        finally:
+            block.close()
+            block.unlink()
+
+        table = pd.DataFrame([{**params, **result} for params, result in zip(parameter_sets, stats)])
+        if table.empty:
+            return table
+        table = table.sort_values(self.metric, ascending=False, kind='stable').reset_index(drop=True)
+        table.insert(0, 'rank', np.arange(1, len(table) + 1))
+        return table
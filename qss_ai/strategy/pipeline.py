@@ -0,0 +1,274 @@
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import pandas as pd
+
+# Names every frame provides besides its columns
+FRAME_SOURCES = ('frame', 'index')
+
+class PipelineNode:
+    """
+    One step of a DetectorPipeline: func is called with the values of
+    `inputs`, in that order, and returns the value of its single output or
+    a tuple with one value per output. Inputs listed in `lazy` are passed
+    as a function returning the value, which is only computed if called.
+    """
+    __slots__ = ('name', 'func', 'inputs', 'outputs', 'lazy', 'detector')
+
+    def __init__(self, name: str, func: Callable, inputs: Sequence[str], outputs: Sequence[str],
+                 lazy: Sequence[str], detector: bool):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.lazy = frozenset(lazy)
+        self.detector = detector
+
+class DetectorPipeline:
+    """
+    Detectors and the intermediates they read, as a graph of nodes that
+    declare what they read and what they produce.
+
+    run() works out which nodes a set of targets needs, orders them so
+    every input is computed before the nodes reading it and computes each
+    value once for the frame; a lazy input is left out of that order and
+    computed the first time a node asks for it. An input is resolved from
+    values given to run() first, then from the frame ('frame', 'index' or a
+    column, as a numpy array) and only then from the node producing it, so
+    a frame that already carries e.g. the 'atr' indicator column skips that
+    node.
+
+    While the profiler it was given is enabled every node run is timed, and
+    get_stats() tells which nodes the time goes to; otherwise nodes run
+    without touching the clock.
+    """
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler  # StageProfiler whose enabled flag switches node timing on
+        self.nodes: Dict[str, PipelineNode] = {}
+        self.producers: Dict[str, PipelineNode] = {}  # Output name -> node
+        self.plans: Dict[Tuple, List[Tuple[pd.Index, List[PipelineNode]]]] = {}
+        self.stats: Dict[str, List[float]] = {}  # Node -> [runs, seconds]
+
+    @property
+    def detectors(self) -> List[str]:
+        """
+        Outputs of the nodes registered as detectors, in registration order
+        """
+        return [output for node in self.nodes.values() if node.detector for output in node.outputs]
+
+    def register(self, name: str, func: Callable, inputs: Sequence[str] = (),
+                 outputs: Optional[Sequence[str]] = None, lazy: Sequence[str] = (),
+                 detector: bool = False, replace: bool = False):
+        """
+        Add node `name`, producing `outputs` (just `name` by default) from
+        `inputs`. The outputs of detector nodes are added to the components
+        analyze() detects: the setup checks read the four ICT detectors and
+        the outputs of any other detector are reported in each signal's
+        'detectors'. Taking over an output of another node, or the name of
+        one, needs replace=True and drops that node.
+        """
+        outputs = tuple(outputs) if outputs is not None else (name,)
+        if not outputs:
+            raise ValueError(f"Node '{name}' has no outputs")
+        if isinstance(inputs, str):
+            raise TypeError(f"Inputs of node '{name}' must be a sequence of names")
+        if not set(lazy) <= set(inputs):
+            raise ValueError(f"Lazy inputs of node '{name}' must be among its inputs")
+        taken = {self.producers[output].name for output in outputs if output in self.producers}
+        if name in self.nodes:
+            taken.add(name)
+        if taken and not replace:
+            raise ValueError(f"Node '{name}' clashes with existing node(s) {sorted(taken)}; "
+                             "pass replace=True to swap them out")
+
+        nodes = {key: node for key, node in self.nodes.items() if key not in taken}
+        nodes[name] = PipelineNode(name, func, inputs, outputs, lazy, detector)
+        producers = {output: node for node in nodes.values() for output in node.outputs}
+        cycle = self._find_cycle(producers)
+        if cycle:
+            raise ValueError(f"Node '{name}' would close the cycle {' -> '.join(cycle)}")
+
+        self.nodes, self.producers = nodes, producers
+        self.plans.clear()
+
+    def unregister(self, name: str):
+        """
+        Drop node `name`
+        """
+        del self.nodes[name]
+        self.producers = {output: node for node in self.nodes.values() for output in node.outputs}
+        self.plans.clear()
+        self.stats.pop(name, None)
+
+    @staticmethod
+    def _find_cycle(producers: Dict[str, PipelineNode]) -> Optional[List[str]]:
+        """
+        Output names along a dependency cycle between nodes, if there is one
+        """
+        done = set()
+        path: List[str] = []
+
+        def visit(output: str) -> Optional[List[str]]:
+            if output in path:
+                return path[path.index(output):] + [output]
+            if output in done or output not in producers:
+                return None
+            path.append(output)
+            for name in producers[output].inputs:
+                cycle = visit(name)
+                if cycle:
+                    return cycle
+            path.pop()
+            done.add(output)
+            return None
+
+        for output in producers:
+            cycle = visit(output)
+            if cycle:
+                return cycle
+        return None
+
+    def plan(self, targets: Iterable[str], available: Iterable[str] = ()) -> List[PipelineNode]:
+        """
+        Nodes needed for targets, dependencies first, when the names in
+        `available` need not be computed
+        """
+        available = set(available)
+        order: List[PipelineNode] = []
+        planned = set()
+
+        def visit(name: str, needed_by: Optional[str]):
+            if name in available or name in FRAME_SOURCES:
+                return
+            node = self.producers.get(name)
+            if node is None:
+                where = f" (needed by node '{needed_by}')" if needed_by else ""
+                raise KeyError(f"No frame column or pipeline node provides '{name}'{where}")
+            if node.name in planned:
+                return
+            planned.add(node.name)
+            for input_name in node.inputs:
+                if input_name not in node.lazy:
+                    visit(input_name, node.name)
+            order.append(node)
+
+        for target in targets:
+            visit(target, None)
+        return order
+
+    def _plan_for(self, df: pd.DataFrame, targets: Tuple[str, ...], known: Tuple[str, ...]) -> List[PipelineNode]:
+        """
+        plan() for df, cached per targets, known names and frame columns
+        """
+        key = (targets, known)
+        entries = self.plans.get(key)
+        if entries is None:
+            if len(self.plans) >= 256:
+                self.plans.clear()
+            entries = self.plans[key] = []
+        columns = df.columns
+        for cached_columns, plan in entries:
+            if cached_columns.equals(columns):
+                return plan
+        plan = self.plan(targets, known + tuple(columns))
+        entries.append((columns, plan))
+        del entries[:-8]
+        return plan
+
+    def run(self, df: pd.DataFrame, targets: Optional[Sequence[str]] = None, stage=None,
+            **given: Any) -> Dict[str, Any]:
+        """
+        Compute targets (every detector by default) for df and return them
+        with the intermediates computed on the way. stage, if given, is
+        called with each node name for a context manager to run it in, as
+        StageProfiler.stage() hands out.
+        """
+        targets = tuple(targets) if targets is not None else tuple(self.detectors)
+        values = dict(given)
+        values['frame'] = df
+        values['index'] = df.index
+        self._execute(self._plan_for(df, targets, tuple(given)), df, values, stage)
+        for name in targets:
+            if name not in values:
+                values[name] = df[name].to_numpy()
+        return values
+
+    def _pull(self, name: str, df: pd.DataFrame, values: Dict[str, Any], stage) -> Any:
+        """
+        Value of a lazy input, computing it and what it needs on first use
+        """
+        if name not in values:
+            if name in df:
+                values[name] = df[name].to_numpy()
+            else:
+                self._execute(self._plan_for(df, (name,), tuple(values)), df, values, stage)
+        return values[name]
+
+    def _execute(self, plan: List[PipelineNode], df: pd.DataFrame, values: Dict[str, Any], stage):
+        """
+        Run the nodes of plan in order, adding their outputs to values
+        """
+        stats = self.stats
+        timed = self.profiler is not None and self.profiler.enabled
+        for node in plan:
+            if node.outputs[0] in values:
+                # Already pulled in as a lazy input
+                continue
+            args = []
+            for name in node.inputs:
+                if name in node.lazy:
+                    args.append(partial(self._pull, name, df, values, stage))
+                    continue
+                if name not in values:
+                    # Not computed, so a column of the frame
+                    values[name] = df[name].to_numpy()
+                args.append(values[name])
+
+            if not timed:
+                result = node.func(*args)
+            else:
+                start = time.perf_counter()
+                if stage is None:
+                    result = node.func(*args)
+                else:
+                    with stage(node.name):
+                        result = node.func(*args)
+                elapsed = time.perf_counter() - start
+
+                entry = stats.get(node.name)
+                if entry is None:
+                    entry = stats[node.name] = [0, 0.0]
+                entry[0] += 1
+                entry[1] += elapsed
+
+            if len(node.outputs) == 1:
+                values[node.outputs[0]] = result
+            else:
+                values.update(zip(node.outputs, result))
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Runs, total and mean time and share of the total per node, the
+        costliest node first
+        """
+        total = sum(seconds for _, seconds in self.stats.values())
+        ranked = sorted(self.stats.items(), key=lambda item: -item[1][1])
+        return {name: {'runs': runs,
+                       'total_ms': seconds * 1e3,
+                       'mean_ms': seconds * 1e3 / runs,
+                       'share': seconds / total if total > 0 else 0.0}
+                for name, (runs, seconds) in ranked}
+
+    def reset_stats(self):
+        """
+        Drop the recorded node timings
+        """
+        self.stats.clear()
+
+    def summary_line(self) -> str:
+        """
+        Nodes by total time, for the log
+        """
+        return " | ".join(f"{name} {s['total_ms']:.1f}ms ({s['share']:.0%}, {s['runs']} runs)"
+                          for name, s in self.get_stats().items())
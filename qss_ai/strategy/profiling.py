@@ -0,0 +1,152 @@
+import sys
+import time
+import tracemalloc
+import numpy as np
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Upper edges (seconds) of the wall time histogram buckets; the last bucket
+# holds everything slower
+HISTOGRAM_EDGES = (1e-5, 3e-5, 1e-4, 3e-4, 1e-3, 3e-3, 1e-2, 3e-2, 1e-1, 3e-1, 1.0)
+
+def _label(seconds: float) -> str:
+    return f"{seconds * 1e3:g}ms"
+
+HISTOGRAM_LABELS = tuple(f"<{_label(edge)}" for edge in HISTOGRAM_EDGES) + (f">={_label(HISTOGRAM_EDGES[-1])}",)
+
+class _NullStage:
+    """
+    What StageProfiler.stage() hands out while profiling is off
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _StageTimer:
+    """
+    Times one run of a stage and records it on exit
+    """
+    __slots__ = ('profiler', 'key', 'bars', 'start', 'blocks', 'traced')
+
+    def __init__(self, profiler: 'StageProfiler', key: Tuple, bars: int):
+        self.profiler = profiler
+        self.key = key
+        self.bars = bars
+
+    def __enter__(self):
+        self.traced = np.nan
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        blocks = sys.getallocatedblocks() - self.blocks
+        peak = tracemalloc.get_traced_memory()[1] - self.traced if tracemalloc.is_tracing() else np.nan
+        self.profiler.record(self.key, elapsed, self.bars, blocks, peak)
+        return False
+
+class StageProfiler:
+    """
+    Opt-in timing of the stages of QuantumSmartFlowStrategy.analyze().
+
+    Every run of a stage records its wall time, the bars it was given and
+    the interpreter's net allocated memory blocks over it (plus the peak
+    traced bytes while tracemalloc is tracing). The last `window` runs are
+    kept per (symbol, timeframe, stage) and summarized as a histogram.
+    While disabled stage() hands out a shared no-op context manager.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 500):
+        self.enabled = enabled
+        self.window = window
+        self.samples: Dict[Tuple[Optional[str], Optional[str], str], deque] = {}
+
+    def stage(self, name: str, symbol: Optional[str] = None, timeframe: Optional[str] = None,
+              bars: int = 0):
+        """
+        Context manager timing one run of stage `name`
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _StageTimer(self, (symbol, timeframe, name), bars)
+
+    def record(self, key: Tuple[Optional[str], Optional[str], str], seconds: float, bars: int,
+               blocks: int, peak_bytes: float = np.nan):
+        """
+        Add one run of a stage
+        """
+        samples = self.samples.get(key)
+        if samples is None:
+            samples = self.samples[key] = deque(maxlen=self.window)
+        samples.append((seconds, bars, blocks, peak_bytes))
+
+    def reset(self):
+        """
+        Drop all recorded runs
+        """
+        self.samples.clear()
+
+    @staticmethod
+    def _summarize(samples) -> Dict:
+        values = np.array(samples, dtype=float)
+        seconds = values[:, 0]
+        counts = np.bincount(np.searchsorted(HISTOGRAM_EDGES, seconds, side='right'),
+                             minlength=len(HISTOGRAM_LABELS))
+        p50, p90, p99 = np.percentile(seconds, (50, 90, 99))
+        peak = values[:, 3]
+        return {
+            'runs': len(seconds),
+            'total_ms': float(seconds.sum() * 1e3),
+            'mean_ms': float(seconds.mean() * 1e3),
+            'p50_ms': float(p50 * 1e3),
+            'p90_ms': float(p90 * 1e3),
+            'p99_ms': float(p99 * 1e3),
+            'max_ms': float(seconds.max() * 1e3),
+            'bars': float(values[:, 1].mean()),
+            'allocated_blocks': float(values[:, 2].mean()),
+            'peak_bytes': float(np.nanmax(peak)) if not np.isnan(peak).all() else np.nan,
+            'histogram': dict(zip(HISTOGRAM_LABELS, counts.tolist()))
+        }
+
+    def get_stats(self, symbol: Optional[str] = None,
+                  timeframe: Optional[str] = None) -> Dict[Tuple[Optional[str], Optional[str]], Dict[str, Dict]]:
+        """
+        Summary of the recorded runs per (symbol, timeframe) and stage,
+        optionally for one symbol and/or timeframe only
+        """
+        stats = {}
+        for (sym, tf, stage), samples in self.samples.items():
+            if samples and (symbol is None or sym == symbol) and (timeframe is None or tf == timeframe):
+                stats.setdefault((sym, tf), {})[stage] = self._summarize(samples)
+        return stats
+
+    def stage_totals(self) -> Dict[str, Dict]:
+        """
+        Summary per stage over all symbols and timeframes
+        """
+        merged = {}
+        for (_, _, stage), samples in self.samples.items():
+            merged.setdefault(stage, []).extend(samples)
+        return {stage: self._summarize(samples) for stage, samples in merged.items() if samples}
+
+    def summary_lines(self) -> List[str]:
+        """
+        One line per symbol/timeframe, slowest stage first, for the log
+        """
+        lines = []
+        for (symbol, timeframe), stages in self.get_stats().items():
+            parts = [f"{stage} p50={s['p50_ms']:.2f}ms p90={s['p90_ms']:.2f}ms max={s['max_ms']:.2f}ms "
+                     f"bars={s['bars']:.0f} blocks={s['allocated_blocks']:+.0f}"
+                     for stage, s in sorted(stages.items(), key=lambda item: -item[1]['total_ms'])]
+            lines.append(f"{symbol or '-'} {timeframe or '-'}: " + " | ".join(parts))
+        return lines
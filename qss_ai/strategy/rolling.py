@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Rolling window kernels shared by the detectors and the indicator kernels.
+# Every function works along the last axis, so the same code handles a single
+# series of shape (bars,) and a panel of shape (symbols, bars). Results are
+# aligned like pandas rolling(window): NaN until the window is full, and NaN
+# wherever the window holds a NaN.
+
+# Above this many window elements pandas' O(n) rolling kernels beat
+# reducing a sliding window view, below it their call overhead dominates
+SLIDING_WINDOW_LIMIT = 1_000_000
+
+def _pad(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Prepend window-1 NaNs along the last axis to a sliding window result
+    """
+    out = np.full(values.shape[:-1] + (values.shape[-1] + window - 1,), np.nan)
+    out[..., window - 1:] = values
+    return out
+
+def _windows(x: np.ndarray, window: int) -> np.ndarray:
+    return sliding_window_view(x, window, axis=-1)
+
+def _rolling(x: np.ndarray, window: int, reduce: str, **kwargs) -> np.ndarray:
+    """
+    Rolling reduction along the last axis
+    """
+    x = np.asarray(x, dtype=float)
+    if x.shape[-1] < window:
+        return np.full(x.shape, np.nan)
+    if x.size * window > SLIDING_WINDOW_LIMIT and x.ndim <= 2:
+        # pandas' O(n) rolling kernels, one column per series
+        frame = pd.DataFrame(np.atleast_2d(x).T)
+        return getattr(frame.rolling(window), reduce)(**kwargs).to_numpy().T.reshape(x.shape)
+    return _pad(getattr(_windows(x, window), reduce)(axis=-1, **kwargs), window)
+
+def rolling_sum(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, 'sum')
+
+def rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, 'mean')
+
+def rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    # Population standard deviation, like rolling().std(ddof=0)
+    return _rolling(x, window, 'std', ddof=0)
+
+def rolling_max(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, 'max')
+
+def rolling_min(x: np.ndarray, window: int) -> np.ndarray:
+    return _rolling(x, window, 'min')
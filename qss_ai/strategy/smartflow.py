@@ -1,15 +1,38 @@
+import math
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from ..config.settings import (
-    OB_LOOKBACK_PERIODS,
-    FVG_THRESHOLD,
-    LIQUIDITY_CLUSTER_SIZE
-)
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from ta.trend import EMAIndicator, MACD
 from ta.momentum import RSIIndicator, StochasticOscillator
 from ta.volatility import BollingerBands
 from ta.volume import VolumeWeightedAveragePrice
+from .streaming import StreamingIndicatorEngine
+from .market_structure import MarketStructureState
+from .incremental import DetectorState, IncrementalDetectorEngine
+from .rolling import rolling_max, rolling_mean, rolling_min
+from .indicators import (average_true_range, compute_indicators, ote_mask, percentile_rank,
+                         retracement_bands, true_range)
+from .cache import AnalysisCache
+from .indicator_store import with_indicators
+from .volume_profile import VolumeProfileEngine, volume_profile
+from .profiling import StageProfiler
+from .pipeline import DetectorPipeline
+from .models import FAIR_VALUE_GAP, LIQUIDITY, ORDER_BLOCK, Signal, Zone
+
+# Names of the regimes _volatility_regimes() numbers 0, 1 and 2
+VOLATILITY_REGIMES = ('low', 'normal', 'high')
+
+# Indicator columns of the premium/discount and OTE bands
+RETRACEMENT_BANDS = ('range_high', 'range_low', 'equilibrium', 'discount_ote_low', 'discount_ote_high',
+                     'premium_ote_low', 'premium_ote_high')
+
+# Counters reported by get_gate_stats(), in pipeline order
+GATE_STAGES = ('evaluations', 'trend', 'bias', 'momentum', 'optimal_entry', 'setup', 'signals')
+
+# Detectors the setup checks read; the outputs of any other registered
+# detector are passed on in the signal's 'detectors'
+ICT_DETECTORS = ('order_blocks', 'fair_value_gaps', 'liquidity_zones', 'market_structure')
 
 class QuantumSmartFlowStrategy:
     def __init__(self):
@@ -17,8 +40,10 @@ class QuantumSmartFlowStrategy:
         self.order_block_lookback = 20
         self.fvg_threshold = 0.0002
         self.liquidity_cluster_size = 3
-        self.displacement_threshold = 0.001
+        self.liquidity_atr_multiplier = 0.1  # Equal highs/lows tolerance as a fraction of ATR, None for fvg_threshold
         self.optimal_entry_retracement = (0.618, 0.786)  # Fibonacci levels
+        self.retracement_lookback = 20  # Bars of the range the premium/discount and OTE bands are measured on
+        self.swing_width = 2  # Bars on each side of a swing high/low
         
         # Technical Indicators
         self.ema_periods = [8, 21, 50, 200]
@@ -33,28 +58,160 @@ class QuantumSmartFlowStrategy:
         self.macd_signal = 9
         self.stoch_k = 14
         self.stoch_d = 3
-        self.stoch_smooth = 3
+        self.atr_period = 14
+        self.indicator_backend = 'numpy'  # 'numpy' (strategy/indicators.py) or 'ta'
+
+        # Volatility regime: where the current ATR ranks among the last regime_lookback values
+        self.regime_lookback = 100
+        self.regime_percentiles = (0.25, 0.75)  # Below the first is 'low', above the second 'high'
+        self.regime_scaling = None  # (low, normal, high) multipliers for fvg_threshold, e.g. (0.75, 1.0, 1.5); None keeps them fixed
+
+        # History: every indicator warmed up, plus the bars the detectors scan
+        self.warmup_tolerance = 0.01  # Weight the seed bar may still carry in a recursive average
+        self.analysis_bars = 100
+
+        # Volume Profile
+        self.volume_profile_bin_size = None    # Fixed price bin (e.g. a multiple of the tick size), None for ATR-scaled bins
+        self.volume_profile_atr_fraction = 0.25
+        self.value_area_fraction = 0.7
+
+        # Per symbol/timeframe indicator and detector state, advanced only over new bars
+        self.indicator_engine = StreamingIndicatorEngine(self)
+        self.detector_engine = IncrementalDetectorEngine(self)
+        self.volume_profile_engine = VolumeProfileEngine(self)  # Only with a fixed volume_profile_bin_size
+        self.incremental_detectors = False  # Worth it once frames hold ~1000+ bars
+        self.index_zones = False  # Match setups against every unmitigated order block/FVG, not just the latest
+
+        # Results per (symbol, timeframe, last closed bar, parameters); None disables it
+        self.result_cache = AnalysisCache(maxsize=512)
+
+        # How many evaluations each gate of analyze() short-circuited
+        self.gate_stats = Counter()
+
+        # Higher timeframe bias per (symbol, timeframe), kept until its bar closes
+        self.bias_cache = {}
+
+        # Per-stage timings of analyze(), off unless profiler.enabled is set
+        self.profiler = StageProfiler()
+
+        # Detectors and the intermediates they read; detectors registered on
+        # top of the ICT ones are run with them and reported on each signal
+        self.pipeline = self._build_pipeline()
+
+    @classmethod
+    def with_params(cls, **params: Any) -> 'QuantumSmartFlowStrategy':
+        """
+        Fresh strategy with the given parameters, for replays over history:
+        result_cache is off since every bar is new. Names that are not
+        parameters (the attributes _parameter_key() hashes) raise ValueError.
+        """
+        strategy = cls()
+        unknown = sorted(set(params) - set(strategy._parameters()))
+        if unknown:
+            raise ValueError(f"Unknown strategy parameter(s): {', '.join(unknown)}")
+        strategy.result_cache = None
+        for name, value in params.items():
+            setattr(strategy, name, value)
+        return strategy
+
+    def _parameters(self) -> Dict[str, Any]:
+        """
+        Every plain parameter attribute: None, bool, number, string, tuple or list
+        """
+        return {name: value for name, value in vars(self).items()
+                if value is None or isinstance(value, (bool, int, float, str, tuple, list))}
+
+    def _parameter_key(self) -> int:
+        """
+        Hash of every plain parameter attribute, so changing one invalidates
+        cached results
+        """
+        return hash(tuple((name, tuple(value) if isinstance(value, list) else value)
+                          for name, value in sorted(self._parameters().items())))
+
+    def _ewm_warmup(self, alpha: float, min_periods: int) -> int:
+        """
+        Bars before an exponential average seeded with its first value is
+        usable: at least min_periods, and enough for the seed's weight
+        (1 - alpha)^n to fall below warmup_tolerance
+        """
+        return max(min_periods, math.ceil(math.log(self.warmup_tolerance) / math.log(1 - alpha)))
+
+    def indicator_warmup(self) -> Dict[str, int]:
+        """
+        Bars of history each indicator needs before its value can be trusted
+        """
+        warmup = {}
+
+        # EMAs
+        for period in self.ema_periods:
+            warmup[f'ema_{period}'] = self._ewm_warmup(2 / (period + 1), period)
+
+        # RSI (first bar has no change)
+        warmup['rsi'] = self._ewm_warmup(1 / self.rsi_period, self.rsi_period) + 1
+
+        # Bollinger Bands, VWAP, ATR
+        warmup['bb'] = self.bb_period
+        warmup['vwap'] = self.vwap_period
+        warmup['atr'] = self.atr_period + 1
+        warmup['atr_rank'] = self.atr_period + self.regime_lookback - 1
+        warmup['range'] = self.retracement_lookback
+
+        # MACD (the signal line averages the MACD line)
+        macd = max(self._ewm_warmup(2 / (self.macd_fast + 1), self.macd_fast),
+                   self._ewm_warmup(2 / (self.macd_slow + 1), self.macd_slow))
+        warmup['macd'] = macd + self._ewm_warmup(2 / (self.macd_signal + 1), self.macd_signal)
 
-    def _calculate_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Stochastic
+        warmup['stoch'] = self.stoch_k + self.stoch_d - 1
+
+        return warmup
+
+    def required_history(self) -> int:
         """
-        Calculate technical indicators
+        Number of bars analyze() should be given: the longest indicator
+        warm-up plus analysis_bars of valid values
         """
+        return max(self.indicator_warmup().values()) + self.analysis_bars
+
+    def _calculate_indicators(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                              timeframe: Optional[str] = None) -> pd.DataFrame:
+        """
+        Calculate technical indicators. Frames tagged with a symbol and
+        timeframe go through the streaming engine, which only processes the
+        bars it has not seen yet. Other frames are computed in full with
+        indicator_backend.
+
+        Returns a new frame; df itself (often the market data cache's copy)
+        is never modified.
+        """
+        if symbol is not None and timeframe is not None:
+            return with_indicators(df, self.indicator_engine.update(symbol, timeframe, df))
+
+        if self.indicator_backend == 'numpy':
+            return with_indicators(df, compute_indicators(self, df['high'], df['low'],
+                                                          df['close'], df['volume']))
+        if self.indicator_backend != 'ta':
+            raise ValueError(f"Unsupported indicator backend: {self.indicator_backend}")
+
+        indicators = {}
+
         # EMAs
         for period in self.ema_periods:
-            df[f'ema_{period}'] = EMAIndicator(close=df['close'], window=period).ema_indicator()
+            indicators[f'ema_{period}'] = EMAIndicator(close=df['close'], window=period).ema_indicator()
         
         # RSI
         rsi = RSIIndicator(close=df['close'], window=self.rsi_period)
-        df['rsi'] = rsi.rsi()
+        indicators['rsi'] = rsi.rsi()
         
         # Bollinger Bands
         bb = BollingerBands(close=df['close'], window=self.bb_period, window_dev=self.bb_std)
-        df['bb_upper'] = bb.bollinger_hband()
-        df['bb_middle'] = bb.bollinger_mavg()
-        df['bb_lower'] = bb.bollinger_lband()
+        indicators['bb_upper'] = bb.bollinger_hband()
+        indicators['bb_middle'] = bb.bollinger_mavg()
+        indicators['bb_lower'] = bb.bollinger_lband()
         
         # VWAP
-        df['vwap'] = VolumeWeightedAveragePrice(
+        indicators['vwap'] = VolumeWeightedAveragePrice(
             high=df['high'],
             low=df['low'],
             close=df['close'],
@@ -69,9 +226,9 @@ class QuantumSmartFlowStrategy:
             window_slow=self.macd_slow,
             window_sign=self.macd_signal
         )
-        df['macd'] = macd.macd()
-        df['macd_signal'] = macd.macd_signal()
-        df['macd_diff'] = macd.macd_diff()
+        indicators['macd'] = macd.macd()
+        indicators['macd_signal'] = macd.macd_signal()
+        indicators['macd_diff'] = macd.macd_diff()
         
         # Stochastic
         stoch = StochasticOscillator(
@@ -79,22 +236,32 @@ class QuantumSmartFlowStrategy:
             low=df['low'],
             close=df['close'],
             window=self.stoch_k,
-            smooth_window=self.stoch_smooth
+            smooth_window=self.stoch_d
         )
-        df['stoch_k'] = stoch.stoch()
-        df['stoch_d'] = stoch.stoch_signal(window=self.stoch_d)
+        indicators['stoch_k'] = stoch.stoch()
+        indicators['stoch_d'] = stoch.stoch_signal()
+        
+        # ATR (`ta`'s AverageTrueRange uses Wilder smoothing, the strategy a simple mean)
+        indicators['tr'] = true_range(df['high'].to_numpy(), df['low'].to_numpy(), df['close'].to_numpy())
+        indicators['atr'] = rolling_mean(indicators['tr'], self.atr_period)
+        indicators['atr_rank'] = percentile_rank(indicators['atr'], self.regime_lookback)
+
+        # Premium/discount and OTE bands
+        indicators.update(retracement_bands(df['high'].to_numpy(), df['low'].to_numpy(),
+                                            self.retracement_lookback, self.optimal_entry_retracement))
         
-        return df
+        return with_indicators(df, indicators)
 
     def _check_trend_strength(self, df: pd.DataFrame) -> Tuple[str, float]:
         """
         Check trend strength using multiple indicators
         """
-        # EMA Alignment
-        ema_aligned_up = all(df['ema_8'].iloc[-1] > df[f'ema_{period}'].iloc[-1] 
-                           for period in [21, 50, 200])
-        ema_aligned_down = all(df['ema_8'].iloc[-1] < df[f'ema_{period}'].iloc[-1] 
-                             for period in [21, 50, 200])
+        # EMA Alignment (fastest EMA against all the slower ones)
+        fast, *slow = self.ema_periods
+        ema_aligned_up = all(df[f'ema_{fast}'].iloc[-1] > df[f'ema_{period}'].iloc[-1] 
+                           for period in slow)
+        ema_aligned_down = all(df[f'ema_{fast}'].iloc[-1] < df[f'ema_{period}'].iloc[-1] 
+                             for period in slow)
         
         # MACD
         macd_bullish = df['macd'].iloc[-1] > df['macd_signal'].iloc[-1]
@@ -165,273 +332,425 @@ class QuantumSmartFlowStrategy:
         bb_width = (df['bb_upper'].iloc[-1] - df['bb_lower'].iloc[-1]) / df['bb_middle'].iloc[-1]
         
         # ATR (Average True Range)
-        tr = pd.DataFrame()
-        tr['h-l'] = df['high'] - df['low']
-        tr['h-pc'] = abs(df['high'] - df['close'].shift(1))
-        tr['l-pc'] = abs(df['low'] - df['close'].shift(1))
-        tr['tr'] = tr[['h-l', 'h-pc', 'l-pc']].max(axis=1)
-        atr = tr['tr'].rolling(window=14).mean().iloc[-1]
+        atr = self._average_true_range(df)[-1]
         
         # Normalize volatility score
         volatility_score = (bb_width + atr/df['close'].iloc[-1]) / 2
         return min(volatility_score * 10, 1.0)  # Scale to 0-1
 
-    def _check_volume_profile(self, df: pd.DataFrame) -> Dict:
+    def _check_volume_profile(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                              timeframe: Optional[str] = None) -> Dict:
         """
-        Analyze volume profile
+        Analyze volume profile. With a fixed bin size, frames tagged with a
+        symbol and timeframe keep their profile between calls and only add
+        and remove the bars that entered and left the frame.
         """
-        # Calculate POC (Point of Control)
-        price_range = pd.qcut(df['close'], q=10)
-        volume_profile = df.groupby(price_range)['volume'].sum()
-        poc_price = volume_profile.idxmax().left
-        
-        # Calculate Value Area
-        total_volume = volume_profile.sum()
-        value_area_volume = 0
-        value_area_prices = []
-        
-        for price, volume in volume_profile.sort_values(ascending=False).items():
-            value_area_volume += volume
-            value_area_prices.append(price.left)
-            if value_area_volume >= 0.7 * total_volume:
-                break
-        
-        return {
-            'poc': poc_price,
-            'value_area_high': max(value_area_prices),
-            'value_area_low': min(value_area_prices)
-        }
+        if self.volume_profile_bin_size and symbol is not None and timeframe is not None:
+            return self.volume_profile_engine.update(symbol, timeframe, df, self.volume_profile_bin_size)
+        return volume_profile(df['close'].to_numpy(), df['volume'].to_numpy(),
+                              self._volume_profile_bin_size(df), self.value_area_fraction)
+
+    def _volume_profile_bin_size(self, df: pd.DataFrame) -> float:
+        """
+        Price bin of the volume profile: the fixed bin size if one is set,
+        otherwise a fraction of the current ATR
+        """
+        if self.volume_profile_bin_size:
+            return self.volume_profile_bin_size
+        bin_size = self._average_true_range(df)[-1] * self.volume_profile_atr_fraction
+        if not bin_size > 0:
+            # ATR not warmed up yet (or a flat frame): fall back to ten bins over the range
+            bin_size = (df['close'].max() - df['close'].min()) / 10 or abs(df['close'].iloc[-1]) * 1e-4 or 1.0
+        return bin_size
+
+    def _retracement(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        Premium/discount and OTE bands at the last bar, from the indicator
+        columns when the frame has them
+        """
+        if 'range_high' in df:
+            return {name: df[name].iloc[-1] for name in RETRACEMENT_BANDS}
+        w = self.retracement_lookback
+        bands = retracement_bands(df['high'].to_numpy()[-w:], df['low'].to_numpy()[-w:], w,
+                                  self.optimal_entry_retracement)
+        return {name: bands[name][-1] for name in RETRACEMENT_BANDS}
+
+    def _check_optimal_entry(self, df: pd.DataFrame, setup_type: str,
+                             bands: Optional[Dict[str, float]] = None) -> bool:
+        """
+        Check if current price is at optimal entry level: inside the
+        retracement band of the recent range, in the discount half for
+        longs and the premium half for shorts
+        """
+        if setup_type not in ('bullish', 'bearish'):
+            return False
+        if bands is None:
+            bands = self._retracement(df)
+        side = 'discount' if setup_type == 'bullish' else 'premium'
+        return bands[f'{side}_ote_low'] <= df['close'].iloc[-1] <= bands[f'{side}_ote_high']
+
+    def ote_bars(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Bars of df whose close is in the bullish or the bearish OTE band.
+        No setup can pass the optimal entry gate on any other bar, so a
+        historical replay can skip them without calling analyze().
+        """
+        close = df['close'].to_numpy(dtype=float)
+        bands = retracement_bands(df['high'].to_numpy(dtype=float), df['low'].to_numpy(dtype=float),
+                                  self.retracement_lookback, self.optimal_entry_retracement)
+        return ote_mask(close, bands, 'bullish') | ote_mask(close, bands, 'bearish')
+
+    def _build_pipeline(self) -> DetectorPipeline:
+        """
+        Default detector graph: the four ICT detectors and the intermediates
+        they read. Node functions read the strategy parameters when they
+        run, so changing a parameter needs no rebuild.
+        """
+        pipeline = DetectorPipeline(self.profiler)
+
+        # Intermediates; the ATR feeds both the FVG thresholds (through the
+        # volatility regimes) and the liquidity tolerance
+        pipeline.register('candle_direction', self._candle_direction, ('open', 'close'))
+        pipeline.register('atr', self._atr, ('high', 'low', 'close'))
+        pipeline.register('atr_rank', self._atr_rank, ('atr',))
+        pipeline.register('volatility_regimes', self._regime_codes, ('atr_rank',))
+        pipeline.register('fvg_thresholds', self._fvg_thresholds, ('index', 'volatility_regimes'),
+                          lazy=('volatility_regimes',))
+        pipeline.register('liquidity_tolerance', self._liquidity_tolerance, ('atr',))
+        pipeline.register('swings', self._swings, ('high', 'low'),
+                          outputs=('swing_high_idx', 'swing_low_idx'))
+        # Latest order blocks per side that get a Zone; detect_order_blocks() overrides it
+        pipeline.register('order_block_keep', lambda: 3)
+
+        # Detectors, whose outputs make up the components
+        pipeline.register('order_blocks', self._order_blocks,
+                          ('index', 'candle_direction', 'high', 'low', 'order_block_keep'), detector=True)
+        pipeline.register('fair_value_gaps', self._fair_value_gap_zones,
+                          ('index', 'high', 'low', 'fvg_thresholds'), detector=True)
+        pipeline.register('liquidity_zones', self._liquidity_zones,
+                          ('index', 'high', 'low', 'liquidity_tolerance'), detector=True)
+        pipeline.register('market_structure', self._market_structure,
+                          ('frame', 'swing_high_idx', 'swing_low_idx'), detector=True)
+        return pipeline
+
+    def detect_order_blocks(self, df: pd.DataFrame, keep: Optional[int] = 3) -> Dict[str, List[Zone]]:
+        """
+        Detect bullish and bearish order blocks based on candle patterns;
+        the last `keep` of each side, or all of them for None
+        """
+        return self.pipeline.run(df, ('order_blocks',), order_block_keep=keep)['order_blocks']
+
+    @staticmethod
+    def _candle_direction(open_: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """
+        1 for bullish candles, -1 for bearish ones, 0 for dojis
+        """
+        return np.sign(close - open_)
+
+    def _order_blocks(self, index: pd.Index, direction: np.ndarray, high: np.ndarray, low: np.ndarray,
+                      keep: Optional[int]) -> Dict[str, List[Zone]]:
+        """
+        Order block node: see detect_order_blocks()
+        """
+        n = len(index)
+        if n < 4:
+            return {'bullish': [], 'bearish': []}
+
+        # Candle i is the order block candidate, candle i+1 the move away from it
+        cur = slice(2, n - 1)
+        nxt = slice(3, n)
+
+        # Bullish Order Block: bearish candle, then a bullish candle that breaks above
+        bullish_mask = ((direction[cur] < 0) &
+                        (direction[nxt] > 0) &
+                        (low[nxt] > high[cur]))
+
+        # Bearish Order Block: bullish candle, then a bearish candle that breaks below
+        bearish_mask = ((direction[cur] > 0) &
+                        (direction[nxt] < 0) &
+                        (high[nxt] < low[cur]))
+
+        # Only the kept ones get a Zone
+        tail = slice(-keep, None) if keep is not None else slice(None)
+        bullish_idx = np.flatnonzero(bullish_mask)[tail] + 2
+        bearish_idx = np.flatnonzero(bearish_mask)[tail] + 2
 
-    def _check_optimal_entry(self, df: pd.DataFrame, setup_type: str) -> bool:
-        """
-        Check if current price is at optimal entry level
-        """
-        if setup_type == 'bullish':
-            # Check if price is in discount zone (below 50% retracement)
-            recent_high = df['high'].rolling(window=20).max().iloc[-1]
-            recent_low = df['low'].rolling(window=20).min().iloc[-1]
-            current_price = df['close'].iloc[-1]
-            
-            # Calculate retracement levels
-            range_high = recent_high
-            range_low = recent_low
-            range_size = range_high - range_low
-            
-            # Check if price is in optimal entry zone (61.8% - 78.6% retracement)
-            optimal_zone_low = range_high - range_size * self.optimal_entry_retracement[1]
-            optimal_zone_high = range_high - range_size * self.optimal_entry_retracement[0]
-            
-            return optimal_zone_low <= current_price <= optimal_zone_high
-            
-        elif setup_type == 'bearish':
-            # Check if price is in premium zone (above 50% retracement)
-            recent_high = df['high'].rolling(window=20).max().iloc[-1]
-            recent_low = df['low'].rolling(window=20).min().iloc[-1]
-            current_price = df['close'].iloc[-1]
-            
-            # Calculate retracement levels
-            range_high = recent_high
-            range_low = recent_low
-            range_size = range_high - range_low
-            
-            # Check if price is in optimal entry zone (61.8% - 78.6% retracement)
-            optimal_zone_low = range_low + range_size * self.optimal_entry_retracement[0]
-            optimal_zone_high = range_low + range_size * self.optimal_entry_retracement[1]
-            
-            return optimal_zone_low <= current_price <= optimal_zone_high
-            
-        return False
-
-    def detect_order_blocks(self, df: pd.DataFrame) -> Dict[str, List[Dict]]:
-        """
-        Detect bullish and bearish order blocks based on candle patterns
-        """
-        bullish_obs = []
-        bearish_obs = []
-        
-        for i in range(2, len(df) - 1):
-            # Bullish Order Block
-            if (df['close'].iloc[i] < df['open'].iloc[i] and  # Current candle is bearish
-                df['close'].iloc[i+1] > df['open'].iloc[i+1] and  # Next candle is bullish
-                df['low'].iloc[i+1] > df['high'].iloc[i]):  # Next candle breaks above
-                
-                bullish_obs.append({
-                    'start': df.index[i],
-                    'end': df.index[i+1],
-                    'high': df['high'].iloc[i],
-                    'low': df['low'].iloc[i],
-                    'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
-                })
-            
-            # Bearish Order Block
-            if (df['close'].iloc[i] > df['open'].iloc[i] and  # Current candle is bullish
-                df['close'].iloc[i+1] < df['open'].iloc[i+1] and  # Next candle is bearish
-                df['high'].iloc[i+1] < df['low'].iloc[i]):  # Next candle breaks below
-                
-                bearish_obs.append({
-                    'start': df.index[i],
-                    'end': df.index[i+1],
-                    'high': df['high'].iloc[i],
-                    'low': df['low'].iloc[i],
-                    'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
-                })
-        
         return {
-            'bullish': bullish_obs[-3:] if bullish_obs else [],  # Keep last 3
-            'bearish': bearish_obs[-3:] if bearish_obs else []   # Keep last 3
+            'bullish': [self._order_block(index, high, low, i) for i in bullish_idx],
+            'bearish': [self._order_block(index, high, low, i) for i in bearish_idx]
         }
 
-    def detect_fair_value_gaps(self, df: pd.DataFrame) -> Dict[str, List[Dict]]:
-        """
-        Detect fair value gaps (FVGs) in the market
-        """
-        bullish_fvgs = []
-        bearish_fvgs = []
-        
-        for i in range(1, len(df) - 1):
-            # Bullish FVG
-            if (df['low'].iloc[i+1] > df['high'].iloc[i-1] and
-                (df['low'].iloc[i+1] - df['high'].iloc[i-1]) / df['high'].iloc[i-1] > self.fvg_threshold):
-                
-                bullish_fvgs.append({
-                    'start': df.index[i-1],
-                    'end': df.index[i+1],
-                    'top': df['low'].iloc[i+1],
-                    'bottom': df['high'].iloc[i-1],
-                    'size': (df['low'].iloc[i+1] - df['high'].iloc[i-1]) / df['high'].iloc[i-1]
-                })
-            
-            # Bearish FVG
-            if (df['high'].iloc[i+1] < df['low'].iloc[i-1] and
-                (df['low'].iloc[i-1] - df['high'].iloc[i+1]) / df['low'].iloc[i-1] > self.fvg_threshold):
-                
-                bearish_fvgs.append({
-                    'start': df.index[i-1],
-                    'end': df.index[i+1],
-                    'top': df['low'].iloc[i-1],
-                    'bottom': df['high'].iloc[i+1],
-                    'size': (df['low'].iloc[i-1] - df['high'].iloc[i+1]) / df['low'].iloc[i-1]
-                })
-        
+    @staticmethod
+    def _order_block(index: pd.Index, high: np.ndarray, low: np.ndarray, i: int) -> Zone:
+        """
+        Build the order block zone for candle i
+        """
+        return Zone(ORDER_BLOCK, index[i], index[i+1], high[i], low[i], (high[i] - low[i]) / low[i])
+
+    def detect_fair_value_gaps(self, df: pd.DataFrame) -> Dict[str, List[Zone]]:
+        """
+        Detect fair value gaps (FVGs) in the market and flag the ones
+        later price action has already filled
+        """
+        return self.pipeline.run(df, ('fair_value_gaps',))['fair_value_gaps']
+
+    def _fair_value_gap_zones(self, index: pd.Index, high: np.ndarray, low: np.ndarray,
+                              thresholds: np.ndarray) -> Dict[str, List[Zone]]:
+        """
+        FVG node: see detect_fair_value_gaps()
+        """
+        n = len(index)
+        if n < 3:
+            return {'bullish': [], 'bearish': []}
+
+        # Gap between candle i-1 and candle i+1, for every middle candle i
+        prev_high, prev_low = high[:-2], low[:-2]
+        next_high, next_low = high[2:], low[2:]
+
+        # Minimum size, judged in the regime of the candle completing the gap
+        threshold = thresholds[2:]
+
+        # Bullish FVG
+        bullish_size = (next_low - prev_high) / prev_high
+        bullish_mask = (next_low > prev_high) & (bullish_size > threshold)
+
+        # Bearish FVG
+        bearish_size = (prev_low - next_high) / prev_low
+        bearish_mask = (next_high < prev_low) & (bearish_size > threshold)
+
+        # Lowest low / highest high from bar k onwards, padded so a gap
+        # formed on the last bars has no later price action
+        later_low = np.append(np.minimum.accumulate(low[::-1])[::-1], np.inf)
+        later_high = np.append(np.maximum.accumulate(high[::-1])[::-1], -np.inf)
+
+        # A gap is filled once price trades back through its far edge
+        # on any bar after the one that formed it
+        bullish_idx = np.flatnonzero(bullish_mask)
+        bullish_filled = later_low[bullish_idx + 3] <= prev_high[bullish_idx]
+
+        bearish_idx = np.flatnonzero(bearish_mask)
+        bearish_filled = later_high[bearish_idx + 3] >= prev_low[bearish_idx]
+
         return {
-            'bullish': bullish_fvgs[-3:] if bullish_fvgs else [],  # Keep last 3
-            'bearish': bearish_fvgs[-3:] if bearish_fvgs else []   # Keep last 3
+            'bullish': self._fair_value_gaps(index, bullish_idx, next_low, prev_high,
+                                             bullish_size, bullish_filled),
+            'bearish': self._fair_value_gaps(index, bearish_idx, prev_low, next_high,
+                                             bearish_size, bearish_filled)
         }
 
-    def detect_liquidity_zones(self, df: pd.DataFrame) -> Dict[str, List[Dict]]:
+    @staticmethod
+    def _fair_value_gaps(index: pd.Index, idx: np.ndarray, top: np.ndarray, bottom: np.ndarray,
+                         size: np.ndarray, filled: np.ndarray) -> List[Zone]:
+        """
+        Build the FVG zones for the gaps starting at positions idx
+        """
+        return [Zone(FAIR_VALUE_GAP, start, end, t, b, sz, f)
+                for start, end, t, b, sz, f in zip(index[idx], index[idx + 2], top[idx],
+                                                   bottom[idx], size[idx], filled.tolist())]
+
+    def detect_liquidity_zones(self, df: pd.DataFrame) -> Dict[str, List[Zone]]:
         """
         Detect liquidity zones based on equal highs and lows
         """
-        bullish_zones = []
-        bearish_zones = []
-        
-        for i in range(self.liquidity_cluster_size, len(df)):
-            # Check for bullish liquidity (equal lows)
-            if all(abs(df['low'].iloc[i-j] - df['low'].iloc[i]) < self.fvg_threshold 
-                  for j in range(self.liquidity_cluster_size)):
-                bullish_zones.append({
-                    'start': df.index[i-self.liquidity_cluster_size],
-                    'end': df.index[i],
-                    'price': df['low'].iloc[i],
-                    'strength': self.liquidity_cluster_size
-                })
-            
-            # Check for bearish liquidity (equal highs)
-            if all(abs(df['high'].iloc[i-j] - df['high'].iloc[i]) < self.fvg_threshold 
-                  for j in range(self.liquidity_cluster_size)):
-                bearish_zones.append({
-                    'start': df.index[i-self.liquidity_cluster_size],
-                    'end': df.index[i],
-                    'price': df['high'].iloc[i],
-                    'strength': self.liquidity_cluster_size
-                })
-        
+        return self.pipeline.run(df, ('liquidity_zones',))['liquidity_zones']
+
+    def _liquidity_zones(self, index: pd.Index, high: np.ndarray, low: np.ndarray,
+                         tolerance: np.ndarray) -> Dict[str, List[Zone]]:
+        """
+        Liquidity zone node: see detect_liquidity_zones()
+        """
+        k = self.liquidity_cluster_size
+        n = len(index)
+        if n <= k:
+            return {'bullish': [], 'bearish': []}
+
+        # Rolling extremes over the k bars ending at each index; every bar in
+        # the window is within tolerance of the last one when both the max and
+        # the min are
+        low_max = rolling_max(low, k)
+        low_min = rolling_min(low, k)
+        high_max = rolling_max(high, k)
+        high_min = rolling_min(high, k)
+
+        # Bullish liquidity (equal lows)
+        bullish_mask = (low_max - low < tolerance) & (low - low_min < tolerance)
+
+        # Bearish liquidity (equal highs)
+        bearish_mask = (high_max - high < tolerance) & (high - high_min < tolerance)
+
+        # The first k bars cannot start a zone
+        bullish_mask[:k] = False
+        bearish_mask[:k] = False
+
         return {
-            'bullish': bullish_zones[-3:] if bullish_zones else [],  # Keep last 3
-            'bearish': bearish_zones[-3:] if bearish_zones else []   # Keep last 3
+            'bullish': [self._liquidity_zone(index, low, tolerance, i)
+                        for i in np.flatnonzero(bullish_mask)[-3:]],  # Keep last 3
+            'bearish': [self._liquidity_zone(index, high, tolerance, i)
+                        for i in np.flatnonzero(bearish_mask)[-3:]]   # Keep last 3
         }
 
-    def detect_market_structure(self, df: pd.DataFrame) -> Dict[str, List[Dict]]:
+    def _liquidity_tolerance(self, atr: np.ndarray) -> np.ndarray:
         """
-        Detect market structure including swing highs/lows and BOS/CHOCH
+        Price tolerance for equal highs/lows at every bar
+        """
+        if self.liquidity_atr_multiplier is None:
+            return np.full(len(atr), self.fvg_threshold)
+        return atr * self.liquidity_atr_multiplier
+
+    def _liquidity_zone(self, index: pd.Index, price: np.ndarray, tolerance: np.ndarray, i: int) -> Zone:
+        """
+        Build the liquidity zone for the cluster ending at bar i
+        """
+        return Zone(LIQUIDITY, index[i-self.liquidity_cluster_size], index[i], price[i], price[i],
+                    self.liquidity_cluster_size, tolerance=tolerance[i])
+
+    def _average_true_range(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Rolling mean of the true range, from the indicator columns when the
+        frame has them
+        """
+        return self.pipeline.run(df, ('atr',))['atr']
+
+    def _atr(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """
+        ATR node, for frames without the indicator column
+        """
+        return average_true_range(high, low, close, self.atr_period)
+
+    def _atr_rank(self, atr: np.ndarray) -> np.ndarray:
+        """
+        Percentile rank of the ATR over the last regime_lookback bars
+        """
+        return percentile_rank(atr, self.regime_lookback)
+
+    def _volatility_regimes(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Volatility regime at every bar: 0 low, 1 normal, 2 high. Bars without
+        a full lookback of ATR values count as normal.
+        """
+        return self.pipeline.run(df, ('volatility_regimes',))['volatility_regimes']
+
+    def _regime_codes(self, rank: np.ndarray) -> np.ndarray:
+        """
+        Volatility regime node: 0, 1 or 2 from the ATR percentile rank
+        """
+        low, high = self.regime_percentiles
+        regimes = np.ones(len(rank), dtype=np.int64)
+        regimes[rank < low] = 0
+        regimes[rank > high] = 2
+        return regimes
+
+    def volatility_regime(self, df: pd.DataFrame) -> str:
+        """
+        Volatility regime of the last bar: 'low', 'normal' or 'high'
+        """
+        if df.empty:
+            return 'normal'
+        return VOLATILITY_REGIMES[self._volatility_regimes(df)[-1]]
+
+    def _regime_thresholds(self, threshold: float, n: int, regimes: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        threshold at each of n bars, scaled by that bar's volatility regime
+        when regime_scaling is set; regimes is only called then
+        """
+        if self.regime_scaling is None:
+            return np.full(n, threshold)
+        return threshold * np.asarray(self.regime_scaling)[regimes()]
+
+    def _fvg_thresholds(self, index: pd.Index, regimes: Callable[[], np.ndarray]) -> np.ndarray:
+        """
+        Minimum FVG size at every bar
+        """
+        return self._regime_thresholds(self.fvg_threshold, len(index), regimes)
+
+    def get_thresholds(self, df: pd.DataFrame) -> Dict[str, float]:
+        """
+        FVG threshold in effect on the last bar
         """
-        swing_highs = []
-        swing_lows = []
-        bos_points = []
-        choch_points = []
-        
-        # Detect swing highs and lows
-        for i in range(2, len(df) - 2):
-            # Swing High
-            if (df['high'].iloc[i] > df['high'].iloc[i-1] and 
-                df['high'].iloc[i] > df['high'].iloc[i-2] and
-                df['high'].iloc[i] > df['high'].iloc[i+1] and
-                df['high'].iloc[i] > df['high'].iloc[i+2]):
-                swing_highs.append({
-                    'time': df.index[i],
-                    'price': df['high'].iloc[i],
-                    'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
-                })
-            
-            # Swing Low
-            if (df['low'].iloc[i] < df['low'].iloc[i-1] and 
-                df['low'].iloc[i] < df['low'].iloc[i-2] and
-                df['low'].iloc[i] < df['low'].iloc[i+1] and
-                df['low'].iloc[i] < df['low'].iloc[i+2]):
-                swing_lows.append({
-                    'time': df.index[i],
-                    'price': df['low'].iloc[i],
-                    'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
-                })
-        
-        # Detect BOS and CHOCH
-        for i in range(1, len(swing_highs) - 1):
-            # Bullish BOS
-            if (swing_highs[i]['price'] > swing_highs[i-1]['price'] and
-                swing_lows[i]['price'] > swing_lows[i-1]['price']):
-                bos_points.append({
-                    'time': swing_highs[i]['time'],
-                    'type': 'bullish',
-                    'price': swing_highs[i]['price']
-                })
-            
-            # Bearish BOS
-            if (swing_highs[i]['price'] < swing_highs[i-1]['price'] and
-                swing_lows[i]['price'] < swing_lows[i-1]['price']):
-                bos_points.append({
-                    'time': swing_lows[i]['time'],
-                    'type': 'bearish',
-                    'price': swing_lows[i]['price']
-                })
-        
         return {
-            'swing_highs': swing_highs[-5:] if swing_highs else [],  # Keep last 5
-            'swing_lows': swing_lows[-5:] if swing_lows else [],     # Keep last 5
-            'bos': bos_points[-3:] if bos_points else [],            # Keep last 3
-            'choch': choch_points[-3:] if choch_points else []       # Keep last 3
+            'fvg_threshold': self._regime_thresholds(self.fvg_threshold, len(df),
+                                                     lambda: self._volatility_regimes(df))[-1]
         }
 
-    def _check_bullish_setup(self, df: pd.DataFrame, components: Dict) -> Optional[Dict]:
+    def detect_market_structure(self, df: pd.DataFrame) -> Dict[str, List]:
+        """
+        Detect market structure including swing highs/lows and BOS/CHOCH
+        """
+        return self.pipeline.run(df, ('market_structure',))['market_structure']
+
+    @staticmethod
+    def _market_structure(df: pd.DataFrame, swing_high_idx: np.ndarray,
+                          swing_low_idx: np.ndarray) -> Dict[str, List]:
+        """
+        Market structure node: walk the swings in time order to emit BOS/CHOCH
+        """
+        structure = MarketStructureState()
+        structure.add_swings(df, swing_high_idx, swing_low_idx)
+        return structure.to_dict()
+
+    def _detect_swings(self, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions of fractal swing highs and lows, i.e. bars whose high (low)
+        is strictly above (below) the swing_width bars on each side
+        """
+        values = self.pipeline.run(df, ('swing_high_idx', 'swing_low_idx'))
+        return values['swing_high_idx'], values['swing_low_idx']
+
+    def _swings(self, high: np.ndarray, low: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Swing node: see _detect_swings()
+        """
+        w = self.swing_width
+        n = len(high)
+        if n < 2 * w + 1:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty
+
+        # Extremes of every run of w bars; run j covers bars j..j+w-1, so bar i
+        # is compared with run i-w on its left and run i+1 on its right
+        high_max = np.lib.stride_tricks.sliding_window_view(high, w).max(axis=1)
+        low_min = np.lib.stride_tricks.sliding_window_view(low, w).min(axis=1)
+        center = slice(w, n - w)
+        left = slice(0, n - 2 * w)
+        right = slice(w + 1, n - w + 1)
+
+        swing_high_mask = (high[center] > high_max[left]) & (high[center] > high_max[right])
+        swing_low_mask = (low[center] < low_min[left]) & (low[center] < low_min[right])
+
+        return np.flatnonzero(swing_high_mask) + w, np.flatnonzero(swing_low_mask) + w
+
+    def _find_zone(self, components: Dict, kind: str, side: str, price: float) -> Optional[Zone]:
+        """
+        Oldest unfilled order block or FVG of one side containing price, out
+        of every unmitigated one with index_zones on and otherwise out of
+        those the detectors returned
+        """
+        if self.index_zones and 'zone_index' in components:
+            zones = components['zone_index'].containing(kind, side, price)
+            return zones[0] if zones else None
+        name = 'order_blocks' if kind == ORDER_BLOCK else 'fair_value_gaps'
+        return next((zone for zone in components[name][side]
+                     if not zone.filled and zone.contains(price)), None)
+
+    def _check_bullish_setup(self, df: pd.DataFrame, components: Dict) -> Optional[Signal]:
         """
         Check for bullish trading setup
         """
         current_price = df['close'].iloc[-1]
         
         # Check for bullish order block
-        bullish_ob = next((ob for ob in components['order_blocks']['bullish'] 
-                          if ob['low'] < current_price < ob['high']), None)
+        bullish_ob = self._find_zone(components, ORDER_BLOCK, 'bullish', current_price)
         
         # Check for bullish FVG
-        bullish_fvg = next((fvg for fvg in components['fair_value_gaps']['bullish']
-                           if fvg['bottom'] < current_price < fvg['top']), None)
+        bullish_fvg = self._find_zone(components, FAIR_VALUE_GAP, 'bullish', current_price)
         
         # Check for bullish liquidity zone
         bullish_liq = next((liq for liq in components['liquidity_zones']['bullish']
-                           if abs(liq['price'] - current_price) < self.fvg_threshold), None)
+                           if liq.contains(current_price)), None)
         
         # Check for bullish market structure
         bullish_bos = next((bos for bos in components['market_structure']['bos']
-                           if bos['type'] == 'bullish' and bos['time'] > df.index[-10]), None)
+                           if bos.type == 'bullish' and bos.time > df.index[-10]), None)
         
         # Calculate setup strength
         setup_strength = 0
@@ -442,45 +761,41 @@ class QuantumSmartFlowStrategy:
         
         # Return signal if setup is strong enough
         if setup_strength >= 2:
-            return {
-                'type': 'bullish',
-                'entry': current_price,
-                'stop_loss': min(bullish_ob['low'] if bullish_ob else current_price * 0.99,
-                               bullish_fvg['bottom'] if bullish_fvg else current_price * 0.99),
-                'take_profit': current_price + (current_price - min(bullish_ob['low'] if bullish_ob else current_price * 0.99,
-                                                                  bullish_fvg['bottom'] if bullish_fvg else current_price * 0.99)) * 2,
-                'confidence': setup_strength / 4,
-                'components': {
-                    'order_block': bullish_ob,
-                    'fair_value_gap': bullish_fvg,
-                    'liquidity_zone': bullish_liq,
-                    'market_structure': bullish_bos
-                }
-            }
+            stop_loss = min(bullish_ob.bottom if bullish_ob else current_price * 0.99,
+                            bullish_fvg.bottom if bullish_fvg else current_price * 0.99)
+            return Signal(
+                type='bullish',
+                entry=current_price,
+                stop_loss=stop_loss,
+                take_profit=current_price + (current_price - stop_loss) * 2,
+                confidence=setup_strength / 4,
+                order_block=bullish_ob,
+                fair_value_gap=bullish_fvg,
+                liquidity_zone=bullish_liq,
+                market_structure=bullish_bos
+            )
         
         return None
 
-    def _check_bearish_setup(self, df: pd.DataFrame, components: Dict) -> Optional[Dict]:
+    def _check_bearish_setup(self, df: pd.DataFrame, components: Dict) -> Optional[Signal]:
         """
         Check for bearish trading setup
         """
         current_price = df['close'].iloc[-1]
         
         # Check for bearish order block
-        bearish_ob = next((ob for ob in components['order_blocks']['bearish']
-                          if ob['low'] < current_price < ob['high']), None)
+        bearish_ob = self._find_zone(components, ORDER_BLOCK, 'bearish', current_price)
         
         # Check for bearish FVG
-        bearish_fvg = next((fvg for fvg in components['fair_value_gaps']['bearish']
-                           if fvg['bottom'] < current_price < fvg['top']), None)
+        bearish_fvg = self._find_zone(components, FAIR_VALUE_GAP, 'bearish', current_price)
         
         # Check for bearish liquidity zone
         bearish_liq = next((liq for liq in components['liquidity_zones']['bearish']
-                           if abs(liq['price'] - current_price) < self.fvg_threshold), None)
+                           if liq.contains(current_price)), None)
         
         # Check for bearish market structure
         bearish_bos = next((bos for bos in components['market_structure']['bos']
-                           if bos['type'] == 'bearish' and bos['time'] > df.index[-10]), None)
+                           if bos.type == 'bearish' and bos.time > df.index[-10]), None)
         
         # Calculate setup strength
         setup_strength = 0
@@ -491,93 +806,362 @@ class QuantumSmartFlowStrategy:
         
         # Return signal if setup is strong enough
         if setup_strength >= 2:
-            return {
-                'type': 'bearish',
-                'entry': current_price,
-                'stop_loss': max(bearish_ob['high'] if bearish_ob else current_price * 1.01,
-                               bearish_fvg['top'] if bearish_fvg else current_price * 1.01),
-                'take_profit': current_price - (max(bearish_ob['high'] if bearish_ob else current_price * 1.01,
-                                                  bearish_fvg['top'] if bearish_fvg else current_price * 1.01) - current_price) * 2,
-                'confidence': setup_strength / 4,
-                'components': {
-                    'order_block': bearish_ob,
-                    'fair_value_gap': bearish_fvg,
-                    'liquidity_zone': bearish_liq,
-                    'market_structure': bearish_bos
-                }
-            }
+            stop_loss = max(bearish_ob.top if bearish_ob else current_price * 1.01,
+                            bearish_fvg.top if bearish_fvg else current_price * 1.01)
+            return Signal(
+                type='bearish',
+                entry=current_price,
+                stop_loss=stop_loss,
+                take_profit=current_price - (stop_loss - current_price) * 2,
+                confidence=setup_strength / 4,
+                order_block=bearish_ob,
+                fair_value_gap=bearish_fvg,
+                liquidity_zone=bearish_liq,
+                market_structure=bearish_bos
+            )
         
         return None
 
-    def analyze(self, df: pd.DataFrame) -> Optional[Dict]:
+    def _detect_components(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                           timeframe: Optional[str] = None) -> Dict:
+        """
+        Run all detectors of the pipeline. Frames tagged with a symbol and
+        timeframe have the four ICT detectors only scanned from the last bar
+        seen when incremental_detectors is on; detectors registered on top of
+        those always see the whole frame. With index_zones on, the components
+        include the ZoneIndex of the symbol/timeframe, or of the frame alone
+        for untagged frames.
+        """
+        stage = None
+        if self.profiler.enabled:
+            def stage(name):
+                return self.profiler.stage(name, symbol, timeframe, len(df))
+
+        detectors = self.pipeline.detectors
+        components = None
+        if self.incremental_detectors or self.index_zones:
+            if symbol is not None and timeframe is not None:
+                with self.profiler.stage('detectors', symbol, timeframe, len(df)):
+                    components = self.detector_engine.update(symbol, timeframe, df)
+            elif self.index_zones:
+                with self.profiler.stage('detectors', symbol, timeframe, len(df)):
+                    state = DetectorState()
+                    state.advance(self, df, 0)
+                    components = state.components()
+        if components is not None:
+            detectors = [name for name in detectors if name not in components]
+            if not detectors:
+                return components
+        else:
+            components = {}
+
+        values = self.pipeline.run(df, detectors, stage)
+        components.update((name, values[name]) for name in detectors)
+        return components
+
+    def analyze(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                timeframe: Optional[str] = None, bias: Optional[str] = None) -> Optional[Dict]:
+        """
+        Analyze market data and return trading signal if conditions are met.
+        Frames tagged with a symbol and timeframe are analyzed once per closed
+        bar and state of the forming bar; later calls with the same bars are
+        served from result_cache.
+        With a bias ('bullish' or 'bearish') only setups in that direction
+        are looked for.
         """
-        Analyze market data and return trading signal if conditions are met
+        cache_key = None
+        if self.result_cache is not None and symbol is not None and timeframe is not None and len(df) > 1:
+            # The last bar is the one still forming, and the analysis reads it
+            # too, so its values are part of the key
+            forming = (df.index[-1],) + tuple(df[column].iat[-1]
+                                              for column in ('open', 'high', 'low', 'close', 'volume'))
+            cache_key = (symbol, timeframe, df.index[-2], forming, bias, self._parameter_key())
+            found, signal = self.result_cache.get(cache_key)
+            if found:
+                return signal.to_dict() if signal is not None else None
+
+        signal = self._analyze(df, symbol, timeframe, bias)
+        if cache_key is not None:
+            self.result_cache.put(cache_key, signal)
+        return signal.to_dict() if signal is not None else None
+
+    def _analyze(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                 timeframe: Optional[str] = None, bias: Optional[str] = None) -> Optional[Signal]:
         """
+        Uncached analyze(), returning the Signal record
+        """
+        self.gate_stats['evaluations'] += 1
+        stage = self.profiler.stage
+
         # Calculate indicators
-        df = self._calculate_indicators(df)
-        
-        # Get all components
-        components = {
-            'order_blocks': self.detect_order_blocks(df),
-            'fair_value_gaps': self.detect_fair_value_gaps(df),
-            'liquidity_zones': self.detect_liquidity_zones(df),
-            'market_structure': self.detect_market_structure(df)
-        }
+        with stage('indicators', symbol, timeframe, len(df)):
+            df = self._calculate_indicators(df, symbol, timeframe)
         
         # Check trend strength
-        trend, trend_strength = self._check_trend_strength(df)
+        with stage('trend', symbol, timeframe, len(df)):
+            trend, trend_strength = self._check_trend_strength(df)
+        if trend == 'neutral':
+            self.gate_stats['trend'] += 1
+            return None
+        
+        # Trend must agree with the higher timeframe bias
+        if bias is not None and trend != bias:
+            self.gate_stats['bias'] += 1
+            return None
         
         # Check momentum
-        momentum, momentum_strength = self._check_momentum(df)
-        
-        # Check volatility
-        volatility = self._check_volatility(df)
-        
-        # Check volume profile
-        volume_profile = self._check_volume_profile(df)
-        
-        # Check for bullish setup
-        if trend == 'bullish' and momentum == 'bullish':
-            if self._check_optimal_entry(df, 'bullish'):
-                bullish_signal = self._check_bullish_setup(df, components)
-                if bullish_signal:
-                    # Enhance signal with additional analysis
-                    bullish_signal.update({
-                        'trend_strength': trend_strength,
-                        'momentum_strength': momentum_strength,
-                        'volatility': volatility,
-                        'volume_profile': volume_profile,
-                        'indicators': {
-                            'rsi': df['rsi'].iloc[-1],
-                            'macd': df['macd'].iloc[-1],
-                            'stoch_k': df['stoch_k'].iloc[-1],
-                            'stoch_d': df['stoch_d'].iloc[-1],
-                            'bb_position': (df['close'].iloc[-1] - df['bb_lower'].iloc[-1]) / 
-                                         (df['bb_upper'].iloc[-1] - df['bb_lower'].iloc[-1])
-                        }
-                    })
-                    return bullish_signal
-        
-        # Check for bearish setup
-        if trend == 'bearish' and momentum == 'bearish':
-            if self._check_optimal_entry(df, 'bearish'):
-                bearish_signal = self._check_bearish_setup(df, components)
-                if bearish_signal:
-                    # Enhance signal with additional analysis
-                    bearish_signal.update({
-                        'trend_strength': trend_strength,
-                        'momentum_strength': momentum_strength,
-                        'volatility': volatility,
-                        'volume_profile': volume_profile,
-                        'indicators': {
-                            'rsi': df['rsi'].iloc[-1],
-                            'macd': df['macd'].iloc[-1],
-                            'stoch_k': df['stoch_k'].iloc[-1],
-                            'stoch_d': df['stoch_d'].iloc[-1],
-                            'bb_position': (df['close'].iloc[-1] - df['bb_lower'].iloc[-1]) / 
-                                         (df['bb_upper'].iloc[-1] - df['bb_lower'].iloc[-1])
-                        }
-                    })
-                    return bearish_signal
-        
-        return None 
\ No newline at end of file
+        with stage('momentum', symbol, timeframe, len(df)):
+            momentum, momentum_strength = self._check_momentum(df)
+        
+        return self._evaluate_setups(df, trend, trend_strength, momentum, momentum_strength,
+                                     symbol, timeframe)
+
+    def _evaluate_setups(self, df: pd.DataFrame, trend: str, trend_strength: float,
+                         momentum: str, momentum_strength: float, symbol: Optional[str] = None,
+                         timeframe: Optional[str] = None) -> Optional[Signal]:
+        """
+        Look for a setup once indicators, trend and momentum are known. The
+        cheap gates run first and the detectors, volatility and volume
+        profile are only computed while a setup is still possible.
+        """
+        # Trend and momentum must agree
+        if momentum != trend:
+            self.gate_stats['momentum'] += 1
+            return None
+        
+        stage = self.profiler.stage
+
+        # Price must be in the optimal entry zone
+        with stage('optimal_entry', symbol, timeframe, len(df)):
+            bands = self._retracement(df)
+            optimal_entry = self._check_optimal_entry(df, trend, bands)
+        if not optimal_entry:
+            self.gate_stats['optimal_entry'] += 1
+            return None
+        
+        # Get all components
+        components = self._detect_components(df, symbol, timeframe)
+        
+        # Check for a setup in the trend direction
+        with stage('setup', symbol, timeframe, len(df)):
+            if trend == 'bullish':
+                signal = self._check_bullish_setup(df, components)
+            else:
+                signal = self._check_bearish_setup(df, components)
+        if not signal:
+            self.gate_stats['setup'] += 1
+            return None
+        
+        # Enhance signal with additional analysis
+        with stage('volatility', symbol, timeframe, len(df)):
+            volatility = self._check_volatility(df)
+            regime = self.volatility_regime(df)
+        with stage('volume_profile', symbol, timeframe, len(df)):
+            profile = self._check_volume_profile(df, symbol, timeframe)
+        signal.trend_strength = trend_strength
+        signal.momentum_strength = momentum_strength
+        signal.volatility = volatility
+        signal.volatility_regime = regime
+        signal.volume_profile = profile
+        signal.retracement = bands
+        signal.detectors = {name: components[name] for name in self.pipeline.detectors
+                            if name not in ICT_DETECTORS}
+        signal.indicators = {
+            'rsi': df['rsi'].iloc[-1],
+            'macd': df['macd'].iloc[-1],
+            'stoch_k': df['stoch_k'].iloc[-1],
+            'stoch_d': df['stoch_d'].iloc[-1],
+            'bb_position': (df['close'].iloc[-1] - df['bb_lower'].iloc[-1]) /
+                         (df['bb_upper'].iloc[-1] - df['bb_lower'].iloc[-1])
+        }
+        self.gate_stats['signals'] += 1
+        return signal
+
+    def get_gate_stats(self) -> Dict[str, int]:
+        """
+        Get how many evaluations each gate short-circuited: 'trend' (neutral
+        trend), 'momentum' (momentum disagrees with trend), 'optimal_entry'
+        (price outside the OTE zone) and 'setup' (not enough ICT confluence)
+        """
+        return {stage: self.gate_stats[stage] for stage in GATE_STAGES}
+
+    def reset_gate_stats(self):
+        """
+        Reset the gate counters
+        """
+        self.gate_stats = Counter()
+
+    def get_bias(self, df: pd.DataFrame, symbol: Optional[str] = None,
+                 timeframe: Optional[str] = None) -> Dict:
+        """
+        Direction of the closed bars of df: the indicator trend, unless the
+        latest BOS/CHOCH points the other way, in which case it is neutral.
+        Tagged frames are only re-evaluated once a new bar has closed.
+        """
+        closed = df.index[-2] if len(df) > 1 else None
+        key = (symbol, timeframe)
+        version = (closed, self._parameter_key())
+        cached = self.bias_cache.get(key)
+        if symbol is not None and cached is not None and cached[0] == version:
+            return cached[1]
+
+        bias = {'direction': 'neutral', 'strength': 0.0, 'structure': None, 'time': closed}
+        if closed is not None:
+            with self.profiler.stage('bias', symbol, timeframe, len(df)):
+                df = self._calculate_indicators(df, symbol, timeframe).iloc[:-1]
+                direction, strength = self._check_trend_strength(df)
+
+                # Latest break of structure or change of character
+                structure = self.detect_market_structure(df)
+                events = structure['bos'] + structure['choch']
+                if events:
+                    bias['structure'] = max(events, key=lambda event: event.time).type
+
+            if direction != 'neutral' and bias['structure'] in (None, direction):
+                bias['direction'] = direction
+                bias['strength'] = strength
+
+        if symbol is not None:
+            self.bias_cache[key] = (version, bias)
+        return bias
+
+    def analyze_cascade(self, frames: Dict[str, pd.DataFrame], symbol: str) -> Dict[str, Optional[Dict]]:
+        """
+        Analyze one symbol's timeframes from the highest down (frames must be
+        ordered that way). Only the highest timeframe gates: lower ones are
+        skipped while its bias is neutral and otherwise only analyzed in its
+        direction. The timeframes in between (e.g. 1h and 30m under 4h) never
+        gate; their bias only adds to the score.
+
+        Signals get a 'confluence' score, the mean bias strength of the
+        higher timeframes and the signal's own trend strength, with
+        timeframes pointing the other way counting as 0. The highest
+        timeframe has nothing above it to agree with, so its signals are
+        scored on their own trend strength alone.
+        """
+        timeframes = list(frames)
+        top = self.get_bias(frames[timeframes[0]], symbol, timeframes[0]) if len(timeframes) > 1 else None
+
+        signals = {}
+        for i, timeframe in enumerate(timeframes):
+            direction = top['direction'] if i > 0 else None
+            if direction == 'neutral':
+                self.gate_stats['evaluations'] += 1
+                self.gate_stats['bias'] += 1
+                signals[timeframe] = None
+                continue
+
+            signal = self.analyze(frames[timeframe], symbol, timeframe, bias=direction)
+            if signal is not None:
+                higher = [self.get_bias(frames[htf], symbol, htf) for htf in timeframes[:i]]
+                agreement = [b['strength'] if b['direction'] == signal['type'] else 0.0 for b in higher]
+                signal['htf_bias'] = direction
+                signal['confluence'] = (sum(agreement) + signal['trend_strength']) / (len(agreement) + 1)
+            signals[timeframe] = signal
+
+        return signals
+
+    def analyze_many(self, panel: np.ndarray, index=None,
+                     symbols: Optional[List[str]] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Analyze a (symbols, bars, OHLCV) price panel in one go. Indicators and
+        the trend/momentum gates are computed for every symbol at once along
+        the time axis; only symbols that pass both gates are checked for a
+        setup. index is one bar index shared by all symbols or a list with one
+        per symbol.
+        """
+        panel = np.asarray(panel, dtype=float)
+        n_symbols, n_bars = panel.shape[:2]
+        if symbols is None:
+            symbols = [str(i) for i in range(n_symbols)]
+        if index is None:
+            index = pd.RangeIndex(n_bars)
+        indexes = index if isinstance(index, (list, tuple)) else [index] * n_symbols
+
+        open_, high, low, close, volume = (panel[..., i] for i in range(5))
+        values = compute_indicators(self, high, low, close, volume)
+
+        # Trend and momentum gates for every symbol at once
+        trend, trend_strength = self._batch_trend_strength(values, close)
+        momentum, momentum_strength = self._batch_momentum(values)
+
+        signals = {symbol: None for symbol in symbols}
+        self.gate_stats['evaluations'] += n_symbols
+        self.gate_stats['trend'] += int(np.count_nonzero(trend == 'neutral'))
+        self.gate_stats['momentum'] += int(np.count_nonzero((trend != 'neutral') & (momentum != trend)))
+        candidates = np.flatnonzero((trend == momentum) & (trend != 'neutral'))
+        for i in candidates:
+            columns = {'open': open_[i], 'high': high[i], 'low': low[i], 'close': close[i], 'volume': volume[i]}
+            columns.update((name, series[i]) for name, series in values.items())
+            df = pd.DataFrame(columns, index=indexes[i])
+            signal = self._evaluate_setups(df, trend[i], trend_strength[i], momentum[i], momentum_strength[i])
+            signals[symbols[i]] = signal.to_dict() if signal is not None else None
+
+        return signals
+
+    def _batch_trend_strength(self, values: Dict[str, np.ndarray],
+                              close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        _check_trend_strength for every row of a panel
+        """
+        last = {name: series[:, -1] for name, series in values.items()}
+
+        # EMA Alignment
+        fast, *slow = self.ema_periods
+        ema_aligned_up = np.all([last[f'ema_{fast}'] > last[f'ema_{period}'] for period in slow], axis=0)
+        ema_aligned_down = np.all([last[f'ema_{fast}'] < last[f'ema_{period}'] for period in slow], axis=0)
+
+        # MACD, RSI and Bollinger Bands
+        bullish_signals = (ema_aligned_up.astype(int) +
+                           (last['macd'] > last['macd_signal']) +
+                           (last['rsi'] > 50) +
+                           (close[:, -1] > last['bb_middle']))
+        bearish_signals = (ema_aligned_down.astype(int) +
+                           (last['macd'] < last['macd_signal']) +
+                           (last['rsi'] < 50) +
+                           (close[:, -1] < last['bb_middle']))
+
+        trend = np.where(bullish_signals > bearish_signals, 'bullish',
+                         np.where(bearish_signals > bullish_signals, 'bearish', 'neutral'))
+        strength = np.where(bullish_signals > bearish_signals, bullish_signals / 4,
+                            np.where(bearish_signals > bullish_signals, bearish_signals / 4, 0.5))
+        return trend, strength
+
+    def _batch_momentum(self, values: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        _check_momentum for every row of a panel
+        """
+        # RSI
+        rsi = values['rsi'][:, -1]
+        rsi_momentum = np.where(rsi > self.rsi_overbought, -1, np.where(rsi < self.rsi_oversold, 1, 0))
+
+        # Stochastic
+        stoch_k = values['stoch_k'][:, -1]
+        stoch_d = values['stoch_d'][:, -1]
+        stoch_momentum = np.where((stoch_k > 80) & (stoch_d > 80), -1,
+                                  np.where((stoch_k < 20) & (stoch_d < 20), 1, 0))
+
+        # MACD
+        diff_now = values['macd_diff'][:, -1]
+        diff_prev = values['macd_diff'][:, -2]
+        macd_momentum = np.where((diff_now > 0) & (diff_prev < 0), 1,
+                                 np.where((diff_now < 0) & (diff_prev > 0), -1, 0))
+
+        # Calculate overall momentum
+        momentum_score = (rsi_momentum + stoch_momentum + macd_momentum) / 3
+
+        momentum = np.where(momentum_score > 0, 'bullish', np.where(momentum_score < 0, 'bearish', 'neutral'))
+        return momentum, np.abs(momentum_score)
+
+    @staticmethod
+    def stack_frames(frames: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, List[pd.Index], List[str]]:
+        """
+        Build an analyze_many panel from per-symbol OHLCV frames, keeping the
+        most recent bars common to all of them
+        """
+        symbols = [symbol for symbol, df in frames.items() if not df.empty]
+        n_bars = min(len(frames[symbol]) for symbol in symbols) if symbols else 0
+        tails = [frames[symbol].iloc[len(frames[symbol]) - n_bars:] for symbol in symbols]
+        columns = ['open', 'high', 'low', 'close', 'volume']
+        panel = np.stack([df[columns].to_numpy(dtype=float) for df in tails]) if tails else np.empty((0, 0, 5))
+        return panel, [df.index for df in tails], symbols
@@ -0,0 +1,481 @@
+import bisect
+import math
+import numpy as np
+import pandas as pd
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from .indicator_store import IndicatorStore
+from .indicators import retracement_levels
+
+NAN = float('nan')
+
+class _Ema:
+    """
+    Recursive exponential moving average with the same seeding and warm-up
+    as pandas ewm(adjust=False, min_periods=...), which is what `ta` uses
+    """
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.count = 0
+
+    def _advance(self, x: float) -> Tuple[float, int]:
+        # Leading NaNs are skipped, the first real value seeds the average
+        if math.isnan(x):
+            return self.value, self.count
+        if self.count == 0:
+            return x, 1
+
+        value = self.value
+        if value != x:
+            old_wt = 1. - self.alpha
+            value = (old_wt * value + self.alpha * x) / (old_wt + self.alpha)
+        return value, self.count + 1
+
+    def _output(self, value: float, count: int) -> float:
+        return value if count >= self.min_periods else NAN
+
+    def peek(self, x: float) -> float:
+        """
+        Value after x without committing it
+        """
+        return self._output(*self._advance(x))
+
+    def push(self, x: float) -> float:
+        """
+        Commit x and return the new value
+        """
+        self.value, self.count = self._advance(x)
+        return self._output(self.value, self.count)
+
+class _RollingSum:
+    """
+    Sum of the most recent `size` values, updated in O(1) per value. A NaN
+    is counted instead of added, so the sum is NaN while one is in the
+    window. The running total is recomputed exactly every `size` values so
+    rounding errors cannot build up.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+        self.since_resync = 0
+
+    def peek(self, x: float) -> float:
+        """
+        Sum of the window ending at x without committing it, NaN during warm-up
+        """
+        n = len(self.values)
+        if n + 1 < self.size:
+            return NAN
+        total, nans = self.total, self.nans
+        if n == self.size:
+            old = self.values[0]
+            if math.isnan(old):
+                nans -= 1
+            else:
+                total -= old
+        if math.isnan(x) or nans:
+            return NAN
+        return total + x
+
+    def push(self, x: float) -> float:
+        """
+        Commit x and return the sum of the full window, NaN during warm-up
+        """
+        values = self.values
+        if len(values) == self.size:
+            old = values.popleft()
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                self.total -= old
+        values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+        else:
+            self.total += x
+
+        self.since_resync += 1
+        if self.since_resync >= self.size:
+            self.since_resync = 0
+            self.total = math.fsum(v for v in values if not math.isnan(v))
+
+        if len(values) < self.size or self.nans:
+            return NAN
+        return self.total
+
+class _RollingMoments:
+    """
+    Mean and population standard deviation (ddof=0) of the most recent
+    `size` values in O(1) per value. The sums are taken around a shift
+    reset to the window mean at every exact resync, which keeps the
+    variance from cancelling out on large prices with small moves.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.shift = NAN
+        self.sum = 0.0
+        self.sum_sq = 0.0
+        self.since_resync = 0
+
+    def _moments(self, total: float, total_sq: float) -> Tuple[float, float]:
+        mean = total / self.size
+        return self.shift + mean, math.sqrt(max(total_sq / self.size - mean * mean, 0.0))
+
+    def peek(self, x: float) -> Tuple[float, float]:
+        """
+        (mean, std) of the window ending at x without committing it, NaN
+        during warm-up
+        """
+        n = len(self.values)
+        if n + 1 < self.size:
+            return NAN, NAN
+        if math.isnan(self.shift):
+            self.shift = x
+        total, total_sq = self.sum, self.sum_sq
+        if n == self.size:
+            old = self.values[0] - self.shift
+            total -= old
+            total_sq -= old * old
+        d = x - self.shift
+        return self._moments(total + d, total_sq + d * d)
+
+    def push(self, x: float) -> Tuple[float, float]:
+        """
+        Commit x and return (mean, std) of the full window, NaN during warm-up
+        """
+        values = self.values
+        if math.isnan(self.shift):
+            self.shift = x
+        if len(values) == self.size:
+            old = values.popleft() - self.shift
+            self.sum -= old
+            self.sum_sq -= old * old
+        values.append(x)
+        d = x - self.shift
+        self.sum += d
+        self.sum_sq += d * d
+
+        self.since_resync += 1
+        if self.since_resync >= self.size:
+            self.since_resync = 0
+            self.shift = math.fsum(values) / len(values)
+            self.sum = math.fsum(v - self.shift for v in values)
+            self.sum_sq = math.fsum((v - self.shift) ** 2 for v in values)
+
+        if len(values) < self.size:
+            return NAN, NAN
+        return self._moments(self.sum, self.sum_sq)
+
+class _RollingExtreme:
+    """
+    Maximum (or minimum) of the most recent `size` values, from a monotonic
+    deque of (position, value) candidates: O(1) amortized per value
+    """
+
+    def __init__(self, size: int, largest: bool = True):
+        self.size = size
+        self.sign = 1.0 if largest else -1.0
+        self.candidates = deque()
+        self.count = 0
+
+    def peek(self, x: float) -> float:
+        """
+        Extreme of the window ending at x without committing it, NaN during warm-up
+        """
+        if self.count + 1 < self.size:
+            return NAN
+        candidates = self.candidates
+        # The oldest value drops out of the window when x comes in
+        k = 1 if candidates and candidates[0][0] <= self.count - self.size else 0
+        v = x * self.sign
+        if len(candidates) > k and candidates[k][1] > v:
+            v = candidates[k][1]
+        return v * self.sign
+
+    def push(self, x: float) -> float:
+        """
+        Commit x and return the extreme of the full window, NaN during warm-up
+        """
+        candidates = self.candidates
+        v = x * self.sign
+        while candidates and candidates[-1][1] <= v:
+            candidates.pop()
+        candidates.append((self.count, v))
+        self.count += 1
+        if candidates[0][0] <= self.count - 1 - self.size:
+            candidates.popleft()
+        if self.count < self.size:
+            return NAN
+        return candidates[0][1] * self.sign
+
+class _RollingRank:
+    """
+    Fraction of the most recent `size` values at or below the newest one,
+    NaN while the window holds a NaN. The window is also kept sorted, so a
+    value costs a binary search plus a memmove of the sorted list rather
+    than a pass over the window.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque()
+        self.ordered: List[float] = []
+        self.nans = 0
+
+    def peek(self, x: float) -> float:
+        """
+        Rank of x in the window ending at it without committing it, NaN during warm-up
+        """
+        n = len(self.values)
+        if n + 1 < self.size or math.isnan(x):
+            return NAN
+        nans = self.nans
+        below = bisect.bisect_right(self.ordered, x) + 1
+        if n == self.size:
+            old = self.values[0]
+            if math.isnan(old):
+                nans -= 1
+            elif old <= x:
+                below -= 1
+        if nans:
+            return NAN
+        return below / self.size
+
+    def push(self, x: float) -> float:
+        """
+        Commit x and return its rank in the full window, NaN during warm-up
+        """
+        values = self.values
+        if len(values) == self.size:
+            old = values.popleft()
+            if math.isnan(old):
+                self.nans -= 1
+            else:
+                del self.ordered[bisect.bisect_left(self.ordered, old)]
+        values.append(x)
+        if math.isnan(x):
+            self.nans += 1
+            return NAN
+        bisect.insort(self.ordered, x)
+        if len(values) < self.size or self.nans:
+            return NAN
+        return bisect.bisect_right(self.ordered, x) / self.size
+
+class IncrementalIndicators:
+    """
+    Indicator state for a single symbol/timeframe, advanced one bar at a time.
+
+    Produces the same columns as QuantumSmartFlowStrategy._calculate_indicators
+    and matches the `ta` implementations once each indicator is warmed up.
+    """
+
+    def __init__(self, strategy):
+        # Parameters the state was built with
+        self.params = strategy._parameter_key()
+
+        # EMAs
+        self.emas = {period: _Ema(2 / (period + 1), period) for period in strategy.ema_periods}
+
+        # RSI (Wilder smoothing of gains and losses)
+        self.prev_close = NAN
+        self.rsi_up = _Ema(1 / strategy.rsi_period, strategy.rsi_period)
+        self.rsi_down = _Ema(1 / strategy.rsi_period, strategy.rsi_period)
+
+        # Bollinger Bands
+        self.bb_window = _RollingMoments(strategy.bb_period)
+        self.bb_std = strategy.bb_std
+
+        # VWAP
+        self.vwap_pv = _RollingSum(strategy.vwap_period)
+        self.vwap_volume = _RollingSum(strategy.vwap_period)
+
+        # MACD
+        self.macd_fast = _Ema(2 / (strategy.macd_fast + 1), strategy.macd_fast)
+        self.macd_slow = _Ema(2 / (strategy.macd_slow + 1), strategy.macd_slow)
+        self.macd_signal = _Ema(2 / (strategy.macd_signal + 1), strategy.macd_signal)
+
+        # Stochastic
+        self.stoch_high = _RollingExtreme(strategy.stoch_k)
+        self.stoch_low = _RollingExtreme(strategy.stoch_k, largest=False)
+        self.stoch_signal = _RollingSum(strategy.stoch_d)
+
+        # ATR and its percentile rank
+        self.atr_window = _RollingSum(strategy.atr_period)
+        self.atr_history = _RollingRank(strategy.regime_lookback)
+
+        # Premium/discount and OTE bands
+        self.range_high = _RollingExtreme(strategy.retracement_lookback)
+        self.range_low = _RollingExtreme(strategy.retracement_lookback, largest=False)
+        self.retracement = strategy.optimal_entry_retracement
+
+        # Last committed bar
+        self.timestamp = None
+
+    def step(self, high: float, low: float, close: float, volume: float,
+             commit: bool = True) -> Dict[str, float]:
+        """
+        Indicator values for the next bar. With commit=False the bar is only
+        evaluated, so a still-forming candle can be revised on the next call.
+        """
+        def advance(component, x):
+            return component.push(x) if commit else component.peek(x)
+
+        values = {}
+
+        # EMAs
+        for period, ema in self.emas.items():
+            values[f'ema_{period}'] = advance(ema, close)
+
+        # True range (the first bar only has high-low)
+        tr = high - low
+        if not math.isnan(self.prev_close):
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        values['tr'] = tr
+
+        # RSI
+        diff = close - self.prev_close
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else 0.0
+        ema_up = advance(self.rsi_up, up)
+        ema_down = advance(self.rsi_down, down)
+        if ema_down == 0:
+            values['rsi'] = 100.0
+        else:
+            values['rsi'] = 100 - (100 / (1 + ema_up / ema_down))
+        if commit:
+            self.prev_close = close
+
+        # Bollinger Bands
+        mavg, mstd = advance(self.bb_window, close)
+        values['bb_upper'] = mavg + self.bb_std * mstd
+        values['bb_middle'] = mavg
+        values['bb_lower'] = mavg - self.bb_std * mstd
+
+        # VWAP
+        typical_price = (high + low + close) / 3.0
+        pv = advance(self.vwap_pv, typical_price * volume)
+        total_volume = advance(self.vwap_volume, volume)
+        vwap = NAN
+        if total_volume:
+            vwap = pv / total_volume
+        values['vwap'] = vwap
+
+        # MACD
+        macd = advance(self.macd_fast, close) - advance(self.macd_slow, close)
+        macd_signal = advance(self.macd_signal, macd)
+        values['macd'] = macd
+        values['macd_signal'] = macd_signal
+        values['macd_diff'] = macd - macd_signal
+
+        # Stochastic
+        smax = advance(self.stoch_high, high)
+        smin = advance(self.stoch_low, low)
+        stoch_k = NAN
+        if smax != smin:
+            stoch_k = 100 * (close - smin) / (smax - smin)
+        values['stoch_k'] = stoch_k
+        values['stoch_d'] = advance(self.stoch_signal, stoch_k) / self.stoch_signal.size
+
+        # ATR
+        atr = advance(self.atr_window, tr) / self.atr_window.size
+        values['atr'] = atr
+        values['atr_rank'] = advance(self.atr_history, atr)
+
+        # Premium/discount and OTE bands
+        values.update(retracement_levels(advance(self.range_high, high), advance(self.range_low, low),
+                                         self.retracement))
+
+        return values
+
+class StreamingIndicatorEngine:
+    """
+    Keeps one IncrementalIndicators per (symbol, timeframe) and only feeds it
+    the bars it has not seen yet. The values live in an IndicatorStore and
+    are returned as views into it.
+
+    The last bar of a frame is treated as still forming unless the caller says
+    otherwise: it is evaluated but not committed, so the next cycle can
+    revise it and then move on.
+    """
+
+    def __init__(self, strategy, max_history: int = 5000):
+        self.strategy = strategy
+        self.states: Dict[Tuple[str, str], IncrementalIndicators] = {}
+        self.store = IndicatorStore(max_history=max_history)
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Drop state for one symbol/timeframe, or for everything
+        """
+        if symbol is None:
+            self.states.clear()
+            self.store.reset()
+            return
+        self.states.pop((symbol, timeframe), None)
+        self.store.reset(symbol, timeframe)
+
+    def _committed_bars(self, key: Tuple[str, str], index: pd.Index) -> int:
+        """
+        Number of leading bars of index already committed for key, or -1 if
+        the frame does not line up with the stored state
+        """
+        state = self.states.get(key)
+        if state is None or state.timestamp is None:
+            return -1
+
+        pos = index.searchsorted(state.timestamp)
+        if pos >= len(index) or index[pos] != state.timestamp:
+            return -1
+
+        # Not enough stored history to cover the older part of the frame
+        if pos + 1 > self.store.committed(key):
+            return -1
+        return pos + 1
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame,
+               last_bar_closed: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Indicator columns aligned with df, advancing the stored state over any
+        new closed bars. The arrays are views into the store, valid until the
+        next update for the same symbol/timeframe.
+        """
+        key = (symbol, timeframe)
+        n = len(df)
+        n_closed = n if last_bar_closed else n - 1
+
+        start = self._committed_bars(key, df.index)
+        if start < 0 or start > n_closed or self.states[key].params != self.strategy._parameter_key():
+            # First call, a gap, a rewind or changed parameters: replay the whole frame
+            self.states[key] = IncrementalIndicators(self.strategy)
+            self.store.reset(symbol, timeframe)
+            start = 0
+
+        state = self.states[key]
+
+        high = df['high'].to_numpy()
+        low = df['low'].to_numpy()
+        close = df['close'].to_numpy()
+        volume = df['volume'].to_numpy()
+
+        # Commit the new closed bars
+        for i in range(start, n_closed):
+            values = state.step(float(high[i]), float(low[i]), float(close[i]), float(volume[i]))
+            self.store.append(key, values, keep=n)
+        if n_closed > start:
+            state.timestamp = df.index[n_closed - 1]
+
+        # Evaluate the forming bar without committing it
+        if n_closed < n:
+            last = state.step(float(high[-1]), float(low[-1]), float(close[-1]), float(volume[-1]),
+                              commit=False)
+            self.store.stage(key, last, keep=n)
+
+        return self.store.view(key, n_closed, staged=n_closed < n)
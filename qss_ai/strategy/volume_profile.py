@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# Volume at price on a fixed grid: bin k holds prices in
+# [k * bin_size, (k + 1) * bin_size), so profiles built from different
+# windows with the same bin size line up bin for bin.
+
+def price_bins(prices: np.ndarray, bin_size: float) -> np.ndarray:
+    """
+    Grid bin number of every price
+    """
+    return np.floor(np.asarray(prices, dtype=float) / bin_size).astype(np.int64)
+
+def value_area(volumes: np.ndarray, poc: int, fraction: float = 0.7) -> Tuple[int, int]:
+    """
+    First and last bin of the value area: starting at the POC, add whichever
+    pair of neighbouring bins above or below holds more volume until
+    `fraction` of the total is covered
+    """
+    volumes = volumes.tolist()
+    target = fraction * sum(volumes)
+    covered = volumes[poc]
+    lo = hi = poc
+    last = len(volumes) - 1
+    while covered < target and (lo > 0 or hi < last):
+        # -1 marks a side that has run out of bins
+        above = sum(volumes[hi + 1:hi + 3]) if hi < last else -1
+        below = sum(volumes[max(0, lo - 2):lo]) if lo > 0 else -1
+        if above >= below:
+            covered += above
+            hi = min(hi + 2, last)
+        else:
+            covered += below
+            lo = max(lo - 2, 0)
+    return lo, hi
+
+# Profile of a window without any volume
+EMPTY_PROFILE = {'poc': np.nan, 'value_area_high': np.nan, 'value_area_low': np.nan}
+
+def _profile(volumes: np.ndarray, origin: int, bin_size: float, fraction: float) -> Dict[str, float]:
+    """
+    POC (bin centre) and value area edges of a histogram whose first bin is
+    grid bin `origin`
+    """
+    poc = int(np.argmax(volumes))
+    lo, hi = value_area(volumes, poc, fraction)
+    return {
+        'poc': (origin + poc + 0.5) * bin_size,
+        'value_area_high': (origin + hi + 1) * bin_size,
+        'value_area_low': (origin + lo) * bin_size
+    }
+
+def volume_profile(prices: np.ndarray, volumes: np.ndarray, bin_size: float,
+                   fraction: float = 0.7) -> Dict[str, float]:
+    """
+    POC and value area high/low of the volume traded at `prices`
+    """
+    bins = price_bins(prices, bin_size)
+    if not len(bins):
+        return dict(EMPTY_PROFILE)
+    origin = int(bins.min())
+    histogram = np.bincount(bins - origin, weights=np.asarray(volumes, dtype=float))
+    return _profile(histogram, origin, bin_size, fraction)
+
+def session_volume_profiles(df: pd.DataFrame, bin_size: float, session: str = '1D',
+                            fraction: float = 0.7) -> Tuple[List[Dict], Dict[str, float]]:
+    """
+    One profile per session plus the composite profile of the whole frame,
+    all from a single bincount over (session, price bin)
+    """
+    bins = price_bins(df['close'].to_numpy(), bin_size)
+    if not len(bins):
+        return [], dict(EMPTY_PROFILE)
+    origin = int(bins.min())
+    n_bins = int(bins.max()) - origin + 1
+
+    sessions, codes = np.unique(df.index.floor(session), return_inverse=True)
+    cells = codes * n_bins + (bins - origin)
+    shape = (len(sessions), n_bins)
+    histogram = np.bincount(cells, weights=df['volume'].to_numpy(dtype=float),
+                            minlength=shape[0] * shape[1]).reshape(shape)
+    counts = np.bincount(cells, minlength=shape[0] * shape[1]).reshape(shape)
+
+    profiles = []
+    for start, volumes, filled in zip(sessions, histogram, counts):
+        # Only the session's own price range, so its value area cannot
+        # spread over bins only other sessions traded in
+        first, last = np.flatnonzero(filled)[[0, -1]]
+        profile = _profile(volumes[first:last + 1], origin + int(first), bin_size, fraction)
+        profile['session'] = start
+        profiles.append(profile)
+    return profiles, _profile(histogram.sum(axis=0), origin, bin_size, fraction)
+
+class VolumeProfile:
+    """
+    Volume at price histogram that can be added to and removed from, so a
+    rolling window only touches the bars entering and leaving it. The bin
+    size is fixed for the life of the profile.
+    """
+
+    def __init__(self, bin_size: float, fraction: float = 0.7):
+        self.bin_size = bin_size
+        self.fraction = fraction
+        self.origin = 0                  # Grid bin of volumes[0]
+        self.volumes = np.zeros(0)
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def copy(self) -> 'VolumeProfile':
+        """
+        Copy that can be added to without touching this profile
+        """
+        other = VolumeProfile(self.bin_size, self.fraction)
+        other.origin = self.origin
+        other.volumes = self.volumes.copy()
+        other.counts = self.counts.copy()
+        return other
+
+    def _accumulate(self, prices: np.ndarray, volumes: np.ndarray, sign: int):
+        bins = price_bins(np.atleast_1d(prices), self.bin_size)
+        if not len(bins):
+            return
+        volumes = np.broadcast_to(np.asarray(volumes, dtype=float), bins.shape)
+
+        # Widen the histogram to cover the new bins
+        lo, hi = int(bins.min()), int(bins.max())
+        if not len(self.volumes):
+            self.origin = lo
+        pad_left = max(0, self.origin - lo)
+        pad_right = max(0, hi - (self.origin + len(self.volumes) - 1))
+        if pad_left or pad_right:
+            self.volumes = np.pad(self.volumes, (pad_left, pad_right))
+            self.counts = np.pad(self.counts, (pad_left, pad_right))
+            self.origin -= pad_left
+
+        offsets = bins - self.origin
+        size = len(self.volumes)
+        self.volumes += sign * np.bincount(offsets, weights=volumes, minlength=size)
+        self.counts += sign * np.bincount(offsets, minlength=size)
+
+        if sign < 0:
+            # Empty bins are exactly zero, whatever rounding the subtraction left
+            self.volumes[self.counts == 0] = 0.0
+            self._trim()
+
+    def _trim(self):
+        """
+        Drop empty bins at either end so a trending window does not keep
+        growing the histogram
+        """
+        filled = np.flatnonzero(self.counts)
+        if not len(filled):
+            self.volumes = np.zeros(0)
+            self.counts = np.zeros(0, dtype=np.int64)
+            return
+        first, last = filled[0], filled[-1]
+        self.volumes = self.volumes[first:last + 1]
+        self.counts = self.counts[first:last + 1]
+        self.origin += int(first)
+
+    def add(self, prices, volumes):
+        """
+        Add the volume traded at each price
+        """
+        self._accumulate(prices, volumes, 1)
+
+    def remove(self, prices, volumes):
+        """
+        Remove volume previously added at the same prices
+        """
+        self._accumulate(prices, volumes, -1)
+
+    def to_dict(self) -> Dict[str, float]:
+        """
+        POC and value area high/low, in the shape _check_volume_profile returns
+        """
+        if not self.counts.any():
+            return dict(EMPTY_PROFILE)
+        return _profile(self.volumes, self.origin, self.bin_size, self.fraction)
+
+class VolumeProfileEngine:
+    """
+    Keeps one VolumeProfile per (symbol, timeframe) over the closed bars of
+    the last frame it was given, so the next frame only adds the bars that
+    entered it and removes the ones that left.
+
+    Like the streaming indicator engine, the last bar of a frame is treated
+    as still forming: it is added to a throwaway copy of the profile.
+    """
+
+    def __init__(self, strategy):
+        self.strategy = strategy
+        # (symbol, timeframe) -> ((parameter key, bin size), profile, closed bars in it)
+        self.states: Dict[Tuple[str, str], Tuple[Tuple, VolumeProfile, pd.DataFrame]] = {}
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Drop state for one symbol/timeframe, or for everything
+        """
+        if symbol is None:
+            self.states.clear()
+            return
+        self.states.pop((symbol, timeframe), None)
+
+    def update(self, symbol: str, timeframe: str, df: pd.DataFrame, bin_size: float) -> Dict[str, float]:
+        """
+        POC and value area of df, as volume_profile() would return them
+        """
+        key = (symbol, timeframe)
+        closed = df.iloc[:-1]
+        params = (self.strategy._parameter_key(), bin_size)
+
+        state = self.states.get(key)
+        profile = None
+        if state is not None and state[0] == params and len(state[2]) and len(closed):
+            _, profile, previous = state
+            last = previous.index[-1]
+            pos = closed.index.searchsorted(last)
+            if previous.index[0] <= closed.index[0] and pos < len(closed) and closed.index[pos] == last:
+                # Slide the window: drop the bars before the frame, add the new closed ones
+                leaving = previous.iloc[:previous.index.searchsorted(closed.index[0])]
+                entering = closed.iloc[pos + 1:]
+                profile.remove(leaving['close'].to_numpy(), leaving['volume'].to_numpy())
+                profile.add(entering['close'].to_numpy(), entering['volume'].to_numpy())
+            else:
+                # A gap or a rewind: rebuild
+                profile = None
+        if profile is None:
+            profile = VolumeProfile(bin_size, self.strategy.value_area_fraction)
+            profile.add(closed['close'].to_numpy(), closed['volume'].to_numpy())
+        self.states[key] = (params, profile, closed)
+
+        # Evaluate the forming bar without committing it
+        if not len(df):
+            return profile.to_dict()
+        forming = profile.copy()
+        forming.add(df['close'].iat[-1], df['volume'].iat[-1])
+        return forming.to_dict()
@@ -0,0 +1,243 @@
+import json
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pandas as pd
+from ..config.settings import BASE_TIMEFRAME
+from .backtest import performance_stats, replay
+from .optimizer import attach_datasets, share_datasets, shared_dataset, trade_stats
+from .smartflow import QuantumSmartFlowStrategy
+
+# Walk-forward validation: every fold picks the best parameter set on an
+# in-sample period and then replays it, untouched, on the out-of-sample
+# period that follows. Replays of one (fold, parameter set, symbol) are the
+# unit of work for the process pool, and each finished fold is written to
+# its own file so an interrupted run only redoes the folds it had not
+# finished.
+
+def _replay_period(symbol: str, start: pd.Timestamp, stop: pd.Timestamp, params: Dict[str, Any],
+                   timeframe: str, window: int) -> List[Dict[str, Any]]:
+    """
+    Worker task: trades of one parameter set on one symbol for signals
+    found on bars in [start, stop), with the bars before start as warm-up
+    """
+    df = shared_dataset(symbol)
+    first = int(df.index.searchsorted(start))
+    last = int(df.index.searchsorted(stop))
+    if first >= last:
+        return []
+
+    strategy = QuantumSmartFlowStrategy.with_params(**params)
+    return replay(strategy, df.iloc[max(0, first - window + 1):last], symbol, timeframe, window)
+
+def _merge(trades: Dict[str, List[Dict[str, Any]]], symbols: List[str]) -> List[Dict[str, Any]]:
+    """
+    Trades of every symbol in exit order, whatever order the tasks finished in
+    """
+    merged = [trade for symbol in symbols for trade in trades[symbol]]
+    return sorted(merged, key=lambda trade: trade['exit_time'])
+
+class WalkForward:
+    """
+    Rolling walk-forward validation of QuantumSmartFlowStrategy parameters.
+
+    Folds start `step` apart (out_of_sample by default): in_sample of history
+    to choose the parameter set with the best `metric`, then out_of_sample
+    on which it is evaluated. Periods are pandas offsets such as '90D'.
+    Finished folds are stored in results_dir and skipped when the same run
+    is started again.
+    """
+
+    def __init__(self, datasets: Dict[str, pd.DataFrame], parameter_sets: List[Dict[str, Any]],
+                 results_dir: str, in_sample: str = '90D', out_of_sample: str = '30D',
+                 step: Optional[str] = None, metric: str = 'total_r', timeframe: str = BASE_TIMEFRAME,
+                 window: Optional[int] = None, max_workers: Optional[int] = None):
+        self.datasets = datasets
+        self.parameter_sets = parameter_sets
+        self.results_dir = Path(results_dir)
+        self.in_sample = pd.Timedelta(in_sample)
+        self.out_of_sample = pd.Timedelta(out_of_sample)
+        self.step = pd.Timedelta(step) if step else self.out_of_sample
+        self.metric = metric
+        self.timeframe = timeframe
+        self.window = window or QuantumSmartFlowStrategy().required_history()
+        self.max_workers = max_workers or os.cpu_count()
+
+        # Fail on unknown parameters here rather than in every worker
+        for params in parameter_sets:
+            QuantumSmartFlowStrategy.with_params(**params)
+
+    def folds(self) -> List[Tuple[pd.Timestamp, pd.Timestamp, pd.Timestamp]]:
+        """
+        (in-sample start, out-of-sample start, out-of-sample end) of every
+        fold, within the period all datasets cover once warmed up
+        """
+        data = [df for df in self.datasets.values() if len(df) >= self.window]
+        if not data:
+            return []
+        start = max(df.index[self.window - 1] for df in data)
+        end = min(df.index[-1] for df in data)
+
+        folds = []
+        while start + self.in_sample + self.out_of_sample <= end:
+            folds.append((start, start + self.in_sample, start + self.in_sample + self.out_of_sample))
+            start += self.step
+        return folds
+
+    def _config(self) -> Dict[str, Any]:
+        """
+        Settings that decide the fold results, as stored next to them
+        """
+        config = {
+            'symbols': list(self.datasets),
+            'parameter_sets': self.parameter_sets,
+            'in_sample': str(self.in_sample),
+            'out_of_sample': str(self.out_of_sample),
+            'step': str(self.step),
+            'metric': self.metric,
+            'timeframe': self.timeframe,
+            'window': self.window
+        }
+        return json.loads(json.dumps(config))
+
+    def _fold_file(self, fold: int) -> Path:
+        return self.results_dir / f"fold_{fold:04d}.json"
+
+    def _prepare_results_dir(self):
+        """
+        Create results_dir, or check that the results in it belong to this run
+        """
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        config_file = self.results_dir / "walk_forward.json"
+        config = self._config()
+        if config_file.exists():
+            if json.loads(config_file.read_text()) != config:
+                raise ValueError(f"{self.results_dir} holds the results of a different walk-forward run")
+        else:
+            config_file.write_text(json.dumps(config, indent=2))
+
+    def _save_fold(self, fold: int, result: Dict[str, Any]):
+        """
+        Write a fold result; the rename makes a half-written file impossible
+        """
+        path = self._fold_file(fold)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(result, indent=2))
+        os.replace(tmp, path)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Run every fold not already in results_dir and return one row per
+        fold, the out-of-sample trades of all folds and their statistics
+        """
+        self._prepare_results_dir()
+        folds = self.folds()
+        results = {}
+        for fold, (start, split, end) in enumerate(folds):
+            if self._fold_file(fold).exists():
+                result = json.loads(self._fold_file(fold).read_text())
+                # Recompute folds whose periods moved, e.g. after older data was added
+                if (result['in_sample_start'], result['out_of_sample_end']) == (start.isoformat(), end.isoformat()):
+                    results[fold] = result
+        todo = [fold for fold in range(len(folds)) if fold not in results]
+
+        if todo:
+            block, layout, total = share_datasets(self.datasets)
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=attach_datasets,
+                                         initargs=(block.name, layout, total)) as executor:
+                    for fold, result in self._run_folds(executor, folds, todo):
+                        self._save_fold(fold, result)
+                        results[fold] = result
+            finally:
+                block.close()
+                block.unlink()
+
+        return self._report([results[fold] for fold in sorted(results)])
+
+    def _run_folds(self, executor: ProcessPoolExecutor, folds: List[Tuple[pd.Timestamp, ...]],
+                   todo: List[int]):
+        """
+        Yield (fold, result) as folds finish. In-sample tasks are queued
+        fold by fold and out-of-sample tasks jump the queue, so folds finish
+        (and are saved) roughly in order instead of all at the end.
+        """
+        symbols = list(self.datasets)
+        queue = deque((fold, index, symbol) for fold in todo
+                      for index in range(len(self.parameter_sets)) for symbol in symbols)
+        in_sample = {fold: [{} for _ in self.parameter_sets] for fold in todo}
+        out_of_sample = {fold: {} for fold in todo}
+        remaining = {fold: len(self.parameter_sets) * len(symbols) for fold in todo}
+        chosen = {}
+        pending = {}
+
+        while queue or pending:
+            while queue and len(pending) < 2 * self.max_workers:
+                fold, index, symbol = queue.popleft()
+                start, split, end = folds[fold]
+                if index is None:
+                    task = (symbol, split, end, self.parameter_sets[chosen[fold]])
+                else:
+                    task = (symbol, start, split, self.parameter_sets[index])
+                future = executor.submit(_replay_period, *task, self.timeframe, self.window)
+                pending[future] = (fold, index, symbol)
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                fold, index, symbol = pending.pop(future)
+                trades = future.result()
+                remaining[fold] -= 1
+                if index is not None:
+                    in_sample[fold][index][symbol] = trades
+                else:
+                    out_of_sample[fold][symbol] = trades
+                if remaining[fold]:
+                    continue
+
+                if fold not in chosen:
+                    # In-sample done: pick the best set, first one on ties
+                    in_sample[fold] = [_merge(trades, symbols) for trades in in_sample[fold]]
+                    scores = [trade_stats([t['r_multiple'] for t in trades])[self.metric]
+                              for trades in in_sample[fold]]
+                    chosen[fold] = max(range(len(scores)), key=scores.__getitem__)
+                    remaining[fold] = len(symbols)
+                    queue.extendleft((fold, None, symbol) for symbol in reversed(symbols))
+                    continue
+
+                start, split, end = folds[fold]
+                trades = _merge(out_of_sample[fold], symbols)
+                best = in_sample[fold][chosen[fold]]
+                yield fold, {
+                    'fold': fold,
+                    'in_sample_start': start.isoformat(),
+                    'out_of_sample_start': split.isoformat(),
+                    'out_of_sample_end': end.isoformat(),
+                    'params': self.parameter_sets[chosen[fold]],
+                    'in_sample': trade_stats([t['r_multiple'] for t in best]),
+                    'out_of_sample': trade_stats([t['r_multiple'] for t in trades]),
+                    'trades': trades
+                }
+                del in_sample[fold], out_of_sample[fold]
+
+    def _report(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fold table, combined out-of-sample trades and their statistics
+        """
+        rows = []
+        for result in results:
+            row = {'fold': result['fold'], 'in_sample_start': result['in_sample_start'],
+                   'out_of_sample_start': result['out_of_sample_start'],
+                   'out_of_sample_end': result['out_of_sample_end']}
+            row.update(result['params'])
+            row.update({f'is_{name}': value for name, value in result['in_sample'].items()})
+            row.update({f'oos_{name}': value for name, value in result['out_of_sample'].items()})
+            rows.append(row)
+
+        trades = [trade for result in results for trade in result['trades']]
+        return {
+            'folds': pd.DataFrame(rows),
+            'trades': trades,
+            'stats': performance_stats(trades)
+        }
@@ -0,0 +1,198 @@
+import random
+from typing import Dict, Iterator, List, Optional, Tuple
+from .models import FAIR_VALUE_GAP, ORDER_BLOCK, Zone
+
+class _Node:
+    """
+    Treap node for one interval (lo, hi). Nodes are never modified once
+    built, so a tree can be shared between copies of an index.
+    """
+    __slots__ = ('key', 'hi', 'item', 'priority', 'left', 'right', 'max_hi')
+
+    def __init__(self, key: Tuple[float, int], hi: float, item, priority: float,
+                 left: Optional['_Node'], right: Optional['_Node']):
+        self.key = key
+        self.hi = hi
+        self.item = item
+        self.priority = priority
+        self.left = left
+        self.right = right
+        # Highest upper bound in the subtree, to skip subtrees below a query price
+        max_hi = hi
+        if left is not None and left.max_hi > max_hi:
+            max_hi = left.max_hi
+        if right is not None and right.max_hi > max_hi:
+            max_hi = right.max_hi
+        self.max_hi = max_hi
+
+    def with_children(self, left: Optional['_Node'], right: Optional['_Node']) -> '_Node':
+        return _Node(self.key, self.hi, self.item, self.priority, left, right)
+
+def _split(node: Optional[_Node], key: Tuple[float, int]) -> Tuple[Optional[_Node], Optional[_Node]]:
+    """
+    Trees of the keys below key and of the rest
+    """
+    if node is None:
+        return None, None
+    if node.key < key:
+        left, right = _split(node.right, key)
+        return node.with_children(node.left, left), right
+    left, right = _split(node.left, key)
+    return left, node.with_children(right, node.right)
+
+def _merge(a: Optional[_Node], b: Optional[_Node]) -> Optional[_Node]:
+    """
+    Join two trees, every key of a being below every key of b
+    """
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return a.with_children(a.left, _merge(a.right, b))
+    return b.with_children(_merge(a, b.left), b.right)
+
+def _walk(node: Optional[_Node]) -> Iterator[_Node]:
+    while node is not None:
+        yield from _walk(node.left)
+        yield node
+        node = node.right
+
+class IntervalTree:
+    """
+    Open intervals (lo, hi) in a treap ordered by lo and augmented with
+    the highest hi of every subtree.
+
+    insert() and pop_from() take O(log n) expected time, stab() O(log n)
+    per interval it returns. Operations build new nodes along the path
+    they change instead of modifying nodes, so copy() is O(1).
+    """
+
+    def __init__(self):
+        self.root: Optional[_Node] = None
+        self.size = 0
+        self.counter = 0  # Tie-breaker for equal lo, in insertion order
+
+    def __len__(self) -> int:
+        return self.size
+
+    def copy(self) -> 'IntervalTree':
+        other = IntervalTree()
+        other.root, other.size, other.counter = self.root, self.size, self.counter
+        return other
+
+    def insert(self, lo: float, hi: float, item):
+        """
+        Add item for the interval (lo, hi)
+        """
+        key = (lo, self.counter)
+        self.counter += 1
+        left, right = _split(self.root, key)
+        node = _Node(key, hi, item, random.random(), None, None)
+        self.root = _merge(_merge(left, node), right)
+        self.size += 1
+
+    def pop_from(self, lo: float) -> List:
+        """
+        Remove the intervals starting at lo or above and return their items
+        """
+        self.root, removed = _split(self.root, (lo, -1))
+        items = [node.item for node in _walk(removed)]
+        self.size -= len(items)
+        return items
+
+    def stab(self, point: float) -> List:
+        """
+        Items whose interval contains point, by lo
+        """
+        found = []
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            # Go left as far as the subtree can hold an interval above point
+            while node is not None and node.max_hi > point:
+                stack.append(node)
+                node = node.left
+            if not stack:
+                break
+            node = stack.pop()
+            if node.key[0] >= point:
+                # Everything from here on starts at or above point
+                break
+            if node.hi > point:
+                found.append(node.item)
+            node = node.right
+        return found
+
+    def items(self) -> List:
+        """
+        Every item, by lo
+        """
+        return [node.item for node in _walk(self.root)]
+
+class ZoneIndex:
+    """
+    Unmitigated order blocks and fair value gaps of one symbol/timeframe,
+    in one interval tree per kind and side.
+
+    A bullish zone is mitigated once price trades down to its bottom, a
+    bearish zone once price trades up to its top; mitigated zones are
+    dropped, however old the others are. Bearish zones are stored as
+    (-top, -bottom) so mitigation is a cut at the low end of the tree on
+    both sides.
+    """
+
+    KINDS = (ORDER_BLOCK, FAIR_VALUE_GAP)
+
+    def __init__(self):
+        self.trees: Dict[Tuple[str, str], IntervalTree] = {
+            (kind, side): IntervalTree() for kind in self.KINDS for side in ('bullish', 'bearish')
+        }
+
+    def __len__(self) -> int:
+        return sum(len(tree) for tree in self.trees.values())
+
+    def copy(self) -> 'ZoneIndex':
+        """
+        Independent copy, O(1) since the trees share their nodes
+        """
+        other = ZoneIndex()
+        other.trees = {key: tree.copy() for key, tree in self.trees.items()}
+        return other
+
+    def add(self, side: str, zone: Zone):
+        """
+        Index a zone that has just formed
+        """
+        tree = self.trees[(zone.kind, side)]
+        if side == 'bullish':
+            tree.insert(zone.bottom, zone.top, zone)
+        else:
+            tree.insert(-zone.top, -zone.bottom, zone)
+
+    def mitigate(self, low: float, high: float) -> List[Zone]:
+        """
+        Drop the zones price reached by trading down to low and up to high,
+        and return them
+        """
+        removed = []
+        for kind in self.KINDS:
+            removed += self.trees[(kind, 'bullish')].pop_from(low)
+            removed += self.trees[(kind, 'bearish')].pop_from(-high)
+        return removed
+
+    def containing(self, kind: str, side: str, price: float) -> List[Zone]:
+        """
+        Zones of one kind and side strictly containing price, oldest first
+        """
+        tree = self.trees[(kind, side)]
+        zones = tree.stab(price) if side == 'bullish' else tree.stab(-price)
+        if len(zones) > 1:
+            zones.sort(key=lambda zone: zone.start)
+        return zones
+
+    def zones(self, kind: str, side: str) -> List[Zone]:
+        """
+        Every indexed zone of one kind and side, oldest first
+        """
+        return sorted(self.trees[(kind, side)].items(), key=lambda zone: zone.start)
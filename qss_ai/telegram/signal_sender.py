@@ -184,6 +184,10 @@ class SignalSender:
         if 'trend_strength' in signal:
             risk_analysis.append(f"{emojis['trend']} Trend Strength: {signal['trend_strength']*100:.1f}%")
         
+        # Higher timeframe confluence
+        if 'confluence' in signal:
+            risk_analysis.append(f"{emojis['timeframe']} HTF Confluence: {signal['confluence']*100:.1f}%")
+        
         # Momentum
         if 'momentum_strength' in signal:
             risk_analysis.append(f"{emojis['momentum']} Momentum: {signal['momentum_strength']*100:.1f}%")
@@ -197,6 +201,14 @@ class SignalSender:
         if 'volume_profile' in signal:
             vp = signal['volume_profile']
             risk_analysis.append(f"{emojis['volume']} POC: {vp['poc']:.5f}")
+
+        # Premium/discount and OTE band
+        if 'retracement' in signal:
+            bands = signal['retracement']
+            zone = "Discount" if signal['entry'] < bands['equilibrium'] else "Premium"
+            side = 'discount' if signal['type'] == 'bullish' else 'premium'
+            risk_analysis.append(f"{emojis['entry']} {zone} Zone, OTE: {bands[f'{side}_ote_low']:.5f} - "
+                                 f"{bands[f'{side}_ote_high']:.5f}")
         
         return '\n'.join(risk_analysis)
 
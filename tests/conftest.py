@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+def random_frame(n: int, seed: int = 0, tick: float = None, freq: str = '15min') -> pd.DataFrame:
+    """
+    OHLCV random walk of n bars with wide swings, so every detector fires.
+    With a tick the prices are rounded to it, which makes equal highs/lows
+    and flat candles common.
+    """
+    rng = np.random.default_rng(seed)
+    mid = 100 + np.cumsum(rng.normal(0, 1.0, n))
+    open_ = mid + rng.normal(0, 0.3, n)
+    close = mid + rng.normal(0, 0.3, n)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0, 0.1, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0, 0.1, n))
+    if tick is not None:
+        open_, high, low, close = (np.round(x / tick) * tick for x in (open_, high, low, close))
+    index = pd.date_range('2024-01-01', periods=n, freq=freq, name='timestamp')
+    return pd.DataFrame({'open': open_, 'high': high, 'low': low, 'close': close,
+                         'volume': rng.uniform(100, 1000, n)}, index=index)
+
+def flat_frame(n: int, price: float = 100.0) -> pd.DataFrame:
+    """
+    n identical bars with no range at all
+    """
+    index = pd.date_range('2024-01-01', periods=n, freq='15min', name='timestamp')
+    return pd.DataFrame({'open': price, 'high': price, 'low': price, 'close': price,
+                         'volume': 100.0}, index=index)
+
+# Frames the detector tests run on: random walks of several sizes, rounded
+# walks full of ties, flat bars and frames too short for any pattern
+FRAMES = {
+    **{f'walk{n}_{seed}': (lambda n=n, seed=seed: random_frame(n, seed))
+       for n in (50, 400, 2000) for seed in (1, 2)},
+    **{f'ticks{n}': (lambda n=n: random_frame(n, n, tick=0.5)) for n in (60, 500)},
+    'flat40': lambda: flat_frame(40),
+    **{f'short{n}': (lambda n=n: random_frame(n, 3)) for n in range(0, 6)},
+}
+
+@pytest.fixture(params=sorted(FRAMES))
+def frame(request) -> pd.DataFrame:
+    return FRAMES[request.param]()
+
+@pytest.fixture
+def strategy():
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    strategy = QuantumSmartFlowStrategy()
+    strategy.result_cache = None
+    return strategy
+
+@pytest.fixture
+def open_gates(monkeypatch):
+    """
+    Let every trend through the momentum and OTE gates, so setups are
+    checked (and signals found) on most bars
+    """
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    monkeypatch.setattr(QuantumSmartFlowStrategy, '_check_momentum',
+                        lambda self, df: (self._check_trend_strength(df)[0], 0.5))
+    monkeypatch.setattr(QuantumSmartFlowStrategy, '_check_optimal_entry', lambda self, *args, **kwargs: True)
+    monkeypatch.setattr(QuantumSmartFlowStrategy, 'ote_bars', lambda self, df: np.ones(len(df), dtype=bool))
@@ -0,0 +1,183 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+# Per-bar loop implementations of the ICT detectors, as they were before
+# they were vectorized. The parity tests check the vectorized detectors
+# against them. Where a later change extended a detector on purpose (FVG
+# fill flags, an ATR-scaled liquidity tolerance, a configurable swing
+# width, time-ordered BOS/CHOCH), the loop is extended the same way and
+# the change is noted on the function.
+
+def order_blocks(df: pd.DataFrame) -> Dict[str, List[Dict]]:
+    bullish_obs = []
+    bearish_obs = []
+
+    for i in range(2, len(df) - 1):
+        # Bullish Order Block
+        if (df['close'].iloc[i] < df['open'].iloc[i] and
+                df['close'].iloc[i+1] > df['open'].iloc[i+1] and
+                df['low'].iloc[i+1] > df['high'].iloc[i]):
+            bullish_obs.append({
+                'start': df.index[i],
+                'end': df.index[i+1],
+                'high': df['high'].iloc[i],
+                'low': df['low'].iloc[i],
+                'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
+            })
+
+        # Bearish Order Block
+        if (df['close'].iloc[i] > df['open'].iloc[i] and
+                df['close'].iloc[i+1] < df['open'].iloc[i+1] and
+                df['high'].iloc[i+1] < df['low'].iloc[i]):
+            bearish_obs.append({
+                'start': df.index[i],
+                'end': df.index[i+1],
+                'high': df['high'].iloc[i],
+                'low': df['low'].iloc[i],
+                'strength': (df['high'].iloc[i] - df['low'].iloc[i]) / df['low'].iloc[i]
+            })
+
+    return {
+        'bullish': bullish_obs[-3:],  # Keep last 3
+        'bearish': bearish_obs[-3:]   # Keep last 3
+    }
+
+def fair_value_gaps(df: pd.DataFrame, threshold: float) -> Dict[str, List[Dict]]:
+    """
+    Every gap rather than the last 3, each with a 'filled' flag: whether any
+    bar after the one completing the gap traded back through its far edge
+    """
+    bullish_fvgs = []
+    bearish_fvgs = []
+    n = len(df)
+
+    for i in range(1, n - 1):
+        # Bullish FVG
+        if (df['low'].iloc[i+1] > df['high'].iloc[i-1] and
+                (df['low'].iloc[i+1] - df['high'].iloc[i-1]) / df['high'].iloc[i-1] > threshold):
+            bottom = df['high'].iloc[i-1]
+            bullish_fvgs.append({
+                'start': df.index[i-1],
+                'end': df.index[i+1],
+                'top': df['low'].iloc[i+1],
+                'bottom': bottom,
+                'size': (df['low'].iloc[i+1] - df['high'].iloc[i-1]) / df['high'].iloc[i-1],
+                'filled': any(df['low'].iloc[j] <= bottom for j in range(i + 2, n))
+            })
+
+        # Bearish FVG
+        if (df['high'].iloc[i+1] < df['low'].iloc[i-1] and
+                (df['low'].iloc[i-1] - df['high'].iloc[i+1]) / df['low'].iloc[i-1] > threshold):
+            top = df['low'].iloc[i-1]
+            bearish_fvgs.append({
+                'start': df.index[i-1],
+                'end': df.index[i+1],
+                'top': top,
+                'bottom': df['high'].iloc[i+1],
+                'size': (df['low'].iloc[i-1] - df['high'].iloc[i+1]) / df['low'].iloc[i-1],
+                'filled': any(df['high'].iloc[j] >= top for j in range(i + 2, n))
+            })
+
+    return {'bullish': bullish_fvgs, 'bearish': bearish_fvgs}
+
+def liquidity_zones(df: pd.DataFrame, cluster_size: int, tolerance: np.ndarray) -> Dict[str, List[Dict]]:
+    """
+    tolerance is per bar; the old detector used fvg_threshold at every bar
+    """
+    bullish_zones = []
+    bearish_zones = []
+
+    for i in range(cluster_size, len(df)):
+        # Check for bullish liquidity (equal lows)
+        if all(abs(df['low'].iloc[i-j] - df['low'].iloc[i]) < tolerance[i]
+               for j in range(cluster_size)):
+            bullish_zones.append({
+                'start': df.index[i-cluster_size],
+                'end': df.index[i],
+                'price': df['low'].iloc[i],
+                'strength': cluster_size,
+                'tolerance': tolerance[i]
+            })
+
+        # Check for bearish liquidity (equal highs)
+        if all(abs(df['high'].iloc[i-j] - df['high'].iloc[i]) < tolerance[i]
+               for j in range(cluster_size)):
+            bearish_zones.append({
+                'start': df.index[i-cluster_size],
+                'end': df.index[i],
+                'price': df['high'].iloc[i],
+                'strength': cluster_size,
+                'tolerance': tolerance[i]
+            })
+
+    return {
+        'bullish': bullish_zones[-3:],  # Keep last 3
+        'bearish': bearish_zones[-3:]   # Keep last 3
+    }
+
+def swings(df: pd.DataFrame, width: int = 2) -> Dict[str, List[Dict]]:
+    """
+    Bars whose high (low) is strictly above (below) the `width` bars on each
+    side; the old detector had the width fixed at 2
+    """
+    swing_highs = []
+    swing_lows = []
+    high, low = df['high'], df['low']
+
+    for i in range(width, len(df) - width):
+        others = [i + j for j in range(-width, width + 1) if j != 0]
+        strength = (high.iloc[i] - low.iloc[i]) / low.iloc[i]
+        if all(high.iloc[i] > high.iloc[k] for k in others):
+            swing_highs.append({'time': df.index[i], 'price': high.iloc[i], 'strength': strength})
+        if all(low.iloc[i] < low.iloc[k] for k in others):
+            swing_lows.append({'time': df.index[i], 'price': low.iloc[i], 'strength': strength})
+
+    return {'swing_highs': swing_highs, 'swing_lows': swing_lows}
+
+def market_structure(df: pd.DataFrame, width: int = 2) -> Dict[str, List[Dict]]:
+    """
+    Swings plus BOS/CHOCH walked in time order. The old detector paired the
+    i-th swing high with the i-th swing low and never filled in CHOCH; this
+    is the chronological rule that replaced it: a higher high is a bullish
+    CHOCH against a bearish trend, and a bullish BOS in a bullish trend or
+    once the last low was higher than the one before. Lower lows mirror it.
+    """
+    points = swings(df, width)
+    events = sorted([(p['time'], 0, p) for p in points['swing_highs']] +
+                    [(p['time'], 1, p) for p in points['swing_lows']], key=lambda e: (e[0], e[1]))
+
+    trend = None
+    highs, lows = [], []
+    bos, choch = [], []
+    for time, kind, point in events:
+        price = point['price']
+        if kind == 0:
+            highs.append(price)
+            if len(highs) < 2 or price <= highs[-2]:
+                continue
+            if trend == 'bearish':
+                choch.append({'time': time, 'type': 'bullish', 'price': price})
+            elif trend == 'bullish' or (len(lows) >= 2 and lows[-1] > lows[-2]):
+                bos.append({'time': time, 'type': 'bullish', 'price': price})
+            else:
+                continue
+            trend = 'bullish'
+        else:
+            lows.append(price)
+            if len(lows) < 2 or price >= lows[-2]:
+                continue
+            if trend == 'bullish':
+                choch.append({'time': time, 'type': 'bearish', 'price': price})
+            elif trend == 'bearish' or (len(highs) >= 2 and highs[-1] < highs[-2]):
+                bos.append({'time': time, 'type': 'bearish', 'price': price})
+            else:
+                continue
+            trend = 'bearish'
+
+    return {
+        'swing_highs': points['swing_highs'][-5:],  # Keep last 5
+        'swing_lows': points['swing_lows'][-5:],    # Keep last 5
+        'bos': bos[-3:],                            # Keep last 3
+        'choch': choch[-3:]                         # Keep last 3
+    }
@@ -0,0 +1,63 @@
+import pytest
+from conftest import random_frame
+
+@pytest.mark.parametrize('params', [{}, {'rsi_period': 7, 'swing_width': 1}])
+def test_sweep_scores_the_backtest_trades(open_gates, monkeypatch, params):
+    from qss_ai.strategy import optimizer
+    from qss_ai.strategy.backtest import Backtester
+
+    datasets = {'A': random_frame(600, 31, tick=0.05), 'B': random_frame(600, 32, tick=0.05)}
+    monkeypatch.setattr(optimizer, '_datasets', datasets)
+    stats = optimizer._evaluate(params, '15m', 200)
+
+    result = Backtester('15m', window=200, params=params, max_workers=1).run(datasets)
+    assert stats['trades'] == len(result['trades']) > 5
+    assert stats == optimizer.trade_stats([trade['r_multiple'] for trade in result['trades']])
+
+def test_with_params_sets_parameters_only():
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    strategy = QuantumSmartFlowStrategy.with_params(rsi_period=7, ema_periods=[8, 21])
+    assert (strategy.rsi_period, strategy.ema_periods, strategy.result_cache) == (7, [8, 21], None)
+    assert strategy._parameter_key() != QuantumSmartFlowStrategy.with_params()._parameter_key()
+
+    # Attributes that are not parameters are rejected along with typos
+    for name in ('rsi_periods', 'pipeline', 'result_cache', 'gate_stats'):
+        with pytest.raises(ValueError, match=name):
+            QuantumSmartFlowStrategy.with_params(**{name: None})
+
+def test_runners_reject_unknown_parameters(tmp_path):
+    from qss_ai.strategy.backtest import Backtester
+    from qss_ai.strategy.optimizer import ParameterSweep
+    from qss_ai.strategy.walk_forward import WalkForward
+
+    datasets = {'A': random_frame(300, 33)}
+    with pytest.raises(ValueError, match='rsi_periods'):
+        Backtester(params={'rsi_periods': 7})
+    with pytest.raises(ValueError, match='rsi_periods'):
+        ParameterSweep(datasets).run([{'rsi_period': 7}, {'rsi_periods': 7}])
+    with pytest.raises(ValueError, match='rsi_periods'):
+        WalkForward(datasets, [{'rsi_periods': 7}], str(tmp_path))
+
+@pytest.mark.parametrize('params', [{}, {'optimal_entry_retracement': (0.3, 0.95)}])
+def test_ote_pre_mask_keeps_the_trades(monkeypatch, params):
+    import numpy as np
+    from qss_ai.strategy.backtest import replay
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+
+    # Only the momentum gate is opened, so the real OTE gate decides
+    monkeypatch.setattr(QuantumSmartFlowStrategy, '_check_momentum',
+                        lambda self, df: (self._check_trend_strength(df)[0], 0.5))
+    df = random_frame(800, 34, tick=0.05)
+    masked = QuantumSmartFlowStrategy.with_params(**params)
+    skipped = ~masked.ote_bars(df)[199:-1]
+    trades = replay(masked, df, 'A', window=200)
+
+    every_bar = QuantumSmartFlowStrategy.with_params(**params)
+    monkeypatch.setattr(every_bar, 'ote_bars', lambda df: np.ones(len(df), dtype=bool))
+    assert replay(every_bar, df, 'A', window=200) == trades
+    assert skipped.sum() > 100 and len(trades) > 0
+
+    # Skipped bars are counted as evaluated and stopped by the OTE gate
+    stats, every_stats = masked.get_gate_stats(), every_bar.get_gate_stats()
+    assert stats['evaluations'] == every_stats['evaluations']
+    assert stats['signals'] == every_stats['signals']
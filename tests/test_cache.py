@@ -0,0 +1,20 @@
+from conftest import random_frame
+
+def test_revised_forming_bar_misses_the_cache():
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    strategy = QuantumSmartFlowStrategy()
+    uncached = QuantumSmartFlowStrategy()
+    uncached.result_cache = None
+    df = random_frame(300, 11)
+
+    strategy.analyze(df, 'S', '15m')
+    strategy.analyze(df, 'S', '15m')
+    assert (strategy.result_cache.hits, strategy.result_cache.misses) == (1, 1)
+
+    # Same closed bars, but the forming bar has traded on
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] += 5.0
+    revised.iloc[-1, revised.columns.get_loc('high')] += 5.0
+    result = strategy.analyze(revised, 'S', '15m')
+    assert (strategy.result_cache.hits, strategy.result_cache.misses) == (1, 2)
+    assert result == uncached.analyze(revised, 'S', '15m')
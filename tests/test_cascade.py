@@ -0,0 +1,40 @@
+import pytest
+from conftest import random_frame
+
+@pytest.fixture
+def frames():
+    return {'4h': random_frame(300, 21, freq='4h'), '1h': random_frame(300, 22, freq='1h'),
+            '15m': random_frame(300, 23)}
+
+def fake_analyze(df, symbol=None, timeframe=None, bias=None):
+    return {'type': bias or 'bullish', 'trend_strength': 0.5}
+
+def test_every_signal_gets_a_confluence_score(strategy, frames, monkeypatch):
+    biases = {'4h': {'direction': 'bullish', 'strength': 0.9},
+              '1h': {'direction': 'bearish', 'strength': 0.7}}
+    monkeypatch.setattr(strategy, 'analyze', fake_analyze)
+    monkeypatch.setattr(strategy, 'get_bias', lambda df, symbol=None, timeframe=None: biases[timeframe])
+
+    signals = strategy.analyze_cascade(frames, 'S')
+    # Nothing above 4h: its own bias would agree with it by construction
+    assert signals['4h']['confluence'] == pytest.approx(0.5)
+    assert signals['1h']['confluence'] == pytest.approx((0.9 + 0.5) / 2)
+    assert signals['15m']['confluence'] == pytest.approx((0.9 + 0.0 + 0.5) / 3)
+    # The bearish 1h lowers the 15m score but does not gate it
+    assert [signals[tf]['htf_bias'] for tf in frames] == [None, 'bullish', 'bullish']
+
+def test_single_timeframe_is_scored_too(strategy, frames, monkeypatch):
+    monkeypatch.setattr(strategy, 'analyze', fake_analyze)
+    monkeypatch.setattr(strategy, 'get_bias', lambda df, symbol=None, timeframe=None:
+                        {'direction': 'bearish', 'strength': 0.8})
+    signals = strategy.analyze_cascade({'4h': frames['4h']}, 'S')
+    assert signals['4h']['confluence'] == pytest.approx(0.5)
+
+def test_neutral_bias_skips_lower_timeframes(strategy, frames, monkeypatch):
+    calls = []
+    monkeypatch.setattr(strategy, 'analyze', lambda df, symbol=None, timeframe=None, bias=None:
+                        calls.append(timeframe))
+    monkeypatch.setattr(strategy, 'get_bias', lambda df, symbol=None, timeframe=None:
+                        {'direction': 'neutral', 'strength': 0.0})
+    assert strategy.analyze_cascade(frames, 'S') == {'4h': None, '1h': None, '15m': None}
+    assert calls == ['4h']
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+import reference
+from conftest import random_frame
+
+def as_dicts(zones):
+    return {side: [zone.to_dict() for zone in items] for side, items in zones.items()}
+
+def test_order_blocks_match_loop(strategy, frame):
+    assert as_dicts(strategy.detect_order_blocks(frame)) == reference.order_blocks(frame)
+
+def test_order_blocks_keep_all(strategy):
+    df = random_frame(400, 5)
+    every = strategy.detect_order_blocks(df, keep=None)
+    last = strategy.detect_order_blocks(df)
+    for side in ('bullish', 'bearish'):
+        assert len(every[side]) > 3
+        assert every[side][-3:] == last[side]
+
+def test_fair_value_gaps_match_loop(strategy, frame):
+    expected = reference.fair_value_gaps(frame, strategy.fvg_threshold)
+    assert as_dicts(strategy.detect_fair_value_gaps(frame)) == expected
+
+def test_liquidity_zones_match_loop_fixed_tolerance(strategy, frame):
+    strategy.liquidity_atr_multiplier = None
+    tolerance = np.full(len(frame), strategy.fvg_threshold)
+    expected = reference.liquidity_zones(frame, strategy.liquidity_cluster_size, tolerance)
+    assert as_dicts(strategy.detect_liquidity_zones(frame)) == expected
+
+@pytest.mark.parametrize('cluster_size', [2, 3, 8])
+def test_liquidity_zones_match_loop_atr_tolerance(strategy, frame, cluster_size):
+    strategy.liquidity_cluster_size = cluster_size
+    tolerance = strategy._average_true_range(frame) * strategy.liquidity_atr_multiplier
+    expected = reference.liquidity_zones(frame, cluster_size, tolerance)
+    assert as_dicts(strategy.detect_liquidity_zones(frame)) == expected
+
+def test_liquidity_zones_on_ticks():
+    # Rounded prices must produce equal highs/lows for the parity above to mean anything
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    strategy = QuantumSmartFlowStrategy()
+    strategy.liquidity_atr_multiplier = None
+    strategy.liquidity_cluster_size = 2
+    zones = strategy.detect_liquidity_zones(random_frame(500, 500, tick=0.5))
+    assert zones['bullish'] and zones['bearish']
+
+@pytest.mark.parametrize('width', [1, 2, 3])
+def test_swings_match_loop(strategy, frame, width):
+    strategy.swing_width = width
+    high_idx, low_idx = strategy._detect_swings(frame)
+    expected = reference.swings(frame, width)
+    assert [p['time'] for p in expected['swing_highs']] == list(frame.index[high_idx])
+    assert [p['time'] for p in expected['swing_lows']] == list(frame.index[low_idx])
+
+@pytest.mark.parametrize('width', [1, 2])
+def test_market_structure_matches_loop(strategy, frame, width):
+    strategy.swing_width = width
+    structure = strategy.detect_market_structure(frame)
+    actual = {name: [point.to_dict() for point in points] for name, points in structure.items()}
+    assert actual == reference.market_structure(frame, width)
+
+def test_flat_frame_has_no_patterns(strategy):
+    from conftest import flat_frame
+    df = flat_frame(40)
+    assert strategy.detect_order_blocks(df) == {'bullish': [], 'bearish': []}
+    assert strategy.detect_fair_value_gaps(df) == {'bullish': [], 'bearish': []}
+    assert strategy.detect_market_structure(df) == {'swing_highs': [], 'swing_lows': [], 'bos': [], 'choch': []}
+    # Zero ATR leaves no tolerance for equal highs/lows
+    assert strategy.detect_liquidity_zones(df) == {'bullish': [], 'bearish': []}
+
+def test_incremental_gaps_follow_the_frame(strategy):
+    # A sliding window drops the gaps that slid out of it, unfilled or not
+    df = random_frame(1500, 6)
+    strategy.incremental_detectors = True
+    for end in range(200, 1500, 13):
+        frame = df.iloc[end - 200:end]
+        incremental = strategy._detect_components(frame, 'S', '15m')['fair_value_gaps']
+        assert as_dicts(incremental) == as_dicts(strategy.detect_fair_value_gaps(frame))
+
+def test_incremental_order_blocks_follow_the_frame(strategy):
+    # Short frames, so they often hold fewer than the three blocks kept
+    df = random_frame(600, 7)
+    strategy.incremental_detectors = True
+    for end in range(12, 600):
+        frame = df.iloc[end - 12:end]
+        incremental = strategy._detect_components(frame, 'S', '15m')['order_blocks']
+        assert as_dicts(incremental) == as_dicts(strategy.detect_order_blocks(frame))
+
+@pytest.mark.parametrize('atr_multiplier', [None, 0.1])
+def test_incremental_liquidity_zones_follow_the_frame(strategy, atr_multiplier):
+    # The frames carry the ATR of the whole history, as analyze() gives them
+    strategy.liquidity_atr_multiplier = atr_multiplier
+    df = strategy._calculate_indicators(random_frame(1500, 8, tick=0.5))
+    strategy.incremental_detectors = True
+    for end in range(200, 1500, 13):
+        frame = df.iloc[end - 200:end]
+        incremental = strategy._detect_components(frame, 'S', '15m')['liquidity_zones']
+        assert as_dicts(incremental) == as_dicts(strategy.detect_liquidity_zones(frame))
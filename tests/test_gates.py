@@ -0,0 +1,62 @@
+import numbers
+import pytest
+from conftest import random_frame
+
+def approx(value):
+    """
+    Signal dict with floats compared to 1e-9: the panel and single-series
+    kernels can differ in the last bits
+    """
+    if isinstance(value, dict):
+        return {key: approx(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [approx(item) for item in value]
+    if isinstance(value, numbers.Real) and not isinstance(value, bool):
+        return pytest.approx(value, rel=1e-9)
+    return value
+
+def test_analyze_many_matches_analyze(strategy, monkeypatch):
+    # Past the batch gates, the OTE gate is the one that rejects most symbols
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    monkeypatch.setattr(QuantumSmartFlowStrategy, '_check_optimal_entry', lambda self, *args, **kwargs: True)
+    frames = {f'S{i}': random_frame(300 + (i % 3) * 50, 100 + i) for i in range(200)}
+    panel, indexes, symbols = strategy.stack_frames(frames)
+    assert panel.shape == (200, 300, 5)
+
+    batch = QuantumSmartFlowStrategy()
+    batch.result_cache = None
+    signals = batch.analyze_many(panel, indexes, symbols)
+    expected = {symbol: strategy.analyze(frames[symbol].iloc[-300:]) for symbol in symbols}
+    assert any(signal is not None for signal in signals.values())
+    assert signals == approx(expected)
+    assert batch.gate_stats == strategy.gate_stats
+
+def frames(n: int = 120):
+    df = random_frame(300 + 3 * n, 9)
+    return [df.iloc[end - 300:end] for end in range(300, len(df), 3)]
+
+def outcomes(stats):
+    # Every evaluation ends at exactly one gate or in a signal
+    return sum(count for stage, count in stats.items() if stage != 'evaluations')
+
+def test_gate_stats_count_rejected_bars(strategy):
+    for df in frames():
+        strategy.analyze(df)
+    for df in frames():
+        strategy.analyze(df, bias='bearish')
+    stats = strategy.get_gate_stats()
+    assert stats['evaluations'] == 2 * len(frames())
+    for stage in ('trend', 'bias', 'momentum', 'optimal_entry'):
+        assert stats[stage] > 0
+    assert outcomes(stats) == stats['evaluations']
+
+def test_gate_stats_count_passed_bars(strategy, open_gates):
+    for df in frames():
+        strategy.analyze(df)
+    stats = strategy.get_gate_stats()
+    assert stats['signals'] > 0 and stats['setup'] > 0
+    assert stats['momentum'] == stats['optimal_entry'] == 0
+    assert outcomes(stats) == stats['evaluations'] == len(frames())
+
+    strategy.reset_gate_stats()
+    assert not any(strategy.get_gate_stats().values())
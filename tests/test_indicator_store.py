@@ -0,0 +1,40 @@
+import numpy as np
+from conftest import random_frame
+from qss_ai.strategy.indicator_store import IndicatorStore
+
+def test_tagged_indicators_are_views_into_the_store(strategy):
+    df = random_frame(400, 1)
+    before = df.copy()
+    for end in (300, 301, 350, 400):
+        frame = df.iloc[:end]
+        out = strategy._calculate_indicators(frame, 'S', '15m')
+        data = strategy.indicator_engine.store.columns[('S', '15m')].data
+        for name in out.columns.drop(frame.columns):
+            assert np.shares_memory(out[name].to_numpy(), data), name
+        # The OHLCV columns are the frame's own, and the frame is left as it was
+        for name in frame.columns:
+            assert np.shares_memory(out[name].to_numpy(), frame[name].to_numpy()), name
+        assert list(frame.columns) == list(before.columns)
+    assert df.equals(before)
+
+def test_views_survive_growth_and_staging():
+    store = IndicatorStore(capacity=4, max_history=3)
+    key = ('S', '15m')
+    for i in range(4):
+        store.append(key, {'a': float(i), 'b': -float(i)})
+    view = store.view(key, 4)
+    assert view['a'].tolist() == [0, 1, 2, 3]
+    assert np.shares_memory(view['a'], store.columns[key].data)
+
+    # Full: the next bar moves the last max_history bars to a new array and
+    # leaves the old one, and the view on it, alone
+    store.append(key, {'a': 4.0, 'b': -4.0})
+    assert view['a'].tolist() == [0, 1, 2, 3]
+    assert store.committed(key) == 4
+    assert store.view(key, 4)['a'].tolist() == [1, 2, 3, 4]
+
+    # The forming bar is only in staged views, and not committed
+    store.stage(key, {'a': 5.0, 'b': -5.0})
+    assert store.view(key, 2, staged=True)['a'].tolist() == [3, 4, 5]
+    assert store.view(key, 2)['b'].tolist() == [-3, -4]
+    assert store.committed(key) == 4
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+from ta.momentum import RSIIndicator, StochasticOscillator
+from ta.trend import EMAIndicator, MACD
+from ta.volatility import BollingerBands
+from ta.volume import VolumeWeightedAveragePrice
+from conftest import random_frame
+from qss_ai.strategy import indicators
+
+def bollinger_ta(high, low, close, volume):
+    bb = BollingerBands(close=close, window=20, window_dev=2)
+    return bb.bollinger_hband(), bb.bollinger_mavg(), bb.bollinger_lband()
+
+def macd_ta(high, low, close, volume):
+    macd = MACD(close=close, window_fast=12, window_slow=26, window_sign=9)
+    return macd.macd(), macd.macd_signal(), macd.macd_diff()
+
+def stochastic_ta(high, low, close, volume):
+    stoch = StochasticOscillator(high=high, low=low, close=close, window=14, smooth_window=3)
+    return stoch.stoch(), stoch.stoch_signal()
+
+# Each NumPy kernel, the `ta` computation it replaces and the warm-up of the
+# longest window involved
+CASES = {
+    'ema': (lambda h, l, c, v: indicators.ema(c, 20),
+            lambda h, l, c, v: EMAIndicator(close=c, window=20).ema_indicator(), 20),
+    'rsi': (lambda h, l, c, v: indicators.rsi(c, 14),
+            lambda h, l, c, v: RSIIndicator(close=c, window=14).rsi(), 14),
+    'bollinger_bands': (lambda h, l, c, v: indicators.bollinger_bands(c, 20, 2), bollinger_ta, 20),
+    'vwap': (lambda h, l, c, v: indicators.vwap(h, l, c, v, 14),
+             lambda h, l, c, v: VolumeWeightedAveragePrice(
+                 high=h, low=l, close=c, volume=v, window=14).volume_weighted_average_price(), 14),
+    'macd': (lambda h, l, c, v: indicators.macd(c, 12, 26, 9), macd_ta, 26 + 9),
+    'stochastic': (lambda h, l, c, v: indicators.stochastic(h, l, c, 14, 3), stochastic_ta, 14 + 3),
+}
+
+FRAMES = {'walk500': random_frame(500, 1), 'walk2000': random_frame(2000, 2),
+          'ticks300': random_frame(300, 3, tick=0.5)}
+
+@pytest.mark.parametrize('frame_name', sorted(FRAMES))
+@pytest.mark.parametrize('name', sorted(CASES))
+def test_kernel_matches_ta(name, frame_name):
+    kernel, reference, warmup = CASES[name]
+    series = [FRAMES[frame_name][column] for column in ('high', 'low', 'close', 'volume')]
+    actual = kernel(*(s.to_numpy() for s in series))
+    expected = reference(*series)
+    if not isinstance(expected, tuple):
+        actual, expected = (actual,), (expected,)
+    for a, e in zip(actual, expected):
+        assert np.allclose(a[warmup:], e.to_numpy()[warmup:], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+def test_backends_agree(strategy):
+    df = random_frame(1000, 4)
+    numpy_backend = strategy._calculate_indicators(df)
+    strategy.indicator_backend = 'ta'
+    ta_backend = strategy._calculate_indicators(df)
+    warmup = max(strategy.indicator_warmup().values())
+    for column in numpy_backend.columns:
+        assert np.allclose(numpy_backend[column].to_numpy()[warmup:], ta_backend[column].to_numpy()[warmup:],
+                           rtol=1e-9, atol=1e-9, equal_nan=True), column
@@ -0,0 +1,119 @@
+import pandas as pd
+import pytest
+from conftest import random_frame
+from qss_ai.exchange import market_data
+from qss_ai.exchange.exchange_interface import ExchangeInterface
+from qss_ai.exchange.market_data import MarketDataProvider
+
+BAR_MS = 15 * 60 * 1000
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+class FakeExchange(ExchangeInterface):
+    """
+    Serves the bars of a frame opened by the clock's time, the last one
+    still forming, in pages of at most max_ohlcv_limit
+    """
+    max_ohlcv_limit = 500
+
+    def __init__(self, bars: pd.DataFrame, clock: Clock):
+        self.bars = bars
+        self.clock = clock
+        self.requests = []
+
+    def fetch_ohlcv(self, symbol, timeframe, limit=100, since=None):
+        self.requests.append((since, limit))
+        bars = self.bars[self.bars.index <= pd.Timestamp(self.clock.now, unit='s')]
+        if since is None:
+            return bars.iloc[-limit:]
+        return bars[bars.index >= pd.Timestamp(since, unit='ms')].iloc[:limit]
+
+    def get_current_price(self, symbol):
+        return self.bars['close'].iloc[-1]
+
+    def get_exchange_info(self):
+        return {}
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 2000 bars into the history, a few minutes into the forming bar
+    clock = Clock(pd.Timestamp('2024-01-01').timestamp() + 2000 * BAR_MS / 1000 + 200)
+    monkeypatch.setattr(market_data, 'time', clock)
+    return clock
+
+@pytest.fixture
+def provider(clock):
+    provider = MarketDataProvider()
+    provider.exchange = FakeExchange(random_frame(3000, 21), clock)
+    return provider
+
+def visible(provider, limit):
+    bars = provider.exchange.bars
+    return bars[bars.index <= pd.Timestamp(provider.exchange.clock.now, unit='s')].iloc[-limit:]
+
+def test_long_history_is_paged(provider):
+    df = provider.fetch_ohlcv('BTC/USDT', '15m', limit=1200)
+    pd.testing.assert_frame_equal(df, visible(provider, 1200))
+    # 1200 bars in pages of 500, each starting right after the last bar of the one before
+    requests = provider.exchange.requests
+    assert [limit for _, limit in requests] == [500, 500, 200]
+    assert [since for since, _ in requests[1:]] == [int(df.index[i].timestamp() * 1000) + 1 for i in (499, 999)]
+
+def test_short_history_is_one_request(provider):
+    df = provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+    pd.testing.assert_frame_equal(df, visible(provider, 300))
+    assert provider.exchange.requests == [(None, 300)]
+
+def test_cache_is_topped_up_from_the_last_bar(provider, clock):
+    provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+    last = provider.cache['BTC/USDT_15m'].index[-1]
+
+    # Three bars later the cached forming bar has closed with other values
+    clock.now += 3 * BAR_MS / 1000
+    provider.exchange.bars.loc[last, 'close'] += 1.0
+    df = provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+
+    # One request, from the cached forming bar on, which is replaced
+    assert provider.exchange.requests[1:] == [(int(last.timestamp() * 1000), 4)]
+    pd.testing.assert_frame_equal(df, visible(provider, 300))
+    assert df.loc[last, 'close'] == provider.exchange.bars.loc[last, 'close']
+
+def test_cache_expiry(provider, clock):
+    first = provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+    clock.now += provider.cache_timeout - 1
+    assert provider.fetch_ohlcv('BTC/USDT', '15m', limit=200).equals(first.iloc[-200:])
+    assert len(provider.exchange.requests) == 1
+
+    # Expired: topped up; more bars than cached: fetched again in full
+    clock.now += 1
+    provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+    assert provider.exchange.requests[-1][1] == 1
+    provider.fetch_ohlcv('BTC/USDT', '15m', limit=400)
+    assert provider.exchange.requests[-1] == (None, 400)
+
+    provider.clear_cache()
+    provider.fetch_ohlcv('BTC/USDT', '15m', limit=300)
+    assert provider.exchange.requests[-1] == (None, 300)
+
+def test_first_load_pages_the_base_history_once(monkeypatch, clock):
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    monkeypatch.setattr(market_data, 'SYMBOLS', ['BTC/USDT'])
+    clock.now += 10000 * BAR_MS / 1000
+    provider = MarketDataProvider()
+    provider.exchange = FakeExchange(random_frame(13000, 22), clock)
+
+    limit = QuantumSmartFlowStrategy().required_history()
+    data = provider.get_all_market_data(limit=limit)['BTC/USDT']
+    assert all(len(df) == limit for df in data.values())
+    # 4h over 15m: (limit + 1) * 16 base bars, in pages of 500
+    assert len(provider.exchange.requests) == -(-(limit + 1) * 16 // 500)
+
+    clock.now += BAR_MS / 1000
+    provider.get_all_market_data(limit=limit)
+    assert provider.exchange.requests[-1][1] == 2
+    assert len(provider.exchange.requests) == -(-(limit + 1) * 16 // 500) + 1
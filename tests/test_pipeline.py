@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+from conftest import random_frame
+
+def signals(strategy, df, window=200):
+    found = (strategy.analyze(df.iloc[end - window:end]) for end in range(window, len(df)))
+    return [signal for signal in found if signal is not None]
+
+def test_registered_detector_is_reported_on_signals(strategy, open_gates):
+    seen = []
+
+    def wide_bars(high, low, atr):
+        seen.append(len(high))
+        return np.flatnonzero(high - low > 2 * atr)
+
+    strategy.pipeline.register('wide_bars', wide_bars, ('high', 'low', 'atr'), detector=True)
+    df = random_frame(400, 41, tick=0.05)
+    found = signals(strategy, df)
+    assert found and seen
+    for signal in found:
+        assert set(signal['detectors']) == {'wide_bars'}
+        assert isinstance(signal['detectors']['wide_bars'], np.ndarray)
+
+def test_signals_have_no_extra_detectors_by_default(strategy, open_gates):
+    found = signals(strategy, random_frame(400, 41, tick=0.05))
+    assert found and all(signal['detectors'] == {} for signal in found)
+
+def test_register_rejects_clashes_and_cycles(strategy):
+    pipeline = strategy.pipeline
+    with pytest.raises(ValueError, match='replace=True'):
+        pipeline.register('atr', lambda high: high, ('high',))
+    with pytest.raises(ValueError, match='cycle'):
+        pipeline.register('loop', lambda atr: atr, ('atr',), outputs=('high_atr',))
+        pipeline.register('atr', lambda x: x, ('high_atr',), replace=True)
@@ -0,0 +1,69 @@
+import tracemalloc
+import numpy as np
+import pytest
+from conftest import random_frame
+from qss_ai.strategy.profiling import HISTOGRAM_LABELS, StageProfiler
+
+def test_disabled_profiler_records_nothing(strategy):
+    assert strategy.profiler.stage('trend') is strategy.profiler.stage('momentum')
+    df = random_frame(400, 41)
+    for end in range(300, 400, 10):
+        strategy.analyze(df.iloc[:end], 'S', '15m')
+    strategy.detect_order_blocks(df)
+    assert strategy.profiler.get_stats() == {}
+    # The detector nodes do not time themselves either
+    assert strategy.pipeline.get_stats() == {}
+
+def test_enabled_profiler_times_every_stage(strategy):
+    strategy.profiler.enabled = True
+    df = random_frame(400, 41)
+    for end in range(300, 400, 10):
+        strategy.analyze(df.iloc[:end], 'S', '15m')
+    stats = strategy.profiler.get_stats()
+    assert list(stats) == [('S', '15m')]
+    assert stats[('S', '15m')]['indicators']['runs'] == 10
+    assert stats[('S', '15m')]['indicators']['bars'] == pytest.approx(345)
+    assert strategy.profiler.stage_totals()['trend']['runs'] == 10
+
+    strategy.detect_order_blocks(df)
+    assert strategy.pipeline.get_stats()['order_blocks']['runs'] >= 1
+
+def test_summary_of_recorded_runs():
+    profiler = StageProfiler(window=20)
+    for _ in range(9):
+        profiler.record(('A', '1h', 'setup'), 5e-4, 100, 3)
+    profiler.record(('A', '1h', 'setup'), 0.2, 300, -1)
+    profiler.record(('B', '1h', 'setup'), 0.05, 100, 0)
+
+    setup = profiler.get_stats(symbol='A')[('A', '1h')]['setup']
+    assert setup['runs'] == 10
+    assert setup['max_ms'] == pytest.approx(200)
+    assert setup['p50_ms'] == pytest.approx(0.5)
+    assert setup['total_ms'] == pytest.approx(204.5)
+    assert setup['bars'] == 120 and setup['allocated_blocks'] == pytest.approx(2.6)
+    assert np.isnan(setup['peak_bytes'])
+    assert setup['histogram'] == {label: {'<1ms': 9, '<300ms': 1}.get(label, 0) for label in HISTOGRAM_LABELS}
+
+    assert list(profiler.get_stats(timeframe='1h')) == [('A', '1h'), ('B', '1h')]
+    assert profiler.stage_totals()['setup']['runs'] == 11
+    assert profiler.summary_lines()[0].startswith('A 1h: setup p50=0.50ms')
+
+    # Only the last `window` runs are kept
+    for _ in range(30):
+        profiler.record(('A', '1h', 'setup'), 1e-3, 100, 0)
+    assert profiler.get_stats()[('A', '1h')]['setup']['runs'] == 20
+
+    profiler.reset()
+    assert profiler.get_stats() == {}
+
+def test_peak_memory_while_tracing():
+    profiler = StageProfiler(enabled=True)
+    tracemalloc.start()
+    try:
+        with profiler.stage('alloc', 'S', '15m', 10):
+            block = np.ones(1_000_000)
+    finally:
+        tracemalloc.stop()
+    del block
+    stats = profiler.get_stats()[('S', '15m')]['alloc']
+    assert stats['peak_bytes'] >= 8_000_000
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+def ranged_frame(ranges) -> pd.DataFrame:
+    """
+    Flat price with candles of the given high-low ranges, so the true range
+    of every bar is its range
+    """
+    ranges = np.asarray(ranges, dtype=float)
+    price = np.full(len(ranges), 100.0)
+    index = pd.date_range('2024-01-01', periods=len(ranges), freq='15min', name='timestamp')
+    return pd.DataFrame({'open': price, 'high': price + ranges / 2, 'low': price - ranges / 2,
+                         'close': price, 'volume': np.full(len(ranges), 100.0)}, index=index)
+
+REGIME_FRAMES = {
+    'high': [1.0] * 200 + [3.0] * 20,
+    'low': [1.0] * 200 + [0.3] * 20,
+    # Back down to the middle of the last regime_lookback ATRs
+    'normal': [1.0] * 200 + list(np.linspace(0.5, 1.5, 50)) + list(np.linspace(1.5, 1.0, 50)),
+}
+
+@pytest.mark.parametrize('regime', sorted(REGIME_FRAMES))
+def test_thresholds_follow_the_regime(strategy, regime):
+    df = ranged_frame(REGIME_FRAMES[regime])
+    assert strategy.volatility_regime(df) == regime
+    assert strategy.get_thresholds(df) == {'fvg_threshold': strategy.fvg_threshold}
+
+    strategy.regime_scaling = (0.75, 1.0, 1.5)
+    scale = dict(zip(('low', 'normal', 'high'), strategy.regime_scaling))[regime]
+    assert strategy.get_thresholds(df) == {'fvg_threshold': pytest.approx(strategy.fvg_threshold * scale)}
+    # The FVG detector reads the same per-bar thresholds
+    thresholds = strategy.pipeline.run(df, ('fvg_thresholds',))['fvg_thresholds']
+    assert thresholds[-1] == pytest.approx(strategy.fvg_threshold * scale)
+
+def test_short_frames_are_normal(strategy):
+    strategy.regime_scaling = (0.75, 1.0, 1.5)
+    df = ranged_frame([1.0] * 50 + [3.0] * 5)
+    assert strategy.volatility_regime(df) == 'normal'
+    assert strategy.volatility_regime(df.iloc[:0]) == 'normal'
+    assert strategy.get_thresholds(df) == {'fvg_threshold': strategy.fvg_threshold}
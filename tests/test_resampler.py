@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+from conftest import random_frame
+from qss_ai.exchange.resampler import TimeframeResampler
+
+AGGREGATES = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def resampled(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    What TimeframeResampler should return: epoch aligned buckets, without a
+    first bucket the base bars only partly cover
+    """
+    bars = df.resample(pd.Timedelta(timeframe), origin='epoch').agg(AGGREGATES)
+    if bars.index[0] != df.index[0]:
+        bars = bars.iloc[1:]
+    return bars
+
+def assert_bars_equal(actual, expected):
+    # The resampler's index is always in ns, whatever unit the base frame had
+    pd.testing.assert_frame_equal(actual, expected, check_freq=False, check_dtype=False, check_index_type=False)
+
+@pytest.mark.parametrize('timeframe', ['30m', '1h', '4h', '1D'])
+def test_buckets_are_epoch_aligned(timeframe):
+    df = random_frame(2000, 31).iloc[24:]  # From 06:00
+    resampler = TimeframeResampler('15m')
+    resampler.update('S', df)
+    bars = resampler.resample('S', timeframe)
+    assert_bars_equal(bars, resampled(df, timeframe))
+    bar = pd.Timedelta(timeframe)
+    assert all((bars.index - pd.Timestamp(0)) % bar == pd.Timedelta(0))
+
+@pytest.mark.parametrize('start', [0, 1, 5, 15, 16])
+def test_partial_first_bucket_is_dropped(start):
+    # 4h buckets hold 16 bars: only starts at a multiple of 16 cover the first one
+    df = random_frame(400, 32).iloc[start:]
+    resampler = TimeframeResampler('15m')
+    resampler.update('S', df)
+    bars = resampler.resample('S', '4h')
+    assert (bars.index[0] == df.index[0]) == (start % 16 == 0)
+    assert_bars_equal(bars, resampled(df, '4h'))
+
+def test_revised_forming_bar_is_replaced():
+    df = random_frame(600, 33)
+    resampler = TimeframeResampler('15m', capacity=300)
+    for end in range(100, 600, 7):
+        # Every feed overlaps the last one. Its last bar is still forming, so
+        # its values differ from the ones the next feed brings once it closed
+        feed = df.iloc[max(0, end - 50) if end > 100 else 0:end].copy()
+        feed.iloc[-1, feed.columns.get_loc('high')] += 5.0
+        feed.iloc[-1, feed.columns.get_loc('volume')] /= 2
+        resampler.update('S', feed)
+
+        seen = pd.concat([df.iloc[max(0, end - 300):end - 1], feed.iloc[-1:]])
+        for timeframe in ('1h', '4h'):
+            assert_bars_equal(resampler.resample('S', timeframe, limit=10), resampled(seen, timeframe).iloc[-10:])
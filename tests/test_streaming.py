@@ -0,0 +1,70 @@
+import math
+import numpy as np
+import pytest
+from conftest import random_frame
+from qss_ai.strategy.streaming import _RollingExtreme, _RollingMoments, _RollingRank, _RollingSum
+
+@pytest.mark.parametrize('size', [1, 3, 14])
+def test_rolling_components_match_brute_force(size):
+    rng = np.random.default_rng(size)
+    prices = np.round(rng.normal(1000, 5, 300), 1)  # Rounded, so ties are common
+    gappy = prices.copy()
+    gappy[[20, 21, 150]] = np.nan                   # Warm-up NaNs, as in ATR or %K
+    large = np.round(rng.normal(1e5, 1, 300), 2)    # Large prices, small moves
+
+    total, rank = _RollingSum(size), _RollingRank(size)
+    highest, lowest = _RollingExtreme(size), _RollingExtreme(size, largest=False)
+    moments = _RollingMoments(size)
+
+    for i in range(300):
+        lo = i - size + 1
+        warm = lo >= 0
+        checks = [
+            (total, gappy[i], gappy[lo:i + 1].sum() if warm else math.nan),
+            (rank, gappy[i], (gappy[lo:i + 1] <= gappy[i]).mean()
+             if warm and not np.isnan(gappy[lo:i + 1]).any() else math.nan),
+            (highest, prices[i], prices[lo:i + 1].max() if warm else math.nan),
+            (lowest, prices[i], prices[lo:i + 1].min() if warm else math.nan),
+        ]
+        for component, x, expected in checks:
+            assert component.peek(x) == pytest.approx(expected, nan_ok=True, rel=1e-12)
+            assert component.push(x) == pytest.approx(expected, nan_ok=True, rel=1e-12)
+
+        window = large[lo:i + 1] if warm else None
+        expected = (window.mean(), window.std()) if warm else (math.nan, math.nan)
+        for mean, std in (moments.peek(large[i]), moments.push(large[i])):
+            assert mean == pytest.approx(expected[0], nan_ok=True, rel=1e-12)
+            assert std == pytest.approx(expected[1], nan_ok=True, rel=1e-6, abs=1e-9)
+
+def test_streaming_matches_full_computation(strategy):
+    df = random_frame(600, 7)
+    full = strategy._calculate_indicators(df)
+    warm = max(strategy.indicator_warmup().values())
+    for end in range(400, 600, 7):
+        streamed = strategy._calculate_indicators(df.iloc[:end], 'S', '15m')
+        for column in full.columns:
+            expected = full[column].to_numpy()[warm:end]
+            assert np.allclose(streamed[column].to_numpy()[warm:], expected, rtol=1e-9, equal_nan=True), column
+
+def test_streaming_state_follows_parameter_changes(strategy):
+    from qss_ai.strategy.smartflow import QuantumSmartFlowStrategy
+    df = random_frame(400, 8)
+    strategy._calculate_indicators(df.iloc[:-1], 'S', '15m')
+    strategy.rsi_period = 5
+    streamed = strategy._calculate_indicators(df, 'S', '15m')
+
+    fresh = QuantumSmartFlowStrategy()
+    fresh.rsi_period = 5
+    expected = fresh._calculate_indicators(df)
+    assert np.allclose(streamed['rsi'].to_numpy()[50:], expected['rsi'].to_numpy()[50:], equal_nan=True)
+
+def test_detector_state_follows_parameter_changes(strategy):
+    df = strategy._calculate_indicators(random_frame(400, 9))
+    strategy.incremental_detectors = True
+    strategy._detect_components(df.iloc[:-1], 'S', '15m')
+    strategy.liquidity_cluster_size = 2
+    incremental = strategy._detect_components(df, 'S', '15m')
+
+    strategy.incremental_detectors = False
+    full = strategy._detect_components(df)
+    assert incremental['liquidity_zones'] == full['liquidity_zones']
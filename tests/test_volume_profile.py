@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import random_frame
+from qss_ai.strategy.volume_profile import (VolumeProfile, session_volume_profiles, value_area,
+                                            volume_profile)
+
+def test_value_area_expands_by_bin_pairs():
+    volumes = np.array([1.0, 2.0, 10.0, 3.0, 1.0, 1.0])
+    # 10 at the POC; the two bins above (4) outweigh the two below (3)
+    assert value_area(volumes, 2, 0.7) == (2, 4)
+    # Then the pair below (3) beats the single bin left above (1)
+    assert value_area(volumes, 2, 0.9) == (0, 4)
+    assert value_area(volumes, 2, 1.0) == (0, 5)
+    assert value_area(np.array([5.0]), 0) == (0, 0)
+
+def test_volume_profile_of_nothing_is_empty():
+    profile = volume_profile(np.array([]), np.array([]), 0.5)
+    assert set(profile) == {'poc', 'value_area_high', 'value_area_low'}
+    assert all(np.isnan(value) for value in profile.values())
+    assert VolumeProfile(0.5).to_dict().keys() == profile.keys()
+
+def test_volume_profile_grid():
+    profile = volume_profile(np.array([10.1, 10.2, 10.6, 11.4]), np.array([1.0, 2.0, 1.0, 1.0]), 0.5)
+    # Bins 20, 21 and 22 hold 3, 1 and 1; the pair above the POC makes 70%
+    assert profile == {'poc': 10.25, 'value_area_high': 11.5, 'value_area_low': 10.0}
+
+def test_rolling_profile_matches_recompute():
+    df = random_frame(1000, 11)
+    close, volume = df['close'].to_numpy(), df['volume'].to_numpy()
+    rolling = VolumeProfile(0.25)
+    start, end = 0, 200
+    rolling.add(close[start:end], volume[start:end])
+    while end + 7 <= len(df):
+        rolling.remove(close[start:start + 7], volume[start:start + 7])
+        rolling.add(close[end:end + 7], volume[end:end + 7])
+        start, end = start + 7, end + 7
+        assert rolling.to_dict() == pytest.approx(volume_profile(close[start:end], volume[start:end], 0.25))
+
+    # Removing everything leaves an empty profile
+    rolling.remove(close[start:end], volume[start:end])
+    assert not len(rolling.volumes) and np.isnan(rolling.to_dict()['poc'])
+
+def test_session_profiles_match_per_session_profiles():
+    df = random_frame(500, 12, freq='1h')
+    profiles, composite = session_volume_profiles(df, 0.5)
+    days = df.groupby(df.index.floor('1D'))
+    assert [profile.pop('session') for profile in profiles] == list(days.groups)
+    assert profiles == [volume_profile(day['close'].to_numpy(), day['volume'].to_numpy(), 0.5)
+                        for _, day in days]
+    assert composite == volume_profile(df['close'].to_numpy(), df['volume'].to_numpy(), 0.5)
+    assert session_volume_profiles(df.iloc[:0], 0.5)[0] == []
+
+def test_tagged_frames_keep_their_profile(strategy):
+    strategy.volume_profile_bin_size = 0.25
+    df = random_frame(800, 13)
+    for end in list(range(200, 800, 9)) + [300, 250]:  # Then a rewind
+        frame = df.iloc[end - 200:end]
+        expected = strategy._check_volume_profile(frame)
+        assert strategy._check_volume_profile(frame, 'S', '15m') == pytest.approx(expected)
+    assert ('S', '15m') in strategy.volume_profile_engine.states
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+from qss_ai.strategy.models import FAIR_VALUE_GAP, ORDER_BLOCK, Zone
+from qss_ai.strategy.zone_index import IntervalTree, ZoneIndex
+
+def random_intervals(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    # Rounded so that bounds and query points often coincide
+    lo = np.round(rng.uniform(0, 50, n), 0)
+    return list(zip(lo.tolist(), (lo + np.round(rng.uniform(0, 5, n), 0)).tolist()))
+
+def filled_tree(intervals) -> IntervalTree:
+    tree = IntervalTree()
+    for i, (lo, hi) in enumerate(intervals):
+        tree.insert(lo, hi, i)
+    return tree
+
+def zone(kind: str, minute: int, bottom: float, top: float) -> Zone:
+    start = pd.Timestamp('2024-01-01') + pd.Timedelta(minutes=minute)
+    return Zone(kind, start, start + pd.Timedelta(minutes=2), top, bottom, 0.0)
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_stab_matches_brute_force(seed):
+    intervals = random_intervals(300, seed)
+    tree = filled_tree(intervals)
+    assert len(tree) == len(intervals)
+    for point in np.arange(-1, 57, 0.5):
+        # Open intervals: neither bound contains the point
+        expected = [i for i, (lo, hi) in enumerate(intervals) if lo < point < hi]
+        found = tree.stab(point)
+        assert sorted(found) == expected
+        assert [intervals[i][0] for i in found] == sorted(intervals[i][0] for i in found)
+
+def test_stab_excludes_bounds():
+    tree = filled_tree([(1.0, 2.0), (2.0, 3.0), (1.0, 1.0)])
+    assert tree.stab(1.0) == []
+    assert tree.stab(2.0) == []
+    assert tree.stab(1.5) == [0]
+    assert tree.stab(2.5) == [1]
+    assert IntervalTree().stab(1.0) == []
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_pop_from_removes_intervals_from_lo_on(seed):
+    intervals = random_intervals(300, seed)
+    tree = filled_tree(intervals)
+    removed = tree.pop_from(25.0)
+    # Intervals starting exactly at the cut go too, in lo then insertion order
+    assert removed == sorted((i for i, (lo, _) in enumerate(intervals) if lo >= 25.0),
+                             key=lambda i: (intervals[i][0], i))
+    assert sorted(tree.items()) == [i for i, (lo, _) in enumerate(intervals) if lo < 25.0]
+    assert len(tree) == len(intervals) - len(removed)
+    assert tree.pop_from(25.0) == []
+
+def test_copy_shares_nothing_mutable():
+    tree = filled_tree(random_intervals(50, 3))
+    copy = tree.copy()
+    copy.pop_from(10.0)
+    copy.insert(60.0, 70.0, 'new')
+    assert len(tree) == 50 and sorted(tree.items()) == list(range(50))
+    assert tree.stab(65.0) == [] and copy.stab(65.0) == ['new']
+
+def test_mitigate_bullish_zones_at_their_bottom():
+    index = ZoneIndex()
+    low_ob = zone(ORDER_BLOCK, 0, 100.0, 102.0)
+    high_ob = zone(ORDER_BLOCK, 1, 104.0, 106.0)
+    gap = zone(FAIR_VALUE_GAP, 2, 103.0, 105.0)
+    for z in (low_ob, high_ob, gap):
+        index.add('bullish', z)
+
+    # Trading down into a zone without reaching its bottom keeps it
+    assert index.mitigate(104.5, 107.0) == []
+    assert len(index) == 3
+    # Reaching the bottom exactly mitigates it, and everything above it
+    assert index.mitigate(104.0, 107.0) == [high_ob]
+    assert index.mitigate(103.0, 104.0) == [gap]
+    assert index.zones(ORDER_BLOCK, 'bullish') == [low_ob]
+    assert index.zones(FAIR_VALUE_GAP, 'bullish') == []
+
+def test_mitigate_bearish_zones_at_their_top():
+    index = ZoneIndex()
+    high_ob = zone(ORDER_BLOCK, 0, 108.0, 110.0)
+    low_ob = zone(ORDER_BLOCK, 1, 104.0, 106.0)
+    gap = zone(FAIR_VALUE_GAP, 2, 105.0, 107.0)
+    for z in (high_ob, low_ob, gap):
+        index.add('bearish', z)
+
+    # Bearish zones ignore the low, however deep
+    assert index.mitigate(90.0, 105.5) == []
+    # Reaching the top exactly mitigates it, and everything below it
+    assert index.mitigate(90.0, 106.0) == [low_ob]
+    assert index.mitigate(100.0, 107.0) == [gap]
+    assert index.zones(ORDER_BLOCK, 'bearish') == [high_ob]
+    assert index.mitigate(100.0, 120.0) == [high_ob]
+    assert len(index) == 0
+
+def test_mitigate_both_sides_in_one_bar():
+    index = ZoneIndex()
+    support = zone(ORDER_BLOCK, 0, 98.0, 99.0)
+    resistance = zone(FAIR_VALUE_GAP, 1, 101.0, 102.0)
+    index.add('bullish', support)
+    index.add('bearish', resistance)
+    assert index.mitigate(99.5, 100.5) == []
+    assert index.mitigate(98.0, 102.0) == [support, resistance]
+
+def test_containing_is_strict_and_oldest_first():
+    index = ZoneIndex()
+    newer = zone(ORDER_BLOCK, 5, 100.0, 104.0)
+    older = zone(ORDER_BLOCK, 0, 101.0, 103.0)
+    index.add('bullish', newer)
+    index.add('bullish', older)
+    index.add('bearish', zone(ORDER_BLOCK, 3, 101.0, 103.0))
+
+    assert index.containing(ORDER_BLOCK, 'bullish', 102.0) == [older, newer]
+    assert index.containing(ORDER_BLOCK, 'bullish', 100.5) == [newer]
+    assert index.containing(ORDER_BLOCK, 'bullish', 104.0) == []
+    assert index.containing(FAIR_VALUE_GAP, 'bullish', 102.0) == []
+    bearish = index.containing(ORDER_BLOCK, 'bearish', 102.0)
+    assert [z.start.minute for z in bearish] == [3]
+    assert index.containing(ORDER_BLOCK, 'bearish', 103.0) == []
+
+    # A copy mitigates independently
+    copy = index.copy()
+    copy.mitigate(0.0, 200.0)
+    assert len(copy) == 0 and len(index) == 3